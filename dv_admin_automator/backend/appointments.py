@@ -1,5 +1,9 @@
 from datetime import datetime ,timedelta 
 from typing import Dict ,Any 
+from dv_admin_automator .pages .base_page import (
+wait_for ,wait_select2_results ,wait_form_saved ,wait_page_after ,
+element_present ,select2_open ,select2_closed ,changelist_rendered ,
+)
 def schedule_cycle_appointments (
 participant_id :str ,
 participant_name :str =None ,
@@ -15,6 +19,7 @@ headless :bool =True
 )->Dict [str ,Any ]:
     pool =get_default_pool ()
     created =None 
+    lease =None 
     print ("[schedule_cycle_appointments] INICIANDO AGENDAMENTO DE CICLO")
     print (f"  participant_id={participant_id } therapist={therapist } plan={plan } start_date={start_date } start_time={start_time } tipo={tipo } minutagem={minutagem } quantidade={quantidade }")
     try :
@@ -24,13 +29,14 @@ headless :bool =True
             print (f"  [sessão pool] Usando manager EXISTENTE (mesmo navegador da busca): {mgr }")
             created =None 
         else :
-            created =pool .create_session (headless =headless )
+            created =pool .acquire_session (headless =headless ,profile ='full')
             mgr =pool .get_manager (created )
             driver =getattr (mgr ,'driver',None )if mgr else None 
             print (f"  [sessão pool] Criada nova sessão: {created } manager={mgr }")
         if not driver :
             print ("  [ERRO] Nenhum driver Selenium disponível!")
             return {'ok':False ,'error':'no_driver'}
+        lease =pool .acquire_lease (mgr )
         try :
             print (f"  [DEBUG] Current URL before scheduling: {driver .current_url }")
         except Exception as e :
@@ -48,14 +54,14 @@ headless :bool =True
             try :
                 print (f"    [criar] Iniciando criação para {data .strftime ('%Y-%m-%d %H:%M')}")
                 driver .get (f'https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/add/')
-                time .sleep (2 )
+                wait_for (driver ,element_present ('.field-patient .select2-selection'),timeout =15 ,raise_on_timeout =False )
                 patient_select2 =driver .find_element ('css selector','.field-patient .select2-selection')
                 patient_select2 .click ()
-                time .sleep (0.5 )
+                wait_for (driver ,select2_open ,timeout =5 ,raise_on_timeout =False )
                 search_input =driver .find_element ('css selector','.select2-search__field')
                 search_input .clear ()
                 search_input .send_keys (str (participant_id ))
-                time .sleep (1.5 )
+                wait_select2_results (driver )
                 selected_patient =False 
                 try :
                     results =driver .find_elements ('css selector','.select2-results__option')
@@ -83,7 +89,7 @@ headless :bool =True
                         try :
                             search_input .clear ()
                             search_input .send_keys (str (participant_name ))
-                            time .sleep (1.5 )
+                            wait_select2_results (driver )
                             results =driver .find_elements ('css selector','.select2-results__option')
                         except Exception :
                             results =[]
@@ -110,7 +116,7 @@ headless :bool =True
                 print (f"      [criar] Paciente selecionado")
                 try :
                     driver .find_element ('css selector','body').click ()
-                    time .sleep (0.2 )
+                    wait_for (driver ,select2_closed ,timeout =2 ,raise_on_timeout =False )
                 except Exception :
                     pass 
                 therapist_select2 =driver .find_element ('css selector','.field-therapist .select2-selection')
@@ -121,11 +127,11 @@ headless :bool =True
                         driver .execute_script ("arguments[0].click();",therapist_select2 )
                     except Exception :
                         pass 
-                time .sleep (0.5 )
+                wait_for (driver ,select2_open ,timeout =5 ,raise_on_timeout =False )
                 search_input =driver .find_element ('css selector','.select2-search__field')
                 search_input .clear ()
                 search_input .send_keys (therapist )
-                time .sleep (1.0 )
+                wait_select2_results (driver )
                 try :
                     results =driver .find_elements ('css selector','.select2-results__option')
                 except Exception :
@@ -169,11 +175,16 @@ headless :bool =True
                 status ='Remarcada'
                 Select (driver .find_element ('id','id_status')).select_by_visible_text (status )
                 driver .find_element ('id','id_associated_plan').send_keys (plan )
-                driver .find_element ('name','_continue').click ()
-                time .sleep (2 )
+                continue_btn =driver .find_element ('name','_continue')
+                continue_btn .click ()
+                if wait_form_saved (driver ,continue_btn )=='error':
+                    raise Exception ("Formulário de consulta retornou erros de validação")
+                wait_for (driver ,element_present ('#id_status'),timeout =10 ,raise_on_timeout =False )
                 Select (driver .find_element ('id','id_status')).select_by_visible_text ('Confirmada')
-                driver .find_element ('name','_save').click ()
-                time .sleep (1 )
+                save_btn =driver .find_element ('name','_save')
+                save_btn .click ()
+                if wait_form_saved (driver ,save_btn )=='error':
+                    raise Exception ("Confirmação da consulta retornou erros de validação")
                 print (f"    [criar] Consulta criada e confirmada!")
                 return {'ok':True ,'date':data .strftime ('%Y-%m-%d %H:%M')}
             except Exception as e :
@@ -190,38 +201,96 @@ headless :bool =True
         'total':len (resultados )
         }
     finally :
+        pool .release_lease (lease )
         try :
             if created :
                 print (f"[schedule_cycle_appointments] Encerrando sessão criada: {created }")
-                pool .close_session (created )
+                pool .release_session (created )
         except Exception as e :
             print (f"[schedule_cycle_appointments] Erro ao fechar sessão: {e }")
+import os 
 import time 
 import re 
 from typing import List ,Dict ,Any ,Optional 
 from dv_admin_automator .browser .pool import get_default_pool 
-def _safe_text (el ):
+from datetime import date 
+from dv_admin_automator .utils .dates import parse_date 
+from urllib .parse import quote_plus ,urljoin ,urlencode ,urlsplit ,parse_qs 
+from dv_admin_automator .backend .participants import PARTICIPANTS_URL ,participant_from_row ,get_participant_directory 
+from dv_admin_automator .backend .changelist import extract_changelist ,read_paginator ,read_sort_index ,cell_texts as row_cell_texts 
+from dv_admin_automator .backend .history_store import get_history_store ,appointment_key 
+from dv_admin_automator .backend .singleflight import SingleFlight 
+from dv_admin_automator .backend .pagefetch import BrowserChangelistReader ,DeadlineExceeded ,fetch_changelist ,fetch_changelist_pages ,merge_pages ,remaining_pages ,time_left 
+from dv_admin_automator .backend .http_admin import AdminAuthError ,HttpChangelistReader ,http_reader 
+APPOINTMENTS_URL ='https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/'
+def _row_to_appointment (row ):
+    cell_texts =row_cell_texts (row )
+    if len (cell_texts )<5 :
+        return None 
+    return {
+    'patient':cell_texts [0 ]if len (cell_texts )>0 else '',
+    'therapist':cell_texts [1 ]if len (cell_texts )>1 else '',
+    'schedule':cell_texts [2 ]if len (cell_texts )>2 else '',
+    'duration':cell_texts [3 ]if len (cell_texts )>3 else '',
+    'status':cell_texts [4 ]if len (cell_texts )>4 else '',
+    'plan':cell_texts [5 ]if len (cell_texts )>5 else '',
+    'device':cell_texts [6 ]if len (cell_texts )>6 else '',
+    'id':cell_texts [7 ]if len (cell_texts )>7 else ''
+    }
+def _appointment_key (appointment ):
+    if appointment .get ('id'):
+        return ('id',appointment .get ('id'))
+    return ('kv',appointment .get ('therapist',''),appointment .get ('schedule',''),appointment .get ('plan',''))
+def _settled (appointments :List [Dict [str ,Any ]])->bool :
+    cutoff =date .today ()-timedelta (days =int (os .environ .get ('DV_HISTORY_MUTABLE_DAYS','30')))
+    dates =[parse_date (a .get ('schedule'),'schedule')for a in appointments ]
+    return bool (dates )and all (d is not None and d <cutoff for d in dates )
+def _participant_results (rows :List [Dict ])->List [Dict [str ,Any ]]:
+    if not rows :
+        return []
+    results =[participant_from_row (row )for row in rows ]
+    directory =get_participant_directory ()
+    if directory is not None :
+        try :
+            directory .upsert (results )
+        except Exception as e :
+            print (f"  [search] participant directory update failed: {e }")
+    return results 
+def _search_participant_rows_http (query :str )->Optional [List [Dict ]]:
+    reader =http_reader ()
+    if reader is None :
+        return None 
+    normalized =re .sub (r'[^\d]','',str (query ))
     try :
-        return el .text .strip ()
-    except Exception :
-        return ''
+        rows =reader .visit (f'{PARTICIPANTS_URL }?q={quote_plus (str (query ))}')
+        if not rows and normalized and normalized !=str (query ):
+            rows =reader .visit (f'{PARTICIPANTS_URL }?q={quote_plus (normalized )}')
+    except Exception as e :
+        print (f"  [search] HTTP search failed, using the browser: {e }")
+        return None 
+    return rows 
 def search_participant_rows (query :str ,manager =None ,headless :bool =True )->List [Dict [str ,Any ]]:
     pool =get_default_pool ()
+    rows =_search_participant_rows_http (query )
+    if rows is not None :
+        return _participant_results (rows )
     created =None 
+    lease =None 
     results :List [Dict [str ,Any ]]=[]
     try :
         if manager is not None :
             mgr =manager 
             driver =getattr (mgr ,'driver',None )
         else :
-            created =pool .create_session (headless =headless )
+            created =pool .acquire_session (headless =headless ,profile ='scrape')
             mgr =pool .get_manager (created )
             driver =getattr (mgr ,'driver',None )if mgr else None 
         if not driver :
             return []
+        lease =pool .acquire_lease (mgr )
         url ='https://webapp.moodar.com.br/moodashboard/app_eleve/participante/'
         driver .get (url )
-        time .sleep (1.2 )
+        wait_for (driver ,changelist_rendered ,timeout =15 ,raise_on_timeout =False )
         normalized =re .sub (r'[^\d]','',str (query ))
         def _submit (qv :str ):
             try :
@@ -229,216 +298,271 @@ def search_participant_rows (query :str ,manager =None ,headless :bool =True )->
                 sb .clear ()
                 sb .send_keys (str (qv ))
                 sb .submit ()
-                time .sleep (1.5 )
+                wait_page_after (driver ,sb ,changelist_rendered )
                 return True 
             except Exception :
                 return False 
         _submit (query )
-        try :
-            rows =driver .find_elements ('css selector','#result_list tbody tr')
-        except Exception :
-            rows =[]
+        rows =extract_changelist (driver )
         if not rows and normalized !=str (query ):
             _submit (normalized )
-            try :
-                rows =driver .find_elements ('css selector','#result_list tbody tr')
-            except Exception :
-                rows =[]
-        if not rows :
-            return []
-        for row in rows :
-            try :
-                link =row .find_element ('css selector','th.field-nome a')
-                urlp =link .get_attribute ('href')or ''
-                name =_safe_text (link )
-                pid =urlp .split ('/participante/')[1 ].split ('/')[0 ]if '/participante/'in urlp else ''
-            except Exception :
-                urlp =''
-                name =''
-                pid =''
-            try :
-                email =row .find_element ('css selector','td.field-email').text .strip ()
-            except Exception :
-                email ='-'
-            try :
-                phone =row .find_element ('css selector','td.field-telefone').text .strip ()
-            except Exception :
-                phone ='-'
-            try :
-                cpf =row .find_element ('css selector','td.field-cpf').text .strip ()
-            except Exception :
-                cpf ='-'
-            try :
-                status =row .find_element ('css selector','td.field-status').text .strip ()
-            except Exception :
-                status ='-'
-            try :
-                created_at =row .find_element ('css selector','td.field-created_at').text .strip ()
-            except Exception :
-                created_at ='-'
-            try :
-                updated_at =row .find_element ('css selector','td.field-updated_at').text .strip ()
-            except Exception :
-                updated_at ='-'
-            try :
-                uid =row .find_element ('css selector','td.field-uid').text .strip ()
-            except Exception :
-                uid ='-'
-            results .append ({
-            'id':pid ,
-            'name':name ,
-            'email':email ,
-            'phone':phone ,
-            'cpf':cpf ,
-            'status':status ,
-            'created_at':created_at ,
-            'updated_at':updated_at ,
-            'uid':uid ,
-            'url':urlp 
-            })
-        return results 
+            rows =extract_changelist (driver )
+        return _participant_results (rows )
     finally :
+        pool .release_lease (lease )
         try :
             if created :
-                pool .close_session (created )
+                pool .release_session (created )
         except Exception :
             pass 
-def get_participant_history (participant_id :str ,manager =None ,headless :bool =True )->dict :
-    import time 
+def _build_history (participant_id :str ,appointments :List [Dict [str ,Any ]])->dict :
+    if not appointments :
+        return {}
+    from collections import Counter 
+    cycle_counter =Counter ()
+    cycle_examples ={}
+    for appt in appointments :
+        key =(appt .get ('plan',''),appt .get ('therapist',''))
+        cycle_counter [key ]+=1 
+        if key not in cycle_examples :
+            cycle_examples [key ]=appt 
+    cycles =[]
+    for (plan ,therapist ),count in cycle_counter .items ():
+        example =cycle_examples [(plan ,therapist )]
+        cycles .append ({
+        'name':example .get ('patient',''),
+        'plan':plan ,
+        'therapist':therapist ,
+        'matches':count 
+        })
+    history ={
+    'participant_id':participant_id ,
+    'total_appointments':len (appointments ),
+    'appointments':appointments ,
+    'cycles':cycles ,
+    'has_previous_cycles':len (appointments )>0 
+    }
+    return history 
+def cached_participant_history (participant_id :str )->Optional [dict ]:
+    store =get_history_store ()
+    if store is None :
+        return None 
+    try :
+        cached =store .get (participant_id )
+    except Exception as e :
+        print (f"  [history] cache read failed for {participant_id }: {e }")
+        return None 
+    if not store .is_fresh (cached ):
+        return None 
+    return _build_history (participant_id ,cached ['appointments'])
+def _load_participant_history (participant_id :str ,manager =None ,headless :bool =True ,use_cache :bool =True ,use_http :bool =True ,deadline :Optional [float ]=None )->dict :
+    store =get_history_store ()if use_cache else None 
+    cached =None 
+    if store is not None :
+        try :
+            cached =store .get (participant_id )
+        except Exception as e :
+            print (f"  [history] cache read failed for {participant_id }: {e }")
+        if store .is_fresh (cached ):
+            print (f"  [history] cache hit for {participant_id } ({len (cached ['appointments'])} appointments)")
+            return _build_history (participant_id ,cached ['appointments'])
     pool =get_default_pool ()
     created =None 
+    lease =None 
+    reader =http_reader ()if use_http else None 
     try :
-        if manager is not None :
-            mgr =manager 
-            driver =getattr (mgr ,'driver',None )
+        if reader is None :
+            if manager is not None :
+                mgr =manager 
+                driver =getattr (mgr ,'driver',None )
+            else :
+                created =pool .acquire_session (headless =headless ,profile ='scrape')
+                mgr =pool .get_manager (created )
+                driver =getattr (mgr ,'driver',None )if mgr else None 
+            if not driver :
+                return {}
+            lease =pool .acquire_lease (mgr ,timeout =time_left (deadline ))
+            reader =BrowserChangelistReader (mgr ,deadline =deadline )
         else :
-            created =pool .create_session (headless =headless )
-            mgr =pool .get_manager (created )
-            driver =getattr (mgr ,'driver',None )if mgr else None 
-        if not driver :
-            return {}
+            reader .deadline =deadline 
         appointments =[]
         seen_keys =set ()
         pages_scanned =0 
-        print (f"  [history] START get_participant_history query={participant_id } manager_provided={'yes'if manager is not None else 'no'}")
+        print (f"  [history] START get_participant_history query={participant_id } manager_provided={'yes'if manager is not None else 'no'} transport={'http'if isinstance (reader ,HttpChangelistReader )else 'browser'}")
         max_pages =50 
-        page_size =100 
-        pages =[None ]+list (range (1 ,max_pages +1 ))
-        for p in pages :
+        base_url =f'{APPOINTMENTS_URL }?q={quote_plus (str (participant_id ))}'
+        def _visit (url ,label ):
             try :
-                if p is None :
-                    url =f'https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/?q={participant_id }'
-                else :
-                    url =f'https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/?q={participant_id }&p={p }'
-                driver .get (url )
-                time .sleep (1.2 )
-                try :
-                    cur_url =driver .current_url 
-                    print (f"  [history] page={p if p is not None else 0 } current_url={cur_url }")
-                except Exception :
-                    cur_url ='<unknown>'
-                if p is None :
-                    try :
-                        search_box =driver .find_element ('id','searchbar')
-                        search_box .clear ()
-                        search_box .send_keys (str (participant_id ))
-                        search_box .submit ()
-                        time .sleep (1.0 )
-                        print (f"  [history] performed initial search for query={participant_id }")
-                    except Exception :
-                        print (f"  [history] initial search submit not available on page {p }")
-                else :
-                    print (f"  [history] skipping search submit on paginated page={p }")
+                rows =reader .visit (url )
+            except (AdminAuthError ,DeadlineExceeded ):
+                raise 
+            except Exception as e :
+                print (f"  [history] error finding rows on page {label }: {e }")
+                rows =[]
+            print (f"  [history] page={label } url={reader .current_url or '<unknown>'} found_rows={len (rows )} seen_before={len (seen_keys )}")
+            return rows 
+        def _collect (rows ,label ):
+            new_on_page =0 
+            for idx ,row in enumerate (rows ):
                 try :
-                    rows =driver .find_elements ('css selector','#result_list tbody tr')
-                    rows_count =len (rows )
-                    print (f"  [history] page={p if p is not None else 0 } url={cur_url } found_rows={rows_count } seen_before={len (seen_keys )}")
+                    appointment =_row_to_appointment (row )
+                    if appointment is None :
+                        continue 
+                    key =_appointment_key (appointment )
+                    if key not in seen_keys :
+                        seen_keys .add (key )
+                        appointments .append (appointment )
+                        new_on_page +=1 
                 except Exception as e :
-                    print (f"  [history] error finding rows on page {p }: {e }")
-                    rows =[]
-                    rows_count =0 
-                if rows_count ==0 :
-                    print (f"  [history] page {p } empty - stopping pagination")
-                    break 
-                new_on_page =0 
-                for idx ,row in enumerate (rows ):
-                    try :
-                        cells =row .find_elements ('tag name','td')
-                        cell_texts =[]
-                        for c in cells :
-                            try :
-                                txt =c .text .strip ()
-                            except Exception :
-                                txt =''
-                            cell_texts .append (txt )
-                        if len (cell_texts )<5 :
+                    print (f"    [history][page {label }][row {idx }] parse error: {e }")
+                    continue 
+            print (f"  [history] page={label } new_unique={new_on_page } seen_after={len (seen_keys )} pages_scanned={pages_scanned +1 }")
+            return new_on_page 
+        order =store .get_meta ('appointment_schedule_order')if store is not None else None 
+        updated_order =store .get_meta ('appointment_updated_order')if store is not None else None 
+        if cached is not None and (updated_order or order )and not store .needs_full (cached ):
+            known ={appointment_key (a ):a for a in cached ['appointments']}
+            sorted_url =f'{base_url }&o=-{updated_order or order }'
+            try :
+                rows =_visit (sorted_url ,'newest')
+                paginator =reader .paginator ()if rows else {}
+                rest =remaining_pages (paginator ,len (rows ),max_pages )if rows else []
+                page =0 
+                while rows :
+                    changed =0 
+                    on_page =[]
+                    for row in rows :
+                        appointment =_row_to_appointment (row )
+                        if appointment is None or _appointment_key (appointment )in seen_keys :
                             continue 
-                        appointment ={
-                        'patient':cell_texts [0 ]if len (cell_texts )>0 else '',
-                        'therapist':cell_texts [1 ]if len (cell_texts )>1 else '',
-                        'schedule':cell_texts [2 ]if len (cell_texts )>2 else '',
-                        'duration':cell_texts [3 ]if len (cell_texts )>3 else '',
-                        'status':cell_texts [4 ]if len (cell_texts )>4 else '',
-                        'plan':cell_texts [5 ]if len (cell_texts )>5 else '',
-                        'device':cell_texts [6 ]if len (cell_texts )>6 else '',
-                        'id':cell_texts [7 ]if len (cell_texts )>7 else ''
-                        }
-                        key =None 
-                        if appointment .get ('id'):
-                            key =('id',appointment .get ('id'))
-                        else :
-                            key =('kv',appointment .get ('therapist',''),appointment .get ('schedule',''),appointment .get ('plan',''),appointment .get ('status',''))
-                        if key not in seen_keys :
-                            seen_keys .add (key )
-                            appointments .append (appointment )
-                            new_on_page +=1 
-                    except Exception as e :
-                        print (f"    [history][page {p }][row {idx }] parse error: {e }")
-                        continue 
-                pages_scanned +=1 
-                print (f"  [history] page={p if p is not None else 0 } new_unique={new_on_page } seen_after={len (seen_keys )} pages_scanned={pages_scanned }")
-                if new_on_page ==0 :
-                    print (f"  [history] page {p } added 0 new unique appointments - stopping pagination and returning results")
-                    stop_reason ='no_new_items'
-                    break 
-                if rows_count <page_size :
-                    print (f"  [history] page {p } has {rows_count } rows (<{page_size }) - stopping pagination")
-                    stop_reason ='last_page_incomplete'
-                    break 
+                        seen_keys .add (_appointment_key (appointment ))
+                        appointments .append (appointment )
+                        on_page .append (appointment )
+                        if known .get (appointment_key (appointment ))!=appointment :
+                            changed +=1 
+                    pages_scanned +=1 
+                    print (f"  [history] incremental page={page } new_or_changed={changed }")
+                    if page >=len (rest )or (not changed and (updated_order or _settled (on_page ))):
+                        break 
+                    page +=1 
+                    rows =_visit (f'{sorted_url }&p={rest [page -1 ]}',rest [page -1 ])
+                fetched ={appointment_key (a )for a in appointments }
+                appointments .extend (a for k ,a in known .items ()if k not in fetched )
+                print (f"  [history] incremental refresh: {len (fetched )} rows re-read from {pages_scanned } page(s), {len (appointments )} total")
+                time_left (deadline )
+                store .put (participant_id ,appointments ,full =False )
+                return _build_history (participant_id ,appointments )
+            except (AdminAuthError ,DeadlineExceeded ):
+                raise 
             except Exception as e :
-                print (f"  [history] error processing page {p }: {e }")
-                break 
+                print (f"  [history] incremental refresh failed, doing full scan: {e }")
+                appointments .clear ()
+                seen_keys .clear ()
+                pages_scanned =0 
+        try :
+            rows =_visit (base_url ,0 )
+            if rows :
+                if store is not None :
+                    idx =reader .sort_index ('schedule')
+                    if idx and str (idx )!=order :
+                        store .set_meta ('appointment_schedule_order',str (idx ))
+                    uidx =reader .sort_index ('updated_at')
+                    if uidx and str (uidx )!=updated_order :
+                        store .set_meta ('appointment_updated_order',str (uidx ))
+                paginator =reader .paginator ()
+                count =paginator .get ('count')
+                _collect (rows ,0 )
+                pages_scanned +=1 
+                rest =remaining_pages (paginator ,len (rows ),max_pages )
+                print (f"  [history] result_count={count } page_size={len (rows )} total_pages={len (rest )+1 } show_all={'yes'if paginator .get ('show_all')else 'no'}")
+                if rest and paginator .get ('show_all'):
+                    all_rows =_visit (urljoin (base_url ,paginator ['show_all']),'all')
+                    if all_rows :
+                        _collect (all_rows ,'all')
+                        pages_scanned +=1 
+                elif rest :
+                    merged ,new_per_page =reader .fetch_pages (lambda p :f'{base_url }&p={p }',rest ,_row_to_appointment ,_appointment_key ,seen =seen_keys )
+                    appointments .extend (merged )
+                    pages_scanned +=len (new_per_page )
+                    print (f"  [history] fetched pages {rest [0 ]}..{rest [-1 ]} in parallel: new_unique={len (merged )} per_page={new_per_page }")
+            time_left (deadline )
+            if store is not None and (appointments or reader .paginator ().get ('count')==0 ):
+                store .put (participant_id ,appointments ,full =True )
+        except (AdminAuthError ,DeadlineExceeded ):
+            raise 
+        except Exception as e :
+            print (f"  [history] error processing pages: {e }")
         if not appointments :
             print (f"  [history] FINISHED: collected 0 appointments after scanning {pages_scanned } pages")
             return {}
-        from collections import Counter 
-        cycle_counter =Counter ()
-        cycle_examples ={}
-        for appt in appointments :
-            key =(appt .get ('plan',''),appt .get ('therapist',''))
-            cycle_counter [key ]+=1 
-            if key not in cycle_examples :
-                cycle_examples [key ]=appt 
-        cycles =[]
-        for (plan ,therapist ),count in cycle_counter .items ():
-            example =cycle_examples [(plan ,therapist )]
-            cycles .append ({
-            'name':example .get ('patient',''),
-            'plan':plan ,
-            'therapist':therapist ,
-            'matches':count 
-            })
-        history ={
-        'participant_id':participant_id ,
-        'total_appointments':len (appointments ),
-        'appointments':appointments ,
-        'cycles':cycles ,
-        'has_previous_cycles':len (appointments )>0 
-        }
-        return history 
+        return _build_history (participant_id ,appointments )
+    except AdminAuthError as e :
+        print (f"  [history] HTTP admin access failed ({e }), retrying with the browser")
+        return _load_participant_history (participant_id ,manager =manager ,headless =headless ,use_cache =use_cache ,use_http =False ,deadline =deadline )
+    finally :
+        if reader is not None :
+            reader .close ()
+        pool .release_lease (lease )
+        try :
+            if created :
+                pool .release_session (created )
+        except Exception :
+            pass 
+_history_flight =SingleFlight (env_prefix ='DV_HISTORY_MEMO')
+def get_participant_history (participant_id :str ,manager =None ,headless :bool =True ,use_cache :bool =True ,deadline :Optional [float ]=None )->dict :
+    key =str (participant_id or '').strip ().lower ()
+    return _history_flight .do (key ,lambda :_load_participant_history (participant_id ,manager =manager ,headless =headless ,use_cache =use_cache ,deadline =deadline ),use_cache =use_cache )
+def history_flight_stats ()->Dict [str ,Any ]:
+    return _history_flight .stats ()
+def forget_participant_history (participant_id :Optional [str ]=None ):
+    _history_flight .forget (str (participant_id ).strip ().lower ()if participant_id else None )
+def scan_appointments (query :str ='acolhimento',since :Optional [date ]=None ,manager =None ,headless :bool =True ,max_pages :int =500 ,until :Optional [date ]=None )->List [Dict [str ,Any ]]:
+    pool =get_default_pool ()
+    created =None 
+    lease =None 
+    try :
+        if manager is not None :
+            mgr =manager 
+        else :
+            created =pool .acquire_session (headless =headless ,profile ='scrape')
+            mgr =pool .get_manager (created )
+        driver =getattr (mgr ,'driver',None )if mgr else None 
+        if not driver :
+            return []
+        lease =pool .acquire_lease (mgr )
+        params ={'q':query }if query else {}
+        if since is not None :
+            params ['schedule__gte']=since .isoformat ()
+        if until is not None :
+            params ['schedule__lt']=(until +timedelta (days =1 )).isoformat ()
+        url =f'{APPOINTMENTS_URL }?{urlencode (params )}'
+        rows =fetch_changelist (driver ,url )
+        if (since is not None or until is not None )and 'e'in parse_qs (urlsplit (driver .current_url ).query ):
+            print (f"  [scan] schedule filter rejected by the admin, scanning without it")
+            params .pop ('schedule__gte',None )
+            params .pop ('schedule__lt',None )
+            url =f'{APPOINTMENTS_URL }?{urlencode (params )}'
+            rows =fetch_changelist (driver ,url )
+        print (f"  [scan] {url } first_page_rows={len (rows )}")
+        seen =set ()
+        appointments ,_ =merge_pages ({0 :rows },[0 ],_row_to_appointment ,_appointment_key ,seen )
+        if not rows :
+            return appointments 
+        paginator =read_paginator (driver )
+        rest =remaining_pages (paginator ,len (rows ),max_pages )
+        print (f"  [scan] result_count={paginator .get ('count')} total_pages={len (rest )+1 } show_all={'yes'if paginator .get ('show_all')else 'no'}")
+        if rest and paginator .get ('show_all'):
+            merged ,_ =merge_pages ({'all':fetch_changelist (driver ,urljoin (url ,paginator ['show_all']))},['all'],_row_to_appointment ,_appointment_key ,seen )
+            appointments .extend (merged )
+        elif rest :
+            merged ,new_per_page =fetch_changelist_pages ([mgr ],lambda p :f'{url }&p={p }',rest ,_row_to_appointment ,_appointment_key ,seen =seen ,fallback_driver =driver )
+            appointments .extend (merged )
+            print (f"  [scan] fetched {len (new_per_page )} more pages: {len (appointments )} appointments")
+        return appointments 
     finally :
+        pool .release_lease (lease )
         try :
             if created :
-                pool .close_session (created )
+                pool .release_session (created )
         except Exception :
             pass 
\ No newline at end of file
@@ -0,0 +1,200 @@
+from html .parser import HTMLParser 
+from urllib .parse import urljoin ,urlsplit ,parse_qs 
+import re 
+from typing import List ,Dict ,Optional 
+import logging 
+logger =logging .getLogger ('dv_admin_automator.backend.changelist')
+def _clean_text (raw :str )->str :
+    lines =[' '.join (line .split ())for line in raw .replace ('\xa0',' ').split ('\n')]
+    return '\n'.join (line for line in lines if line )
+class ChangelistParser (HTMLParser ):
+    def __init__ (self ,table_id :str ='result_list'):
+        super ().__init__ (convert_charrefs =True )
+        self .table_id =table_id 
+        self .rows :List [Dict ]=[]
+        self ._table_depth =0 
+        self ._in_tbody =False 
+        self ._row :Optional [Dict ]=None 
+        self ._cell :Optional [Dict ]=None 
+        self ._text :List [str ]=[]
+        self ._skip =0 
+    def handle_starttag (self ,tag ,attrs ):
+        if tag =='table':
+            if self ._table_depth :
+                self ._table_depth +=1 
+            elif dict (attrs ).get ('id')==self .table_id :
+                self ._table_depth =1 
+            return 
+        if not self ._table_depth :
+            return 
+        if tag in ('script','style'):
+            self ._skip +=1 
+        elif tag =='tbody':
+            self ._in_tbody =True 
+        elif tag =='tr'and self ._in_tbody :
+            self ._row ={'class':dict (attrs ).get ('class')or '','cells':[]}
+        elif tag in ('td','th')and self ._row is not None :
+            self ._close_cell ()
+            a =dict (attrs )
+            self ._cell ={'tag':tag ,'class':a .get ('class')or '','text':'','href':None }
+            self ._text =[]
+        elif self ._cell is not None :
+            if tag =='a'and self ._cell ['href']is None :
+                self ._cell ['href']=dict (attrs ).get ('href')
+            elif tag =='br':
+                self ._text .append ('\n')
+            elif tag in ('p','div','li'):
+                self ._text .append ('\n')
+    def handle_startendtag (self ,tag ,attrs ):
+        self .handle_starttag (tag ,attrs )
+        if tag in ('script','style')and self ._skip :
+            self ._skip -=1 
+    def handle_endtag (self ,tag ):
+        if not self ._table_depth :
+            return 
+        if tag =='table':
+            self ._table_depth -=1 
+            return 
+        if tag in ('script','style'):
+            self ._skip =max (0 ,self ._skip -1 )
+        elif tag in ('td','th'):
+            self ._close_cell ()
+        elif tag =='tr'and self ._row is not None :
+            self ._close_cell ()
+            self .rows .append (self ._row )
+            self ._row =None 
+        elif tag =='tbody':
+            self ._in_tbody =False 
+    def handle_data (self ,data ):
+        if self ._cell is not None and not self ._skip :
+            self ._text .append (data )
+    def _close_cell (self ):
+        if self ._cell is not None and self ._row is not None :
+            self ._cell ['text']=_clean_text (''.join (self ._text ))
+            self ._row ['cells'].append (self ._cell )
+            self ._cell =None 
+def parse_changelist (html :str ,table_id :str ='result_list')->List [Dict ]:
+    parser =ChangelistParser (table_id )
+    parser .feed (html or '')
+    parser .close ()
+    return parser .rows 
+def cell_texts (row :Dict ,tags =('td',))->List [str ]:
+    return [c ['text']for c in row .get ('cells',[])if c ['tag']in tags ]
+def find_cell (row :Dict ,css_class :str )->Optional [Dict ]:
+    for c in row .get ('cells',[]):
+        if css_class in c ['class'].split ():
+            return c 
+    return None 
+_EXTRACT_JS ="""
+var table = document.getElementById(arguments[0]);
+if (!table) return [];
+var out = [];
+var bodies = table.tBodies;
+for (var b = 0; b < bodies.length; b++) {
+    var trs = bodies[b].rows;
+    for (var i = 0; i < trs.length; i++) {
+        var tr = trs[i];
+        var cells = [];
+        for (var j = 0; j < tr.cells.length; j++) {
+            var c = tr.cells[j];
+            var a = c.querySelector('a[href]');
+            cells.push({tag: c.tagName.toLowerCase(), 'class': c.className || '', text: c.innerText || c.textContent || '', href: a ? a.href : null});
+        }
+        out.push({'class': tr.className || '', cells: cells});
+    }
+}
+return out;
+"""
+def extract_changelist (driver ,table_id :str ='result_list')->List [Dict ]:
+    try :
+        rows =driver .execute_script (_EXTRACT_JS ,table_id )
+    except Exception as e :
+        logger .debug ('changelist js extraction failed (%s), parsing page_source',e )
+        try :
+            rows =parse_changelist (driver .page_source ,table_id )
+            base =driver .current_url 
+        except Exception :
+            return []
+        for row in rows :
+            for c in row ['cells']:
+                if c ['href']:
+                    c ['href']=urljoin (base ,c ['href'])
+        return rows 
+    out =[]
+    for row in rows or []:
+        cells =[]
+        for c in row .get ('cells')or []:
+            cells .append ({'tag':c .get ('tag')or 'td','class':c .get ('class')or '','text':_clean_text (c .get ('text')or ''),'href':c .get ('href')})
+        out .append ({'class':row .get ('class')or '','cells':cells })
+    return out 
+def row_fields (row :Dict )->Dict [str ,Dict ]:
+    fields ={}
+    for c in row .get ('cells',[]):
+        for cls in c ['class'].split ():
+            if cls .startswith ('field-'):
+                fields .setdefault (cls [6 :],c )
+    return fields 
+def row_href (row :Dict )->Optional [str ]:
+    for c in row .get ('cells',[]):
+        if c .get ('href'):
+            return c ['href']
+    return None 
+_PAGINATOR_RE =re .compile (r'<(p|nav|div)\b[^>]*class="[^"]*\bpaginator\b[^"]*"[^>]*>(.*?)</\1>',re .S |re .I )
+_LINK_RE =re .compile (r'<a\b([^>]*)>(.*?)</a>',re .S |re .I )
+_THIS_PAGE_RE =re .compile (r'<span\b[^>]*class="[^"]*\bthis-page\b[^"]*"[^>]*>\s*(\d+)\s*</span>',re .S |re .I )
+_ATTR_RE =re .compile (r'([\w-]+)\s*=\s*"([^"]*)"')
+_TAG_RE =re .compile (r'<[^>]+>')
+def parse_paginator (html :str )->Dict :
+    info ={'count':None ,'current':None ,'pages':{},'show_all':None ,'p_base':None }
+    m =_PAGINATOR_RE .search (html or '')
+    if not m :
+        return info 
+    body =m .group (2 )
+    cur =_THIS_PAGE_RE .search (body )
+    if cur :
+        info ['current']=int (cur .group (1 ))
+    for lm in _LINK_RE .finditer (body ):
+        attrs ={k .lower ():v .replace ('&amp;','&')for k ,v in _ATTR_RE .findall (lm .group (1 ))}
+        href =attrs .get ('href')or ''
+        label =_TAG_RE .sub ('',lm .group (2 )).strip ()
+        query =parse_qs (urlsplit (href ).query ,keep_blank_values =True )
+        if 'showall'in attrs .get ('class','').split ()or ('all'in query and 'p'not in query ):
+            info ['show_all']=href 
+        elif label .isdigit ()and query .get ('p',[''])[0 ].isdigit ():
+            info ['pages'][int (label )]=int (query ['p'][0 ])
+        elif attrs .get ('aria-current')=='page'and label .isdigit ():
+            info ['current']=int (label )
+    if info ['pages']:
+        label ,p =next (iter (info ['pages'].items ()))
+        info ['p_base']=p -(label -1 )
+    rest =_TAG_RE .sub (' ',_THIS_PAGE_RE .sub (' ',_LINK_RE .sub (' ',body )))
+    numbers =re .findall (r'\d[\d.,]*',rest )
+    if numbers :
+        try :
+            info ['count']=int (re .sub (r'[.,]','',numbers [-1 ]))
+        except ValueError :
+            pass 
+    return info 
+def read_paginator (driver )->Dict :
+    try :
+        html =driver .execute_script ("var el = document.querySelector('.paginator'); return el ? el.outerHTML : '';")
+    except Exception :
+        try :
+            html =driver .page_source 
+        except Exception :
+            html =''
+    return parse_paginator (html or '')
+def sort_index (href :Optional [str ])->Optional [int ]:
+    value =parse_qs (urlsplit (href or '').query ,keep_blank_values =True ).get ('o',[''])[0 ]
+    first =value .split ('.')[0 ].lstrip ('-')
+    return int (first )if first .isdigit ()else None 
+def read_sort_index (driver ,column :str )->Optional [int ]:
+    try :
+        href =driver .execute_script ("var a = document.querySelector('th.column-' + arguments[0] + ' a[href]'); return a ? a.getAttribute('href') : null;",column )
+    except Exception :
+        return None 
+    return sort_index (href )
+def parse_sort_index (html :str ,column :str )->Optional [int ]:
+    m =re .search (r'<th\b[^>]*class="[^"]*\bcolumn-'+re .escape (column )+r'\b[^"]*"[^>]*>(.*?)</th>',html or '',re .S |re .I )
+    hrefs =[v for k ,v in _ATTR_RE .findall (m .group (1 ))if k .lower ()=='href']if m else []
+    return sort_index (hrefs [0 ].replace ('&amp;','&'))if hrefs else None 
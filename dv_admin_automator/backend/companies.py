@@ -0,0 +1,265 @@
+import glob 
+import json 
+import logging 
+import os 
+import re 
+import tempfile 
+import threading 
+import time 
+from pathlib import Path 
+from typing import Any ,Callable ,Dict ,List ,Optional 
+from dv_admin_automator .backend .changelist import row_fields ,row_href 
+from dv_admin_automator .backend .http_admin import HttpChangelistReader ,admin_http_for 
+from dv_admin_automator .backend .pagefetch import BrowserChangelistReader ,merge_pages ,remaining_pages 
+from dv_admin_automator .backend .participants import normalize_name 
+logger =logging .getLogger ('dv_admin_automator.backend.companies')
+COMPANIES_URL ='https://webapp.moodar.com.br/moodashboard/corporate/company/'
+_COMPANY_ID_RE =re .compile (r'/company/([0-9A-Za-z_-]+)')
+def company_from_row (row :Dict )->Optional [Dict [str ,str ]]:
+    m =_COMPANY_ID_RE .search (row_href (row )or '')
+    if not m :
+        return None 
+    fields =row_fields (row )
+    if 'name'in fields :
+        name =fields ['name']['text']
+    else :
+        tds =[c for c in row .get ('cells',[])if c ['tag']=='td'and 'action-checkbox'not in c ['class'].split ()]
+        linked =next ((c for c in row .get ('cells',[])if c ['href']),None )
+        name =tds [0 ]['text']if tds and tds [0 ]['text']else (linked ['text']if linked else '')
+    if not name :
+        return None 
+    return {'id':str (m .group (1 )),'name':name }
+def _company_key (c :Dict )->str :
+    return c ['id']
+def _read_companies (reader ,log ,max_pages ,known =None ,order =None )->Dict [str ,Any ]:
+    seen =set ()
+    if known is not None and order :
+        url =f'{COMPANIES_URL }?o=-{order }'
+        rows =reader .visit (url )
+        rest =remaining_pages (reader .paginator (),len (rows ),max_pages )if rows else []
+        collected =[]
+        pages =0 
+        while rows :
+            pages +=1 
+            on_page ,_ =merge_pages ({0 :rows },[0 ],company_from_row ,_company_key ,seen )
+            collected .extend (on_page )
+            if not any (known .get (c ['id'])!=c ['name']for c in on_page )or pages >len (rest ):
+                break 
+            rows =reader .visit (f'{url }&p={rest [pages -1 ]}')
+        log (f'[companies] incremental read stopped after {pages } page(s), {len (collected )} companies seen')
+        return {'companies':collected ,'full':False ,'order':order }
+    rows =reader .visit (f'{COMPANIES_URL }?p=0')
+    if not rows :
+        return {'companies':[],'full':True ,'order':None }
+    idx =reader .sort_index ('updated_at')or reader .sort_index ('id')
+    paginator =reader .paginator ()
+    collected ,_ =merge_pages ({0 :rows },[0 ],company_from_row ,_company_key ,seen )
+    log (f'[companies] page 0 collected {len (collected )} companies')
+    rest =remaining_pages (paginator ,len (rows ),max_pages )
+    if rest :
+        log (f'[companies] fetching pages {rest [0 ]}..{rest [-1 ]} (result count {paginator .get ("count")})')
+        merged ,new_per_page =reader .fetch_pages (lambda p :f'{COMPANIES_URL }?p={p }',rest ,company_from_row ,_company_key ,seen =seen )
+        collected .extend (merged )
+        log (f'[companies] {len (new_per_page )} more pages read, total {len (collected )} companies')
+    return {'companies':collected ,'full':True ,'order':str (idx )if idx else None }
+def _collect_over_http (username ,password ,pool ,log ,max_pages ,known =None ,order =None )->Dict [str ,Any ]:
+    return _read_companies (HttpChangelistReader (admin_http_for (username ,password ,pool )),log ,max_pages ,known ,order )
+def _collect_with_browser (pool ,session_id ,username ,password ,headless ,log ,max_pages ,known =None ,order =None )->Dict [str ,Any ]:
+    if pool is None :
+        from dv_admin_automator .browser .pool import get_default_pool 
+        pool =get_default_pool ()
+    created =None 
+    lease =None 
+    reader =None 
+    try :
+        mgr =pool .get_manager (session_id )if session_id else None 
+        if not mgr or not getattr (mgr ,'driver',None ):
+            created =pool .acquire_session (headless =headless ,username =username ,password =password ,profile ='scrape')
+            mgr =pool .get_manager (created )
+        if not mgr or not getattr (mgr ,'driver',None ):
+            raise RuntimeError ('failed to obtain browser manager')
+        lease =pool .acquire_lease (mgr )
+        reader =BrowserChangelistReader (mgr )
+        return _read_companies (reader ,log ,max_pages ,known ,order )
+    finally :
+        if reader is not None :
+            reader .close ()
+        pool .release_lease (lease )
+        if created :
+            try :
+                pool .release_session (created )
+            except Exception :
+                pass 
+class CompanyCatalogue :
+    def __init__ (self ,path :Optional [Path ]=None ,ttl :Optional [float ]=None ,history :int =20 ):
+        if path is None :
+            from dv_admin_automator .activation .storage import LocalStore 
+            path =LocalStore ().base_dir /'companies.json'
+        self .path =Path (path )
+        self .ttl =float (os .environ .get ('DV_COMPANIES_TTL','86400'))if ttl is None else float (ttl )
+        self .full_ttl =float (os .environ .get ('DV_COMPANIES_FULL_TTL','604800'))
+        self .history =history 
+        self ._lock =threading .RLock ()
+        self ._sync_lock =threading .Lock ()
+        self ._sync_thread :Optional [threading .Thread ]=None 
+        self .version =0 
+        self .updated_at =0.0 
+        self .full_at =0.0 
+        self .order :Optional [str ]=None 
+        self .changes :List [Dict ]=[]
+        self ._by_id :Dict [str ,str ]={}
+        self ._by_name :Dict [str ,str ]={}
+        self ._load ()
+    def _load (self ):
+        data =None 
+        try :
+            if self .path .exists ():
+                data =json .loads (self .path .read_text (encoding ='utf-8'))
+        except Exception :
+            logger .warning ('could not read companies catalogue %s',self .path ,exc_info =True )
+        if isinstance (data ,dict )and isinstance (data .get ('companies'),dict ):
+            self .version =int (data .get ('version')or 0 )
+            self .updated_at =float (data .get ('updated_at')or 0 )
+            self .full_at =float (data .get ('full_at')or 0 )
+            self .order =data .get ('order')or None 
+            self .changes =list (data .get ('changes')or [])
+            self ._reindex (data ['companies'])
+            return 
+        legacy =self ._legacy_snapshot ()
+        if legacy :
+            logger .info ('seeding companies catalogue from %s legacy entries',len (legacy ))
+            self .apply (legacy ,full =True ,updated_at =0.0 )
+    def _legacy_snapshot (self )->Dict [str ,str ]:
+        found :Dict [str ,str ]={}
+        try :
+            from dv_admin_automator .activation .storage import LocalStore 
+            legacy_path =LocalStore ().creds_dir /'companies_cache.json'
+            if legacy_path .exists ():
+                data =json .loads (legacy_path .read_text (encoding ='utf-8'))
+                if isinstance (data ,dict ):
+                    found .update ({str (k ):v for k ,v in data .items ()if isinstance (v ,str )and v })
+        except Exception :
+            pass 
+        hourly =sorted (glob .glob (os .path .join (os .getcwd (),'companies_cache_*.json')),reverse =True )
+        if hourly :
+            try :
+                with open (hourly [0 ],'r',encoding ='utf-8')as fh :
+                    data =json .load (fh )
+                if isinstance (data ,list ):
+                    found .update ({str (c .get ('id')):c .get ('name','')for c in data if c .get ('id')is not None and c .get ('name')})
+            except Exception :
+                pass 
+        return found 
+    def _reindex (self ,companies :Dict [str ,str ]):
+        self ._by_id =dict (companies )
+        self ._by_name ={}
+        for cid ,name in self ._by_id .items ():
+            self ._by_name .setdefault (normalize_name (name ),cid )
+    def _save (self ):
+        payload ={'version':self .version ,'updated_at':self .updated_at ,'full_at':self .full_at ,'order':self .order ,'companies':self ._by_id ,'changes':self .changes }
+        self .path .parent .mkdir (parents =True ,exist_ok =True )
+        fd ,tmp =tempfile .mkstemp (dir =str (self .path .parent ),prefix ='companies_',suffix ='.tmp')
+        try :
+            with os .fdopen (fd ,'w',encoding ='utf-8')as fh :
+                json .dump (payload ,fh ,ensure_ascii =False ,indent =1 )
+            os .replace (tmp ,self .path )
+        except Exception :
+            try :
+                os .remove (tmp )
+            except Exception :
+                pass 
+            raise 
+    def apply (self ,companies :Dict [str ,str ],full :bool =True ,updated_at :Optional [float ]=None )->Dict [str ,Any ]:
+        with self ._lock :
+            current =self ._by_id 
+            added ={cid :name for cid ,name in companies .items ()if cid not in current }
+            renamed ={cid :{'from':current [cid ],'to':name }for cid ,name in companies .items ()if cid in current and current [cid ]!=name }
+            removed ={cid :name for cid ,name in current .items ()if cid not in companies }if full else {}
+            merged ={}if full else dict (current )
+            merged .update (companies )
+            self .updated_at =time .time ()if updated_at is None else updated_at 
+            changed =bool (added or renamed or removed )
+            if changed :
+                self .version +=1 
+                self .changes =(self .changes +[{'version':self .version ,'at':self .updated_at ,'added':added ,'renamed':renamed ,'removed':removed }])[-self .history :]
+                self ._reindex (merged )
+            self ._save ()
+            return {'version':self .version ,'changed':changed ,'total':len (self ._by_id ),'added':len (added ),'renamed':len (renamed ),'removed':len (removed )}
+    def companies (self ,q :str ='')->List [Dict [str ,str ]]:
+        with self ._lock :
+            items =[{'id':cid ,'name':name }for cid ,name in self ._by_id .items ()]
+        if q :
+            ql =normalize_name (q )
+            items =[c for c in items if ql in normalize_name (c ['name'])or ql in c ['id'].lower ()]
+        return items 
+    def as_map (self )->Dict [str ,str ]:
+        with self ._lock :
+            return dict (self ._by_id )
+    def get (self ,company_id :Any )->Optional [str ]:
+        return self ._by_id .get (str (company_id ))
+    def resolve (self ,name :str )->Optional [str ]:
+        key =normalize_name (name )
+        if not key :
+            return None 
+        with self ._lock :
+            cid =self ._by_name .get (key )
+            if cid is not None :
+                return cid 
+            for n ,cid in self ._by_name .items ():
+                if key in n :
+                    return cid 
+        return None 
+    def is_stale (self )->bool :
+        return not self ._by_id or time .time ()-self .updated_at >=self .ttl 
+    def stats (self )->Dict [str ,Any ]:
+        with self ._lock :
+            return {'path':str (self .path ),'version':self .version ,'updated_at':self .updated_at ,'full_at':self .full_at ,'order':self .order ,'total':len (self ._by_id ),'stale':self .is_stale (),'changes':self .changes [-5 :]}
+    def needs_full_sync (self )->bool :
+        return not self ._by_id or not self .order or time .time ()-self .full_at >=self .full_ttl 
+    def sync (self ,username :Optional [str ]=None ,password :Optional [str ]=None ,pool =None ,session_id :Optional [str ]=None ,headless :bool =True ,log :Optional [Callable [[str ],None ]]=None ,max_pages :int =500 ,full :bool =False )->Dict [str ,Any ]:
+        log =log or (lambda msg :logger .info ('%s',msg ))
+        with self ._sync_lock :
+            started =time .time ()
+            incremental =not full and not self .needs_full_sync ()
+            known =self .as_map ()if incremental else None 
+            order =self .order if incremental else None 
+            result =None 
+            if os .environ .get ('DV_COMPANIES_HTTP','1').strip ().lower ()not in ('0','false','no','off'):
+                try :
+                    result =_collect_over_http (username ,password ,pool ,log ,max_pages ,known ,order )
+                except Exception as e :
+                    log (f'[companies] HTTP admin access failed ({e }); falling back to the browser')
+            if not result or not result ['companies']:
+                result =_collect_with_browser (pool ,session_id ,username ,password ,headless ,log ,max_pages ,known ,order )
+            if not result ['companies']:
+                raise RuntimeError ('no companies found in the admin changelist')
+            with self ._lock :
+                if result ['full']:
+                    self .full_at =time .time ()
+                    self .order =result ['order']
+                diff =self .apply ({c ['id']:c ['name']for c in result ['companies']},full =result ['full'])
+            diff ['mode']='full'if result ['full']else 'incremental'
+            diff ['seconds']=round (time .time ()-started ,2 )
+            log (f"[companies] {diff ['mode']} sync, catalogue v{diff ['version']}: {diff ['total']} companies, +{diff ['added']} added, {diff ['renamed']} renamed, -{diff ['removed']} removed ({diff ['seconds']}s)")
+            return diff 
+    def ensure_fresh (self ,**kwargs ):
+        if not self .is_stale ():
+            return 
+        with self ._lock :
+            if self ._sync_thread and self ._sync_thread .is_alive ():
+                return 
+            self ._sync_thread =threading .Thread (target =self ._sync_quietly ,kwargs =kwargs ,daemon =True ,name ='dv-company-sync')
+            self ._sync_thread .start ()
+    def _sync_quietly (self ,**kwargs ):
+        try :
+            self .sync (**kwargs )
+        except Exception :
+            logger .warning ('companies catalogue sync failed',exc_info =True )
+_default_catalogue :Optional [CompanyCatalogue ]=None 
+_default_lock =threading .Lock ()
+def get_company_catalogue ()->CompanyCatalogue :
+    global _default_catalogue 
+    with _default_lock :
+        if _default_catalogue is None :
+            _default_catalogue =CompanyCatalogue ()
+        return _default_catalogue 
\ No newline at end of file
@@ -0,0 +1,106 @@
+import json 
+import logging 
+import os 
+import sqlite3 
+import threading 
+import time 
+from pathlib import Path 
+from typing import Any ,Dict ,List ,Optional 
+logger =logging .getLogger ('dv_admin_automator.backend.history_store')
+_SCHEMA =(
+"CREATE TABLE IF NOT EXISTS histories (participant TEXT PRIMARY KEY, fetched_at REAL NOT NULL, full_at REAL NOT NULL)",
+"CREATE TABLE IF NOT EXISTS appointments (participant TEXT NOT NULL, akey TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (participant, akey))",
+"CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)",
+)
+def _normalize (participant :Any )->str :
+    return str (participant or '').strip ().lower ()
+def appointment_key (appointment :Dict )->str :
+    if appointment .get ('id'):
+        return json .dumps (['id',appointment .get ('id')])
+    return json .dumps (['kv',appointment .get ('therapist',''),appointment .get ('schedule',''),appointment .get ('plan','')],ensure_ascii =False )
+class HistoryStore :
+    def __init__ (self ,path :Optional [Path ]=None ,ttl :Optional [float ]=None ,full_ttl :Optional [float ]=None ):
+        if path is None :
+            from dv_admin_automator .activation .storage import LocalStore 
+            path =LocalStore ().base_dir /'history.sqlite3'
+        self .path =Path (path )
+        self .ttl =float (os .environ .get ('DV_HISTORY_TTL','900'))if ttl is None else float (ttl )
+        self .full_ttl =float (os .environ .get ('DV_HISTORY_FULL_TTL','86400'))if full_ttl is None else float (full_ttl )
+        self ._lock =threading .Lock ()
+        self .path .parent .mkdir (parents =True ,exist_ok =True )
+        self ._conn =sqlite3 .connect (str (self .path ),check_same_thread =False ,isolation_level =None )
+        self ._conn .execute ('PRAGMA journal_mode=WAL')
+        self ._conn .execute ('PRAGMA synchronous=NORMAL')
+        for stmt in _SCHEMA :
+            self ._conn .execute (stmt )
+    def get (self ,participant :Any )->Optional [Dict ]:
+        pkey =_normalize (participant )
+        with self ._lock :
+            head =self ._conn .execute ('SELECT fetched_at, full_at FROM histories WHERE participant = ?',(pkey ,)).fetchone ()
+            if head is None :
+                return None 
+            rows =self ._conn .execute ('SELECT data FROM appointments WHERE participant = ? ORDER BY seq',(pkey ,)).fetchall ()
+        return {'appointments':[json .loads (r [0 ])for r in rows ],'fetched_at':head [0 ],'full_at':head [1 ]}
+    def is_fresh (self ,entry :Optional [Dict ])->bool :
+        return bool (entry )and time .time ()-entry ['fetched_at']<self .ttl 
+    def needs_full (self ,entry :Optional [Dict ])->bool :
+        return not entry or time .time ()-entry ['full_at']>=self .full_ttl 
+    def put (self ,participant :Any ,appointments :List [Dict ],full :bool =True ):
+        pkey =_normalize (participant )
+        now =time .time ()
+        rows =[]
+        seen =set ()
+        for appt in appointments :
+            k =appointment_key (appt )
+            if k in seen :
+                continue 
+            seen .add (k )
+            rows .append ((pkey ,k ,len (rows ),json .dumps (appt ,ensure_ascii =False )))
+        with self ._lock :
+            try :
+                self ._conn .execute ('BEGIN IMMEDIATE')
+                prev =self ._conn .execute ('SELECT full_at FROM histories WHERE participant = ?',(pkey ,)).fetchone ()
+                full_at =now if full or prev is None else prev [0 ]
+                self ._conn .execute ('DELETE FROM appointments WHERE participant = ?',(pkey ,))
+                self ._conn .executemany ('INSERT INTO appointments (participant, akey, seq, data) VALUES (?, ?, ?, ?)',rows )
+                self ._conn .execute ('INSERT OR REPLACE INTO histories (participant, fetched_at, full_at) VALUES (?, ?, ?)',(pkey ,now ,full_at ))
+                self ._conn .execute ('COMMIT')
+            except Exception :
+                self ._conn .execute ('ROLLBACK')
+                raise 
+    def invalidate (self ,participant :Any =None ):
+        with self ._lock :
+            if participant is None :
+                self ._conn .execute ('DELETE FROM appointments')
+                self ._conn .execute ('DELETE FROM histories')
+            else :
+                pkey =_normalize (participant )
+                self ._conn .execute ('DELETE FROM appointments WHERE participant = ?',(pkey ,))
+                self ._conn .execute ('DELETE FROM histories WHERE participant = ?',(pkey ,))
+    def get_meta (self ,name :str )->Optional [str ]:
+        with self ._lock :
+            row =self ._conn .execute ('SELECT value FROM meta WHERE name = ?',(name ,)).fetchone ()
+        return row [0 ]if row else None 
+    def set_meta (self ,name :str ,value :Optional [str ]):
+        with self ._lock :
+            self ._conn .execute ('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',(name ,value ))
+    def stats (self )->Dict [str ,Any ]:
+        with self ._lock :
+            participants =self ._conn .execute ('SELECT COUNT(*) FROM histories').fetchone ()[0 ]
+            appointments =self ._conn .execute ('SELECT COUNT(*) FROM appointments').fetchone ()[0 ]
+            fresh =self ._conn .execute ('SELECT COUNT(*) FROM histories WHERE fetched_at > ?',(time .time ()-self .ttl ,)).fetchone ()[0 ]
+        return {'path':str (self .path ),'ttl':self .ttl ,'full_ttl':self .full_ttl ,'participants':participants ,'fresh':fresh ,'appointments':appointments }
+_default_store :Optional [HistoryStore ]=None 
+_default_lock =threading .Lock ()
+def get_history_store ()->Optional [HistoryStore ]:
+    global _default_store 
+    if os .environ .get ('DV_HISTORY_CACHE','1').strip ().lower ()in ('0','false','no','off'):
+        return None 
+    with _default_lock :
+        if _default_store is None :
+            try :
+                _default_store =HistoryStore ()
+            except Exception :
+                logger .warning ('appointment history cache unavailable',exc_info =True )
+                return None 
+        return _default_store 
\ No newline at end of file
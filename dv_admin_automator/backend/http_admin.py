@@ -0,0 +1,216 @@
+import logging 
+import os 
+import re 
+import threading 
+import time 
+from concurrent .futures import ThreadPoolExecutor 
+from typing import Any ,Callable ,Dict ,Iterable ,List ,Optional ,Tuple 
+from urllib .parse import urljoin ,urlsplit 
+import requests 
+from requests .adapters import HTTPAdapter 
+from dv_admin_automator .backend .changelist import parse_changelist ,parse_paginator ,parse_sort_index 
+from dv_admin_automator .backend .pagefetch import DeadlineExceeded ,merge_pages ,time_left 
+logger =logging .getLogger ('dv_admin_automator.backend.http_admin')
+ADMIN_URL ='https://webapp.moodar.com.br/moodashboard/'
+_PASSWORD_INPUT_RE =re .compile (r'<input\b[^>]*type=["\']password["\']',re .I )
+_FORM_RE =re .compile (r'<form\b([^>]*)>(.*?)</form>',re .S |re .I )
+_INPUT_RE =re .compile (r'<input\b([^>]*)>',re .I )
+_ATTR_RE =re .compile (r'([\w-]+)\s*=\s*["\']([^"\']*)["\']')
+class AdminAuthError (Exception ):
+    pass 
+def default_http_workers ()->int :
+    try :
+        return max (1 ,int (os .environ .get ('DV_HTTP_WORKERS','8')))
+    except ValueError :
+        return 8 
+def http_enabled ()->bool :
+    return os .environ .get ('DV_ADMIN_HTTP','1').strip ().lower ()not in ('0','false','no','off')
+def is_login_page (url :str ,html :str )->bool :
+    return bool (_PASSWORD_INPUT_RE .search (html or ''))or '/login'in urlsplit (url or '').path 
+def _login_form (html :str )->Tuple [Optional [str ],Dict [str ,str ]]:
+    for m in _FORM_RE .finditer (html or ''):
+        if not _PASSWORD_INPUT_RE .search (m .group (2 )):
+            continue 
+        action =dict (_ATTR_RE .findall (m .group (1 ))).get ('action')
+        fields ={}
+        for im in _INPUT_RE .finditer (m .group (2 )):
+            attrs ={k .lower ():v for k ,v in _ATTR_RE .findall (im .group (1 ))}
+            if attrs .get ('name'):
+                fields [attrs ['name']]=attrs .get ('value','')
+        return action ,fields 
+    return None ,{}
+class AdminHttp :
+    def __init__ (self ,base_url :str =ADMIN_URL ,workers :Optional [int ]=None ,timeout :Optional [float ]=None ,username :Optional [str ]=None ,password :Optional [str ]=None ,pool =None ):
+        self .base_url =base_url 
+        self .workers =default_http_workers ()if workers is None else max (1 ,int (workers ))
+        self .timeout =float (os .environ .get ('DV_HTTP_TIMEOUT','20'))if timeout is None else float (timeout )
+        self .username =username 
+        self .password =password 
+        self .pool =pool 
+        self .session =requests .Session ()
+        adapter =HTTPAdapter (pool_connections =2 ,pool_maxsize =self .workers ,max_retries =2 )
+        self .session .mount ('https://',adapter )
+        self .session .mount ('http://',adapter )
+        self .session .headers ['User-Agent']='Mozilla/5.0 (dv-admin-automator)'
+        self .authenticated =False 
+        self .logins =0 
+        self .auth_retry =float (os .environ .get ('DV_HTTP_AUTH_RETRY','60'))
+        self ._auth_lock =threading .Lock ()
+        self ._generation =0 
+        self ._failed_at :Optional [float ]=None 
+    def _pool (self ):
+        if self .pool is None :
+            from dv_admin_automator .browser .pool import get_default_pool 
+            self .pool =get_default_pool ()
+        return self .pool 
+    def load_cookies (self ,cookies :Iterable [Dict [str ,Any ]])->int :
+        n =0 
+        for c in cookies or []:
+            if not c .get ('name'):
+                continue 
+            self .session .cookies .set (c ['name'],c .get ('value',''),domain =c .get ('domain'),path =c .get ('path')or '/')
+            n +=1 
+        return n 
+    def cookies_from_pool (self ,username :Optional [str ]=None )->bool :
+        pool =self ._pool ()
+        username =username or self .username 
+        sessions =[s for s in pool .sessions_info ()if s .get ('authenticated')and not s .get ('busy')]
+        sessions .sort (key =lambda s :username is not None and s .get ('username')!=username )
+        for s in sessions :
+            try :
+                cookies =pool .export_cookies (s ['id'],timeout =0 )
+            except Exception as e :
+                logger .debug ('could not read cookies from session %s: %s',s ['id'],e )
+                continue 
+            if self .load_cookies (cookies )and self .check ():
+                logger .info ('reusing cookies of browser session %s for HTTP admin access',s ['id'])
+                return True 
+        return False 
+    def check (self )->bool :
+        try :
+            resp =self .session .get (self .base_url ,timeout =self .timeout )
+        except requests .RequestException :
+            return False 
+        self .authenticated =resp .ok and not is_login_page (resp .url ,resp .text )
+        return self .authenticated 
+    def login (self ,username :Optional [str ]=None ,password :Optional [str ]=None )->bool :
+        username =username or self .username 
+        password =password or self .password 
+        if not username or not password :
+            creds =self ._pool ().credentials_for ()
+            if not creds :
+                return False 
+            username ,password =creds ['username'],creds ['password']
+        try :
+            resp =self .session .get (self .base_url ,timeout =self .timeout )
+            if resp .ok and not is_login_page (resp .url ,resp .text ):
+                self .authenticated =True 
+                return True 
+            action ,fields =_login_form (resp .text )
+            fields .update ({'username':username ,'password':password })
+            post =self .session .post (urljoin (resp .url ,action or resp .url ),data =fields ,headers ={'Referer':resp .url },timeout =self .timeout )
+        except requests .RequestException as e :
+            raise AdminAuthError (f'login request failed: {e }')from e 
+        self .authenticated =post .ok and not is_login_page (post .url ,post .text )
+        if self .authenticated :
+            self .username ,self .password =username ,password 
+            self .logins +=1 
+        return self .authenticated 
+    def authenticate (self ,stale :bool =False ,generation :Optional [int ]=None )->bool :
+        with self ._auth_lock :
+            if self .authenticated and (not stale or (generation is not None and generation !=self ._generation )):
+                return True 
+            if not stale and self ._failed_at is not None and time .monotonic ()-self ._failed_at <self .auth_retry :
+                return False 
+            self .authenticated =False 
+            ok =False 
+            try :
+                ok =self .cookies_from_pool ()or self .login ()
+            finally :
+                if ok :
+                    self ._generation +=1 
+                    self ._failed_at =None 
+                else :
+                    self ._failed_at =time .monotonic ()
+            return ok 
+    def get_html (self ,url :str ,timeout :Optional [float ]=None )->Tuple [str ,str ]:
+        for attempt in range (2 ):
+            generation =self ._generation 
+            resp =self .session .get (url ,timeout =timeout or self .timeout )
+            if resp .status_code !=403 and not is_login_page (resp .url ,resp .text ):
+                resp .raise_for_status ()
+                return resp .url ,resp .text 
+            if attempt or not self .authenticate (stale =True ,generation =generation ):
+                break 
+            logger .info ('admin session expired, logged in again for %s',url )
+        raise AdminAuthError (f'admin rejected the session for {url } (HTTP {resp .status_code })')
+    def page (self ,url :str ,timeout :Optional [float ]=None )->Dict [str ,Any ]:
+        final_url ,html =self .get_html (url ,timeout )
+        rows =parse_changelist (html )
+        for row in rows :
+            for c in row ['cells']:
+                if c ['href']:
+                    c ['href']=urljoin (final_url ,c ['href'])
+        return {'url':final_url ,'html':html ,'rows':rows }
+    def changelist (self ,url :str )->Tuple [List [Dict ],Dict ]:
+        page =self .page (url )
+        return page ['rows'],parse_paginator (page ['html'])
+    def fetch_pages (self ,url_for :Callable [[Any ],str ],pages :Iterable [Any ],convert :Callable [[Dict ],Any ],key :Callable [[Any ],Any ],seen :Optional [set ]=None ,workers :Optional [int ]=None ,deadline :Optional [float ]=None )->Tuple [List ,Dict [Any ,int ]]:
+        pages =list (pages )
+        seen =set ()if seen is None else seen 
+        results :Dict [Any ,List ]={}
+        if pages :
+            def _one (p ):
+                try :
+                    return p ,self .page (url_for (p ),time_left (deadline ,self .timeout ))['rows']
+                except (AdminAuthError ,DeadlineExceeded ):
+                    raise 
+                except Exception as e :
+                    logger .warning ('page %s fetch failed: %s',p ,e )
+                    return p ,None 
+            n =min (len (pages ),self .workers if workers is None else max (1 ,int (workers )))
+            logger .info ('fetching %s changelist pages over HTTP with %s workers',len (pages ),n )
+            with ThreadPoolExecutor (max_workers =n ,thread_name_prefix ='dv-http')as ex :
+                for p ,rows in ex .map (_one ,pages ):
+                    if rows is not None :
+                        results [p ]=rows 
+        return merge_pages (results ,pages ,convert ,key ,seen )
+class HttpChangelistReader :
+    def __init__ (self ,client :AdminHttp ,deadline :Optional [float ]=None ):
+        self .client =client 
+        self .deadline =deadline 
+        self .current_url =None 
+        self ._html =''
+    def visit (self ,url :str )->List [Dict ]:
+        page =self .client .page (url ,time_left (self .deadline ,self .client .timeout ))
+        self .current_url ,self ._html =page ['url'],page ['html']
+        return page ['rows']
+    def paginator (self )->Dict :
+        return parse_paginator (self ._html )
+    def sort_index (self ,column :str )->Optional [int ]:
+        return parse_sort_index (self ._html ,column )
+    def fetch_pages (self ,url_for ,pages ,convert ,key ,seen =None ):
+        return self .client .fetch_pages (url_for ,pages ,convert ,key ,seen =seen ,deadline =self .deadline )
+    def close (self ):
+        pass 
+_clients :Dict [str ,AdminHttp ]={}
+_clients_lock =threading .Lock ()
+def admin_http_for (username :Optional [str ]=None ,password :Optional [str ]=None ,pool =None )->AdminHttp :
+    with _clients_lock :
+        client =_clients .get (username or '')
+        if client is None :
+            client =AdminHttp (username =username ,password =password ,pool =pool )
+            _clients [username or '']=client 
+    if password :
+        client .password =password 
+    if client .authenticate ():
+        return client 
+    raise AdminAuthError ('no authenticated admin session available over HTTP')
+def http_reader ()->Optional [HttpChangelistReader ]:
+    if not http_enabled ():
+        return None 
+    try :
+        return HttpChangelistReader (admin_http_for ())
+    except Exception as e :
+        logger .info ('HTTP admin access unavailable, using the browser: %s',e )
+        return None 
\ No newline at end of file
@@ -6,6 +6,7 @@ import traceback
 from typing import Callable ,Optional ,Dict ,Any 
 import pandas as pd 
 from ...browser .pool import get_default_pool 
+from ..companies import get_company_catalogue 
 LOG_PREFIX ='[legacy_adapter]'
 def _safe_log (log_fn :Callable [[str ,str ],None ],job_id :str ,msg :str ):
     try :
@@ -152,56 +153,12 @@ def write_csv_with_fallback (df :pd .DataFrame ,target_path :str ,log_fn ,job_id
                 pass 
     return None 
 def fetch_companies_map_via_admin (pool ,session_id :Optional [str ],log_fn ,job_id :str )->Dict [str ,str ]:
-    out ={}
-    manager =None 
+    catalogue =get_company_catalogue ()
     try :
-        if session_id :
-            manager =pool .get_manager (session_id )
-        if not manager :
-            sid =pool .create_session (headless =False )
-            manager =pool .get_manager (sid )
-        driver =manager .start ()if not getattr (manager ,'driver',None )else manager .driver 
-        base ='https://webapp.moodar.com.br/moodashboard/corporate/company/?p='
-        page =0 
-        while True :
-            url =base +str (page )
-            _safe_log (log_fn ,job_id ,f'visiting {url }')
-            driver .get (url )
-            time .sleep (1 )
-            rows =driver .find_elements ('css selector','table#result_list tbody tr')
-            if not rows :
-                break 
-            newly =0 
-            for tr in rows :
-                try :
-                    link =None 
-                    try :
-                        link =tr .find_element ('css selector','th a')
-                        href =link .get_attribute ('href')or ''
-                        m =re .search (r'/company/(\d+)/',href )
-                        cid =m .group (1 )if m else (link .text or '').strip ()
-                    except Exception :
-                        cid =''
-                    name =''
-                    try :
-                        cols =tr .find_elements ('css selector','td')
-                        if len (cols )>=1 :
-                            name =cols [0 ].text .strip ()
-                    except Exception :
-                        name =''
-                    if cid and name and cid not in out :
-                        out [str (cid )]=name 
-                        newly +=1 
-                except Exception :
-                    pass 
-            _safe_log (log_fn ,job_id ,f'page {page } collected {newly } new companies (total {len (out )})')
-            if newly ==0 :
-                break 
-            page +=1 
-        return out 
+        catalogue .sync (pool =pool ,session_id =session_id ,log =lambda msg :_safe_log (log_fn ,job_id ,msg ))
     except Exception as e :
         _safe_log (log_fn ,job_id ,f'fetch_companies_map exception: {e }\n{traceback .format_exc ()}')
-        return out 
+    return catalogue .as_map ()
 def run_import_full (upload_path :str ,job_id :str ,log_fn :Callable [[str ,str ],None ],*,
 browser_session_id :Optional [str ]=None ,
 headless :bool =True ,minimized :bool =False ,
@@ -221,42 +178,15 @@ import_type :str ='auto')->bool :
         cols =detect_columns_by_content (df )
         _safe_log (log_fn ,job_id ,f'detected columns {cols }')
         resolved_company_id =company_id 
-        if not resolved_company_id :
-            if company_name :
-                try :
-                    from dv_admin_automator .activation .storage import LocalStore 
-                    import json 
-                    store =LocalStore ()
-                    legacy_path =os .path .join (store .creds_dir ,'companies_cache.json')
-                    if os .path .exists (legacy_path ):
-                        _safe_log (log_fn ,job_id ,f'loading legacy companies cache from {legacy_path }')
-                        try :
-                            with open (legacy_path ,'r',encoding ='utf-8')as fh :
-                                legacy_map =json .load (fh )
-                            for cid ,nm in legacy_map .items ():
-                                if isinstance (nm ,str )and nm .strip ().lower ()==company_name .strip ().lower ():
-                                    resolved_company_id =cid 
-                                    break 
-                            if not resolved_company_id :
-                                for cid ,nm in legacy_map .items ():
-                                    if isinstance (nm ,str )and company_name .strip ().lower ()in nm .strip ().lower ():
-                                        resolved_company_id =cid 
-                                        break 
-                        except Exception as e :
-                            _safe_log (log_fn ,job_id ,f'failed to read legacy cache: {e }')
-                except Exception :
-                    pass 
-                if not resolved_company_id :
-                    mapping =fetch_companies_map_via_admin (pool ,browser_session_id ,log_fn ,job_id )
-                    for cid ,nm in mapping .items ():
-                        if nm .strip ().lower ()==company_name .strip ().lower ():
-                            resolved_company_id =cid 
-                            break 
-                    if not resolved_company_id :
-                        for cid ,nm in mapping .items ():
-                            if company_name .strip ().lower ()in nm .strip ().lower ():
-                                resolved_company_id =cid 
-                                break 
+        if not resolved_company_id and company_name :
+            catalogue =get_company_catalogue ()
+            if catalogue .is_stale ()and not catalogue .as_map ():
+                _safe_log (log_fn ,job_id ,'companies catalogue is empty, syncing it once')
+                fetch_companies_map_via_admin (pool ,browser_session_id ,log_fn ,job_id )
+            else :
+                catalogue .ensure_fresh (pool =pool )
+            resolved_company_id =catalogue .resolve (company_name )
+            _safe_log (log_fn ,job_id ,f'resolved company {company_name!r} -> {resolved_company_id!r} from catalogue v{catalogue .version }')
         if not resolved_company_id :
             _safe_log (log_fn ,job_id ,'company id not provided and could not be resolved')
             return False 
@@ -1,8 +1,8 @@
 import os 
-import time 
 import traceback 
 from typing import Callable ,Optional ,Tuple 
 from ...browser .pool import get_default_pool 
+from ...pages .base_page import wait_for ,wait_page_after ,element_present 
 LOG_PREFIX ='[import_runner]'
 def _safe_log (log_fn :Callable [[str ,str ],None ],job_id :str ,msg :str ):
     try :
@@ -17,6 +17,8 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
     pool =get_default_pool ()
     manager =None 
     created_local =False 
+    session =None 
+    awaiting =False 
     try :
         _safe_log (log_fn ,job_id ,'starting import')
         if browser_session_id :
@@ -27,7 +29,7 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
                 _safe_log (log_fn ,job_id ,f'no session {browser_session_id } found; will create new browser')
         if not manager :
             _safe_log (log_fn ,job_id ,f'creating temporary browser (headless={headless })')
-            session =pool .create_session (headless =headless )
+            session =pool .acquire_session (headless =headless )
             manager =pool .get_manager (session )
             created_local =True 
         if getattr (manager ,'driver',None ):
@@ -58,7 +60,7 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
             try :
                 _safe_log (log_fn ,job_id ,f'navigating to {url }')
                 manager .driver .get (url )
-                time .sleep (1 )
+                wait_for (manager .driver ,element_present ("input[name='import_file']"),timeout =10 ,raise_on_timeout =False )
                 file_input =None 
                 try :
                     file_input =manager .driver .find_element (By .NAME ,'import_file')
@@ -87,12 +89,14 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
                     sel .select_by_value ('0')
                 except Exception :
                     _safe_log (log_fn ,job_id ,'format select not found - continuing')
+                submit_btn =None 
                 try :
                     submit_btn =manager .driver .find_element (By .CSS_SELECTOR ,"input[type='submit'], button[type='submit']")
                     submit_btn .click ()
                 except Exception :
                     _safe_log (log_fn ,job_id ,'submit button not found or click failed')
-                time .sleep (2 )
+                if submit_btn is not None :
+                    wait_page_after (manager .driver ,submit_btn ,timeout =30 )
                 _safe_log (log_fn ,job_id ,'upload step completed; waiting for preview/confirm')
                 try :
                     confirm_btn =None 
@@ -107,10 +111,11 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
                             if auto_confirm :
                                 _safe_log (log_fn ,job_id ,'clicking confirm')
                                 confirm_btn .click ()
-                                time .sleep (1 )
+                                wait_page_after (manager .driver ,confirm_btn ,timeout =30 )
                                 _safe_log (log_fn ,job_id ,'confirm clicked')
                             else :
                                 _safe_log (log_fn ,job_id ,'awaiting manual confirmation by user (auto_confirm disabled)')
+                                awaiting =True 
                                 sid =None 
                                 try :
                                     sid =getattr (manager ,'session_id',None )
@@ -126,6 +131,7 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
                         page_src =''
                     if page_src and ('confirmar'in page_src .lower ()or 'confirm'in page_src .lower ()):
                         _safe_log (log_fn ,job_id ,'detected confirm-like text in page; awaiting manual confirmation (heuristic)')
+                        awaiting =True 
                         sid =None 
                         try :
                             sid =getattr (manager ,'session_id',None )
@@ -148,19 +154,9 @@ auto_confirm :bool =True )->Tuple [bool ,bool ,Optional [str ]]:
         _safe_log (log_fn ,job_id ,f'exception: {e }\n{traceback .format_exc ()}')
         return False ,False ,None 
     finally :
-        if created_local :
+        if created_local and session and not awaiting :
             try :
-                pool =get_default_pool ()
-                now =time .time ()
-                to_close =[]
-                for sid ,info in list (pool ._sessions .items ()):
-                    if now -info .get ('created_at',0 )<15 :
-                        to_close .append (sid )
-                for sid in to_close :
-                    try :
-                        pool .close_session (sid )
-                    except Exception :
-                        pass 
+                pool .release_session (session )
             except Exception :
                 pass 
 def confirm_import_session (session_id :str ,job_id :str ,log_fn :Callable [[str ,str ],None ])->bool :
@@ -190,7 +186,7 @@ def confirm_import_session (session_id :str ,job_id :str ,log_fn :Callable [[str
                 return False 
             _safe_log (log_fn ,job_id ,'confirm_import_session: clicking confirm')
             confirm_btn .click ()
-            time .sleep (1 )
+            wait_page_after (driver ,confirm_btn ,timeout =30 )
             _safe_log (log_fn ,job_id ,'confirm_import_session: clicked')
             return True 
         except Exception as e :
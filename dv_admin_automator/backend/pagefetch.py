@@ -0,0 +1,159 @@
+import contextlib 
+import logging 
+import os 
+import queue 
+import threading 
+import time 
+from typing import Any ,Callable ,Dict ,Iterable ,List ,Optional ,Tuple 
+from dv_admin_automator .backend .changelist import extract_changelist ,read_paginator ,read_sort_index 
+from dv_admin_automator .pages .base_page import wait_for ,changelist_rendered 
+logger =logging .getLogger ('dv_admin_automator.backend.pagefetch')
+class DeadlineExceeded (TimeoutError ):
+    pass 
+def time_left (deadline :Optional [float ],cap :Optional [float ]=None )->Optional [float ]:
+    if deadline is None :
+        return cap 
+    left =deadline -time .time ()
+    if left <=0 :
+        raise DeadlineExceeded ('deadline exceeded')
+    return left if cap is None else min (cap ,left )
+def default_workers ()->int :
+    try :
+        return max (1 ,int (os .environ .get ('DV_PAGE_FETCH_WORKERS','3')))
+    except ValueError :
+        return 3 
+def fetch_changelist (driver ,url :str ,timeout :float =15 )->List [Dict ]:
+    driver .get (url )
+    wait_for (driver ,changelist_rendered ,timeout =timeout ,raise_on_timeout =False )
+    return extract_changelist (driver )
+@contextlib .contextmanager 
+def tab_worker (manager ,url_for :Callable [[Any ],str ],timeout :Optional [float ]=30 ):
+    try :
+        tab =manager .acquire_tab (timeout )
+    except Exception as e :
+        logger .debug ('no tab available on %r: %s',manager ,e )
+        yield None 
+        return 
+    try :
+        yield lambda page :fetch_changelist (tab .driver ,url_for (page ))
+    finally :
+        manager .release_tab (tab )
+def total_pages (paginator :Dict ,page_size :int )->int :
+    count =paginator .get ('count')
+    if count is not None and page_size :
+        return max (1 ,-(-count //page_size ))
+    return max (paginator .get ('pages')or {},default =1 )
+def remaining_pages (paginator :Dict ,page_size :int ,max_pages :int =50 ,default_base :int =0 )->List [int ]:
+    p_base =paginator .get ('p_base')
+    if p_base is None :
+        p_base =default_base 
+    return [p_base +i for i in range (1 ,min (total_pages (paginator ,page_size ),max_pages +1 ))]
+def fetch_pages (pages :Iterable [Any ],workers :List [Any ],fallback :Optional [Callable [[Any ],List ]]=None )->Dict [Any ,List ]:
+    pages =list (pages )
+    results :Dict [Any ,List ]={}
+    if not pages :
+        return results 
+    work :'queue.Queue'=queue .Queue ()
+    for p in pages :
+        work .put (p )
+    lock =threading .Lock ()
+    def _run (worker ):
+        with worker as fetch :
+            if fetch is None :
+                return 
+            while True :
+                try :
+                    p =work .get_nowait ()
+                except queue .Empty :
+                    return 
+                try :
+                    rows =fetch (p )
+                except Exception as e :
+                    logger .warning ('page %s fetch failed: %s',p ,e )
+                    continue 
+                with lock :
+                    results [p ]=rows 
+    threads =[threading .Thread (target =_run ,args =(w ,),daemon =True ,name =f'dv-pagefetch-{i }')for i ,w in enumerate (workers )]
+    for t in threads :
+        t .start ()
+    for t in threads :
+        t .join ()
+    for p in pages :
+        if p not in results and fallback is not None :
+            try :
+                results [p ]=fallback (p )
+            except Exception as e :
+                logger .warning ('page %s fallback fetch failed: %s',p ,e )
+    return results 
+def merge_pages (results :Dict [Any ,List ],pages :Iterable [Any ],convert :Callable [[Dict ],Any ],key :Callable [[Any ],Any ],seen :set )->Tuple [List ,Dict [Any ,int ]]:
+    merged =[]
+    new_per_page :Dict [Any ,int ]={}
+    for p in pages :
+        rows =results .get (p )
+        if not rows :
+            break 
+        new =0 
+        for row in rows :
+            item =convert (row )
+            if item is None :
+                continue 
+            k =key (item )
+            if not k or k in seen :
+                continue 
+            seen .add (k )
+            merged .append (item )
+            new +=1 
+        new_per_page [p ]=new 
+    return merged ,new_per_page 
+def fetch_changelist_pages (managers :List [Any ],url_for :Callable [[Any ],str ],pages :Iterable [Any ],convert :Callable [[Dict ],Any ],key :Callable [[Any ],Any ],seen :Optional [set ]=None ,workers :Optional [int ]=None ,fallback_driver =None )->Tuple [List ,Dict [Any ,int ]]:
+    pages =list (pages )
+    seen =set ()if seen is None else seen 
+    managers =[m for m in managers if m is not None and getattr (m ,'driver',None )]
+    n =min (len (pages ),default_workers ()if workers is None else max (1 ,int (workers )))
+    pool_workers =[tab_worker (managers [i %len (managers )],url_for )for i in range (n )]if managers else []
+    fallback =(lambda p :fetch_changelist (fallback_driver ,url_for (p )))if fallback_driver is not None else None 
+    logger .info ('fetching %s changelist pages with %s workers over %s sessions',len (pages ),len (pool_workers ),len (managers ))
+    results =fetch_pages (pages ,pool_workers ,fallback )
+    return merge_pages (results ,pages ,convert ,key ,seen )
+_PAGE_LOAD_TIMEOUT =300 
+_SCRIPT_TIMEOUT =30 
+class BrowserChangelistReader :
+    def __init__ (self ,manager ,timeout :float =15 ,deadline :Optional [float ]=None ):
+        self .manager =manager 
+        self .driver =manager .driver 
+        self .timeout =timeout 
+        self .deadline =deadline 
+    @property 
+    def current_url (self ):
+        try :
+            return self .driver .current_url 
+        except Exception :
+            return None 
+    def _bound (self )->float :
+        left =time_left (self .deadline ,self .timeout )
+        if self .deadline is not None :
+            try :
+                self .driver .set_page_load_timeout (max (1 ,int (time_left (self .deadline ))))
+                self .driver .set_script_timeout (max (1 ,int (min (left ,_SCRIPT_TIMEOUT ))))
+            except Exception as e :
+                logger .debug ('could not bound driver timeouts: %s',e )
+        return left 
+    def visit (self ,url :str )->List [Dict ]:
+        return fetch_changelist (self .driver ,url ,self ._bound ())
+    def paginator (self )->Dict :
+        return read_paginator (self .driver )
+    def sort_index (self ,column :str )->Optional [int ]:
+        return read_sort_index (self .driver ,column )
+    def fetch_pages (self ,url_for ,pages ,convert ,key ,seen =None ):
+        def _url (p ):
+            self ._bound ()
+            return url_for (p )
+        return fetch_changelist_pages ([self .manager ],_url ,pages ,convert ,key ,seen =seen ,fallback_driver =self .driver )
+    def close (self ):
+        if self .deadline is None :
+            return 
+        try :
+            self .driver .set_page_load_timeout (_PAGE_LOAD_TIMEOUT )
+            self .driver .set_script_timeout (_SCRIPT_TIMEOUT )
+        except Exception :
+            pass 
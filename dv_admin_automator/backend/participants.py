@@ -0,0 +1,336 @@
+import difflib 
+import logging 
+import os 
+import re 
+import sqlite3 
+import threading 
+import time 
+import unicodedata 
+from pathlib import Path 
+from typing import Any ,Dict ,List ,Optional ,Tuple 
+from urllib .parse import urljoin 
+try :
+    from rapidfuzz import fuzz as _rf_fuzz ,process as _rf_process 
+except Exception :
+    _rf_fuzz =None 
+    _rf_process =None 
+from dv_admin_automator .browser .pool import get_default_pool 
+from dv_admin_automator .backend .changelist import row_fields 
+from dv_admin_automator .backend .http_admin import http_reader 
+from dv_admin_automator .backend .pagefetch import BrowserChangelistReader ,remaining_pages ,total_pages 
+logger =logging .getLogger ('dv_admin_automator.backend.participants')
+PARTICIPANTS_URL ='https://webapp.moodar.com.br/moodashboard/app_eleve/participante/'
+FIELDS =('id','name','email','phone','cpf','status','created_at','updated_at','uid','url')
+_SCHEMA =(
+"CREATE TABLE IF NOT EXISTS participants (id TEXT PRIMARY KEY, name TEXT, email TEXT, phone TEXT, cpf TEXT, status TEXT, created_at TEXT, updated_at TEXT, uid TEXT, url TEXT, synced_at REAL)",
+"CREATE INDEX IF NOT EXISTS participants_email ON participants (lower(email))",
+"CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)",
+)
+def normalize_name (s :Optional [str ])->str :
+    s =unicodedata .normalize ('NFKD',str (s or ''))
+    return ' '.join (''.join (ch for ch in s if not unicodedata .combining (ch )).casefold ().split ())
+def _digits (s :Optional [str ])->str :
+    return re .sub (r'\D','',str (s or ''))
+def participant_from_row (row :Dict )->Dict [str ,Any ]:
+    fields =row_fields (row )
+    def _field (name ):
+        c =fields .get (name )
+        return c ['text']if c is not None else '-'
+    link =fields .get ('nome')
+    urlp =(link or {}).get ('href')or ''
+    return {
+    'id':urlp .split ('/participante/')[1 ].split ('/')[0 ]if '/participante/'in urlp else '',
+    'name':link ['text']if link is not None else '',
+    'email':_field ('email'),
+    'phone':_field ('telefone'),
+    'cpf':_field ('cpf'),
+    'status':_field ('status'),
+    'created_at':_field ('created_at'),
+    'updated_at':_field ('updated_at'),
+    'uid':_field ('uid'),
+    'url':urlp 
+    }
+def exact_participant (candidates :List [Dict ],query :Any )->Optional [Dict ]:
+    q =str (query or '').strip ()
+    if not q :
+        return None 
+    digits =_digits (q )
+    name =normalize_name (q )
+    for key ,test in (('id',lambda v :v ==q ),('email',lambda v :'@'in q and v .strip ().lower ()==q .lower ()),('cpf',lambda v :len (digits )==11 and _digits (v )==digits )):
+        hits =[c for c in candidates if test (str (c .get (key )or ''))]
+        if len (hits )==1 :
+            return hits [0 ]
+    hits =[c for c in candidates if name and normalize_name (c .get ('name'))==name ]
+    return hits [0 ]if len (hits )==1 else None 
+class ParticipantDirectory :
+    def __init__ (self ,path :Optional [Path ]=None ,sync_interval :Optional [float ]=None ):
+        if path is None :
+            from dv_admin_automator .activation .storage import LocalStore 
+            path =LocalStore ().base_dir /'participants.sqlite3'
+        self .path =Path (path )
+        self .sync_interval =float (os .environ .get ('DV_PARTICIPANT_SYNC_INTERVAL','600'))if sync_interval is None else float (sync_interval )
+        self .max_pages =max (1 ,int (os .environ .get ('DV_PARTICIPANT_SYNC_MAX_PAGES','300')))
+        self ._lock =threading .RLock ()
+        self ._sync_lock =threading .Lock ()
+        self ._sync_thread :Optional [threading .Thread ]=None 
+        self ._auto_thread :Optional [threading .Thread ]=None 
+        self .path .parent .mkdir (parents =True ,exist_ok =True )
+        self ._conn =sqlite3 .connect (str (self .path ),check_same_thread =False ,isolation_level =None )
+        self ._conn .execute ('PRAGMA journal_mode=WAL')
+        for stmt in _SCHEMA :
+            self ._conn .execute (stmt )
+        self ._by_id :Dict [str ,Dict ]={}
+        self ._by_email :Dict [str ,str ]={}
+        self ._by_cpf :Dict [str ,str ]={}
+        self ._by_name :Dict [str ,List [str ]]={}
+        rows =self ._conn .execute (f"SELECT {', '.join (FIELDS )} FROM participants").fetchall ()
+        for r in rows :
+            self ._index (dict (zip (FIELDS ,r )))
+        self .last_sync =float (self .get_meta ('last_sync')or 0 )
+    def _index (self ,p :Dict ):
+        pid =p ['id']
+        old =self ._by_id .get (pid )
+        if old is not None :
+            name =normalize_name (old .get ('name'))
+            ids =self ._by_name .get (name )
+            if ids and pid in ids :
+                ids .remove (pid )
+                if not ids :
+                    del self ._by_name [name ]
+            old_email =(old .get ('email')or '').strip ().lower ()
+            if self ._by_email .get (old_email )==pid :
+                del self ._by_email [old_email ]
+            old_cpf =_digits (old .get ('cpf'))
+            if self ._by_cpf .get (old_cpf )==pid :
+                del self ._by_cpf [old_cpf ]
+        self ._by_id [pid ]=p 
+        email =(p .get ('email')or '').strip ().lower ()
+        if '@'in email :
+            self ._by_email [email ]=pid 
+        cpf =_digits (p .get ('cpf'))
+        if len (cpf )==11 :
+            self ._by_cpf [cpf ]=pid 
+        name =normalize_name (p .get ('name'))
+        if name :
+            self ._by_name .setdefault (name ,[]).append (pid )
+    def upsert (self ,participants :List [Dict ])->int :
+        now =time .time ()
+        changed =0 
+        with self ._lock :
+            self ._conn .execute ('BEGIN')
+            try :
+                for p in participants :
+                    if not p .get ('id'):
+                        continue 
+                    p ={k :str (p .get (k )or '')for k in FIELDS }
+                    if self ._by_id .get (p ['id'])!=p :
+                        changed +=1 
+                    self ._conn .execute (f"INSERT OR REPLACE INTO participants ({', '.join (FIELDS )}, synced_at) VALUES ({', '.join ('?'*(len (FIELDS )+1 ))})",[p [k ]for k in FIELDS ]+[now ])
+                    self ._index (p )
+                self ._conn .execute ('COMMIT')
+            except Exception :
+                self ._conn .execute ('ROLLBACK')
+                raise 
+        return changed 
+    def get (self ,participant_id :Any )->Optional [Dict ]:
+        return self ._by_id .get (str (participant_id or '').strip ())
+    def _exact (self ,q :str )->Optional [Dict ]:
+        if q in self ._by_id :
+            return self ._by_id [q ]
+        if '@'in q :
+            pid =self ._by_email .get (q .lower ())
+            return self ._by_id .get (pid )if pid else None 
+        digits =_digits (q )
+        if len (digits )==11 and digits in self ._by_cpf :
+            return self ._by_id .get (self ._by_cpf [digits ])
+        return None 
+    def lookup (self ,query :Any )->Optional [Dict ]:
+        q =str (query or '').strip ()
+        if not q :
+            return None 
+        exact =self ._exact (q )
+        if exact is not None or '@'in q or q .isdigit ():
+            return exact 
+        with self ._lock :
+            ids =list (self ._by_name .get (normalize_name (q ))or [])
+        return self ._by_id .get (ids [0 ])if len (ids )==1 else None 
+    def search (self ,query :Any ,limit :int =10 ,cutoff :float =85 )->List [Dict ]:
+        q =str (query or '').strip ()
+        exact =self ._exact (q )
+        if exact is not None :
+            return [exact ]
+        if '@'in q or q .isdigit ():
+            return []
+        name =normalize_name (q )
+        if not name :
+            return []
+        with self ._lock :
+            names =list (self ._by_name .keys ())
+        hits :List [str ]=[]
+        if name in self ._by_name :
+            hits .append (name )
+        tokens =name .split ()
+        for n in names :
+            if len (hits )>=limit :
+                break 
+            if n !=name and all (t in n for t in tokens ):
+                hits .append (n )
+        if len (hits )<limit :
+            if _rf_process is not None :
+                extra =[m [0 ]for m in _rf_process .extract (name ,names ,scorer =_rf_fuzz .WRatio ,limit =limit ,score_cutoff =cutoff )]
+            else :
+                extra =difflib .get_close_matches (name ,names ,n =limit ,cutoff =cutoff /100.0 )
+            hits .extend (n for n in extra if n not in hits )
+        out =[]
+        for n in hits :
+            out .extend (self ._by_id [pid ]for pid in self ._by_name .get (n ,[]))
+        return out [:limit ]
+    def get_meta (self ,name :str )->Optional [str ]:
+        with self ._lock :
+            row =self ._conn .execute ('SELECT value FROM meta WHERE name = ?',(name ,)).fetchone ()
+        return row [0 ]if row else None 
+    def set_meta (self ,name :str ,value :Optional [str ]):
+        with self ._lock :
+            self ._conn .execute ('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',(name ,value ))
+    def stats (self )->Dict [str ,Any ]:
+        return {
+        'path':str (self .path ),
+        'participants':len (self ._by_id ),
+        'emails':len (self ._by_email ),
+        'cpfs':len (self ._by_cpf ),
+        'last_sync':self .last_sync ,
+        'sync_interval':self .sync_interval ,
+        'syncing':bool (self ._sync_thread and self ._sync_thread .is_alive ()),
+        'fuzzy':'rapidfuzz'if _rf_process is not None else 'difflib',
+        }
+    def is_stale (self )->bool :
+        return time .time ()-self .last_sync >=self .sync_interval 
+    def ensure_fresh (self ,force :bool =False ,full :bool =False )->bool :
+        if not force and not self .is_stale ():
+            return False 
+        with self ._lock :
+            if self ._sync_thread and self ._sync_thread .is_alive ():
+                return False 
+            self ._sync_thread =threading .Thread (target =self ._sync_quietly ,args =(full ,),daemon =True ,name ='dv-participant-sync')
+            self ._sync_thread .start ()
+            return True 
+    def start_auto_sync (self )->bool :
+        with self ._lock :
+            if self ._auto_thread is not None :
+                return False 
+            self ._auto_thread =threading .Thread (target =self ._auto_sync_loop ,daemon =True ,name ='dv-participant-auto-sync')
+            self ._auto_thread .start ()
+            return True 
+    def sync_available (self )->bool :
+        if http_reader ()is not None :
+            return True 
+        return get_default_pool ().credentials_for ()is not None 
+    def _auto_sync_loop (self ):
+        while True :
+            if self .is_stale ()and self .sync_available ():
+                self .ensure_fresh ()
+            time .sleep (max (30.0 ,self .sync_interval ))
+    def _sync_quietly (self ,full :bool =False ):
+        try :
+            self .sync (full =full )
+        except Exception :
+            logger .warning ('participant directory sync failed',exc_info =True )
+    def sync (self ,manager =None ,full :bool =False )->Dict [str ,Any ]:
+        with self ._sync_lock :
+            pool =get_default_pool ()
+            created =None 
+            lease =None 
+            started =time .time ()
+            reader =http_reader ()
+            try :
+                if reader is None :
+                    if manager is not None :
+                        mgr =manager 
+                    elif pool .credentials_for ()is None :
+                        return {'ok':False ,'error':'no_credentials'}
+                    else :
+                        created =pool .acquire_session (headless =True ,profile ='scrape')
+                        mgr =pool .get_manager (created )
+                    if mgr is None or not getattr (mgr ,'driver',None ):
+                        return {'ok':False ,'error':'no_browser'}
+                    lease =pool .acquire_lease (mgr )
+                    reader =BrowserChangelistReader (mgr )
+                order =self .get_meta ('updated_at_order')
+                if full or not self ._by_id or not order :
+                    result =self ._full_sync (reader )
+                else :
+                    result =self ._incremental_sync (reader ,order )
+                self .last_sync =time .time ()
+                self .set_meta ('last_sync',str (self .last_sync ))
+                result ['elapsed_s']=round (time .time ()-started ,2 )
+                logger .info ('participant directory sync: %s',result )
+                return result 
+            finally :
+                if reader is not None :
+                    reader .close ()
+                pool .release_lease (lease )
+                if created :
+                    try :
+                        pool .release_session (created )
+                    except Exception :
+                        pass 
+    def _full_sync (self ,reader )->Dict [str ,Any ]:
+        rows =reader .visit (PARTICIPANTS_URL )
+        if not rows :
+            return {'ok':False ,'mode':'full','error':'empty_changelist'}
+        idx =reader .sort_index ('updated_at')
+        if idx :
+            self .set_meta ('updated_at_order',str (idx ))
+        paginator =reader .paginator ()
+        seen =set ()
+        participants =[p for p in map (participant_from_row ,rows )if p ['id']and p ['id']not in seen and not seen .add (p ['id'])]
+        rest =remaining_pages (paginator ,len (rows ),max_pages =self .max_pages -1 )
+        truncated =total_pages (paginator ,len (rows ))>len (rest )+1 
+        if truncated :
+            logger .warning ('participant changelist has more than %s pages; syncing only the first %s',self .max_pages ,self .max_pages )
+        if rest and paginator .get ('show_all')and not truncated :
+            more =reader .visit (urljoin (PARTICIPANTS_URL ,paginator ['show_all']))
+            participants .extend (p for p in map (participant_from_row ,more )if p ['id']and p ['id']not in seen and not seen .add (p ['id']))
+        elif rest :
+            merged ,_ =reader .fetch_pages (lambda p :f'{PARTICIPANTS_URL }?p={p }',rest ,participant_from_row ,lambda p :p ['id'],seen =seen )
+            participants .extend (merged )
+        changed =self .upsert (participants )
+        return {'ok':True ,'mode':'full','pages':len (rest )+1 ,'rows':len (participants ),'changed':changed ,'truncated':truncated }
+    def _incremental_sync (self ,reader ,order :str )->Dict [str ,Any ]:
+        url =f'{PARTICIPANTS_URL }?o=-{order }'
+        rows =reader .visit (url )
+        rest =remaining_pages (reader .paginator (),len (rows ),max_pages =self .max_pages -1 )if rows else []
+        pages =0 
+        changed =0 
+        while rows :
+            pages +=1 
+            on_page =self .upsert ([participant_from_row (r )for r in rows ])
+            changed +=on_page 
+            if not on_page or pages >len (rest ):
+                break 
+            rows =reader .visit (f'{url }&p={rest [pages -1 ]}')
+        return {'ok':True ,'mode':'incremental','pages':pages ,'changed':changed }
+_default_directory :Optional [ParticipantDirectory ]=None 
+_default_lock =threading .Lock ()
+def get_participant_directory ()->Optional [ParticipantDirectory ]:
+    global _default_directory 
+    if os .environ .get ('DV_PARTICIPANT_DIRECTORY','1').strip ().lower ()in ('0','false','no','off'):
+        return None 
+    with _default_lock :
+        if _default_directory is None :
+            try :
+                _default_directory =ParticipantDirectory ()
+                if os .environ .get ('DV_PARTICIPANT_AUTO_SYNC','0').strip ().lower ()in ('1','true','yes','on'):
+                    _default_directory .start_auto_sync ()
+            except Exception :
+                logger .warning ('participant directory unavailable',exc_info =True )
+                return None 
+        return _default_directory 
+def resolve_participant (query :Any ,limit :int =5 )->Tuple [Optional [Dict ],List [Dict ]]:
+    directory =get_participant_directory ()
+    if directory is None :
+        return None ,[]
+    match =directory .lookup (query )
+    if match is not None :
+        return match ,[match ]
+    return None ,directory .search (query ,limit =limit )
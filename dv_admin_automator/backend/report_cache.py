@@ -0,0 +1,180 @@
+import hashlib 
+import json 
+import logging 
+import os 
+import threading 
+import time 
+from pathlib import Path 
+from typing import Any ,Callable ,Dict ,List ,Optional ,Tuple 
+logger =logging .getLogger ('dv_admin_automator.backend.report_cache')
+def rows_version (rows :Optional [List [Dict ]])->str :
+    blob =json .dumps (rows or [],sort_keys =True ,ensure_ascii =False ,default =str )
+    return hashlib .sha1 (blob .encode ('utf-8')).hexdigest ()[:16 ]
+def enrichment_epoch ()->int :
+    from dv_admin_automator .backend .history_store import get_history_store 
+    store =get_history_store ()
+    ttl =store .ttl if store is not None else float (os .environ .get ('DV_HISTORY_TTL','900'))
+    return int (time .time ()//max (ttl ,1.0 ))
+def etag_matches (header :Optional [str ],etag :str )->bool :
+    if not header :
+        return False 
+    for tag in header .split (','):
+        tag =tag .strip ()
+        if tag =='*'or (tag [2 :]if tag .startswith ('W/')else tag )==etag :
+            return True 
+    return False 
+class SheetSnapshot :
+    def __init__ (self ,read :Callable [[str ],Optional [List [Dict ]]],ttl :Optional [float ]=None ):
+        self .read =read 
+        self .ttl =float (os .environ .get ('DV_SHEET_SNAPSHOT_TTL','60'))if ttl is None else float (ttl )
+        self ._lock =threading .Lock ()
+        self ._entries :Dict [str ,Tuple [float ,List [Dict ],str ]]={}
+        self ._frames :Dict [str ,Any ]={}
+    def get (self ,sheet_id :str ,refresh :bool =False )->Tuple [Optional [List [Dict ]],Optional [str ]]:
+        with self ._lock :
+            entry =self ._entries .get (sheet_id )
+            if entry and not refresh and time .time ()-entry [0 ]<self .ttl :
+                return entry [1 ],entry [2 ]
+            rows =self .read (sheet_id )
+            if rows is None :
+                return None ,None 
+            version =rows_version (rows )
+            if entry and entry [2 ]==version :
+                rows =entry [1 ]
+            self ._entries [sheet_id ]=(time .time (),rows ,version )
+            self ._prune_frames ()
+            return rows ,version 
+    def invalidate (self ,sheet_id :Optional [str ]=None ):
+        with self ._lock :
+            if sheet_id is None :
+                self ._entries .clear ()
+            else :
+                self ._entries .pop (sheet_id ,None )
+            self ._prune_frames ()
+    def frame (self ,version :str )->Optional [Any ]:
+        with self ._lock :
+            return self ._frames .get (version )
+    def put_frame (self ,version :str ,frame :Any )->bool :
+        with self ._lock :
+            if version not in {entry [2 ]for entry in self ._entries .values ()}:
+                return False 
+            self ._frames [version ]=frame 
+            return True 
+    def _prune_frames (self ):
+        live ={entry [2 ]for entry in self ._entries .values ()}
+        for version in [v for v in self ._frames if v not in live ]:
+            del self ._frames [version ]
+class ReportCache :
+    def __init__ (self ,path :Optional [Path ]=None ,max_bytes :Optional [int ]=None ,ttl :Optional [float ]=None ):
+        if path is None :
+            from dv_admin_automator .activation .storage import LocalStore 
+            path =LocalStore ().base_dir /'report_cache'
+        self .path =Path (path )
+        self .max_bytes =int (float (os .environ .get ('DV_REPORT_CACHE_MB','100'))*1024 *1024 )if max_bytes is None else int (max_bytes )
+        self .ttl =float (os .environ .get ('DV_REPORT_CACHE_TTL','86400'))if ttl is None else float (ttl )
+        self ._lock =threading .Lock ()
+        self .hits =0 
+        self .misses =0 
+        self .evictions =0 
+        self .path .mkdir (parents =True ,exist_ok =True )
+    @staticmethod 
+    def make_key (**parts :Any )->str :
+        return hashlib .sha256 (json .dumps (parts ,sort_keys =True ,default =str ).encode ('utf-8')).hexdigest ()[:40 ]
+    @staticmethod 
+    def etag (key :str )->str :
+        return f'"{key }"'
+    def _files (self ,key :str )->Tuple [Path ,Path ]:
+        return self .path /f'{key }.bin',self .path /f'{key }.json'
+    def meta (self ,key :str )->Optional [Dict [str ,Any ]]:
+        data_path ,meta_path =self ._files (key )
+        try :
+            meta =json .loads (meta_path .read_text (encoding ='utf-8'))
+        except (OSError ,ValueError ):
+            return None 
+        if not data_path .exists ()or (self .ttl and time .time ()-float (meta .get ('created')or 0 )>=self .ttl ):
+            self .invalidate (key )
+            return None 
+        return meta 
+    def get (self ,key :str )->Optional [Dict [str ,Any ]]:
+        meta =self .meta (key )
+        data =None 
+        if meta is not None :
+            data_path ,meta_path =self ._files (key )
+            try :
+                data =data_path .read_bytes ()
+                now =time .time ()
+                os .utime (data_path ,(now ,now ))
+                os .utime (meta_path ,(now ,now ))
+            except OSError :
+                data =None 
+        with self ._lock :
+            if data is None :
+                self .misses +=1 
+                return None 
+            self .hits +=1 
+        return dict (meta ,data =data )
+    def put (self ,key :str ,data :bytes ,media_type :str ,filename :str )->bool :
+        if not data or len (data )>self .max_bytes :
+            return False 
+        data_path ,meta_path =self ._files (key )
+        meta ={'key':key ,'etag':self .etag (key ),'media_type':media_type ,'filename':filename ,'size':len (data ),'created':time .time ()}
+        with self ._lock :
+            try :
+                tmp =data_path .with_suffix ('.tmp')
+                tmp .write_bytes (data )
+                os .replace (tmp ,data_path )
+                meta_path .write_text (json .dumps (meta ,ensure_ascii =False ),encoding ='utf-8')
+            except OSError :
+                logger .warning ('could not write report cache entry %s',key ,exc_info =True )
+                return False 
+            self ._evict ()
+        return True 
+    def _entries (self )->List [Tuple [float ,int ,str ]]:
+        out =[]
+        for p in self .path .glob ('*.bin'):
+            try :
+                st =p .stat ()
+            except OSError :
+                continue 
+            out .append ((st .st_mtime ,st .st_size ,p .stem ))
+        return out 
+    def _evict (self ):
+        entries =sorted (self ._entries ())
+        total =sum (size for _ ,size ,_ in entries )
+        for _ ,size ,key in entries :
+            if total <=self .max_bytes :
+                break 
+            for p in self ._files (key ):
+                try :
+                    p .unlink ()
+                except OSError :
+                    pass 
+            total -=size 
+            self .evictions +=1 
+    def invalidate (self ,key :Optional [str ]=None ):
+        with self ._lock :
+            keys =[key ]if key is not None else [k for _ ,_ ,k in self ._entries ()]
+            for k in keys :
+                for p in self ._files (k ):
+                    try :
+                        p .unlink ()
+                    except OSError :
+                        pass 
+    def stats (self )->Dict [str ,Any ]:
+        with self ._lock :
+            entries =self ._entries ()
+            return {'path':str (self .path ),'entries':len (entries ),'bytes':sum (size for _ ,size ,_ in entries ),'max_bytes':self .max_bytes ,'ttl':self .ttl ,'hits':self .hits ,'misses':self .misses ,'evictions':self .evictions }
+_default_cache :Optional [ReportCache ]=None 
+_default_lock =threading .Lock ()
+def get_report_cache ()->Optional [ReportCache ]:
+    global _default_cache 
+    if os .environ .get ('DV_REPORT_CACHE','1').strip ().lower ()in ('0','false','no','off'):
+        return None 
+    with _default_lock :
+        if _default_cache is None :
+            try :
+                _default_cache =ReportCache ()
+            except Exception :
+                logger .warning ('report cache unavailable',exc_info =True )
+                return None 
+        return _default_cache 
\ No newline at end of file
@@ -0,0 +1,85 @@
+import logging 
+import os 
+import queue 
+import threading 
+import time 
+from typing import Any ,Callable ,Dict ,List ,Optional 
+from dv_admin_automator .backend .pagefetch import DeadlineExceeded 
+logger =logging .getLogger ('dv_admin_automator.backend.report_enrichment')
+def _env_number (name :str ,default ,cast =int ):
+    try :
+        return cast (os .environ .get (name ,default ))
+    except ValueError :
+        return cast (default )
+def default_workers ()->int :
+    return max (1 ,_env_number ('DV_REPORT_WORKERS','4'))
+class EnrichmentEngine :
+    def __init__ (self ,workers :Optional [int ]=None ,timeout :Optional [float ]=None ,retries :Optional [int ]=None ,backoff :float =1.0 ,managers :Optional [List [Any ]]=None ,browser_only :bool =False ):
+        self .workers =default_workers ()if workers is None else max (1 ,int (workers ))
+        self .timeout =_env_number ('DV_REPORT_PATIENT_TIMEOUT','180',float )if timeout is None else float (timeout )
+        self .retries =max (0 ,_env_number ('DV_REPORT_RETRIES','1')if retries is None else int (retries ))
+        self .backoff =backoff 
+        self .managers =[m for m in (managers or [])if m is not None ]
+        if browser_only :
+            self .workers =min (self .workers ,max (1 ,len (self .managers )))
+    def run (self ,items :List [Any ],fetch :Callable [[Any ,Any ,Optional [float ]],Any ],apply :Callable [[Any ,Any ,Optional [BaseException ]],None ],progress :Optional [Callable [[Dict [str ,Any ]],None ]]=None )->Dict [str ,Any ]:
+        total =len (items )
+        state ={'total':total ,'done':0 ,'failed':0 ,'retried':0 ,'timeouts':0 ,'workers':min (self .workers ,total ),'started':time .time ()}
+        if not items :
+            return self ._snapshot (state )
+        work :'queue.Queue'=queue .Queue ()
+        for item in items :
+            work .put (item )
+        lock =threading .Lock ()
+        def _attempt (item ,manager ):
+            error =None 
+            for attempt in range (self .retries +1 ):
+                if attempt :
+                    with lock :
+                        state ['retried']+=1 
+                    time .sleep (self .backoff *attempt )
+                try :
+                    return fetch (item ,manager ,time .time ()+self .timeout if self .timeout else None ),None 
+                except DeadlineExceeded as e :
+                    with lock :
+                        state ['timeouts']+=1 
+                    error =e 
+                except Exception as e :
+                    error =e 
+                logger .info ('enrichment attempt %s/%s failed: %s',attempt +1 ,self .retries +1 ,error )
+            return None ,error 
+        def _worker (index ):
+            manager =self .managers [index ]if index <len (self .managers )else None 
+            while True :
+                try :
+                    item =work .get_nowait ()
+                except queue .Empty :
+                    return 
+                result ,error =_attempt (item ,manager )
+                try :
+                    apply (item ,result ,error )
+                except Exception :
+                    logger .exception ('applying enrichment result failed')
+                with lock :
+                    state ['done']+=1 
+                    state ['failed']+=error is not None 
+                    snap =self ._snapshot (state )
+                if progress is not None :
+                    try :
+                        progress (snap )
+                    except Exception :
+                        pass 
+        threads =[threading .Thread (target =_worker ,args =(i ,),daemon =True ,name =f'dv-enrich-{i }')for i in range (state ['workers'])]
+        for t in threads :
+            t .start ()
+        for t in threads :
+            t .join ()
+        snap =self ._snapshot (state )
+        logger .info ('enriched %s patients with %s workers in %.1fs (%s failed, %s retries, %s timeouts)',total ,snap ['workers'],snap ['elapsed'],snap ['failed'],snap ['retried'],snap ['timeouts'])
+        return snap 
+    @staticmethod 
+    def _snapshot (state :Dict [str ,Any ])->Dict [str ,Any ]:
+        elapsed =time .time ()-state ['started']
+        done =state ['done']
+        eta =elapsed /done *(state ['total']-done )if done else None 
+        return {**{k :v for k ,v in state .items ()if k !='started'},'elapsed':round (elapsed ,1 ),'eta':round (eta ,1 )if eta is not None else None }
\ No newline at end of file
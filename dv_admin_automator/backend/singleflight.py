@@ -0,0 +1,79 @@
+import os 
+import threading 
+import time 
+from collections import OrderedDict 
+from typing import Any ,Callable ,Dict ,Hashable ,Optional 
+class _Call :
+    def __init__ (self ):
+        self .event =threading .Event ()
+        self .result =None 
+        self .error :Optional [BaseException ]=None 
+        self .waiters =0 
+class SingleFlight :
+    def __init__ (self ,ttl :Optional [float ]=None ,max_entries :Optional [int ]=None ,env_prefix :str ='DV_SINGLEFLIGHT'):
+        self .ttl =float (os .environ .get (f'{env_prefix }_TTL','60'))if ttl is None else float (ttl )
+        self .max_entries =int (os .environ .get (f'{env_prefix }_MAX_ENTRIES','2048'))if max_entries is None else int (max_entries )
+        self ._lock =threading .Lock ()
+        self ._calls :Dict [Hashable ,_Call ]={}
+        self ._results :'OrderedDict[Hashable, tuple]'=OrderedDict ()
+        self ._counters ={'hits':0 ,'misses':0 ,'shared':0 ,'errors':0 }
+    def _cached (self ,key :Hashable ):
+        entry =self ._results .get (key )
+        if entry is None :
+            return None 
+        if time .monotonic ()-entry [0 ]>=self .ttl :
+            self ._results .pop (key ,None )
+            return None 
+        self ._results .move_to_end (key )
+        return entry 
+    def do (self ,key :Hashable ,fn :Callable [[],Any ],use_cache :bool =True )->Any :
+        with self ._lock :
+            entry =self ._cached (key )if use_cache else None 
+            if entry is not None :
+                self ._counters ['hits']+=1 
+                return entry [1 ]
+            call =self ._calls .get (key )
+            leader =call is None 
+            if leader :
+                call =_Call ()
+                self ._calls [key ]=call 
+                self ._counters ['misses']+=1 
+            else :
+                call .waiters +=1 
+                self ._counters ['shared']+=1 
+        if not leader :
+            call .event .wait ()
+            if call .error is not None :
+                raise call .error 
+            return call .result 
+        try :
+            call .result =fn ()
+        except BaseException as e :
+            call .error =e 
+            with self ._lock :
+                self ._counters ['errors']+=1 
+            raise 
+        finally :
+            with self ._lock :
+                self ._calls .pop (key ,None )
+                if call .error is None and call .result and self .ttl >0 :
+                    self ._results [key ]=(time .monotonic (),call .result )
+                    self ._results .move_to_end (key )
+                    while len (self ._results )>self .max_entries :
+                        self ._results .popitem (last =False )
+            call .event .set ()
+        return call .result 
+    def forget (self ,key :Optional [Hashable ]=None ):
+        with self ._lock :
+            if key is None :
+                self ._results .clear ()
+            else :
+                self ._results .pop (key ,None )
+    def stats (self )->Dict [str ,Any ]:
+        with self ._lock :
+            counters =dict (self ._counters )
+            inflight =len (self ._calls )
+            waiting =sum (c .waiters for c in self ._calls .values ())
+            cached =len (self ._results )
+        lookups =counters ['hits']+counters ['misses']+counters ['shared']
+        return {'ttl':self .ttl ,'max_entries':self .max_entries ,'cached':cached ,'inflight':inflight ,'waiting':waiting ,**counters ,'hit_rate':round ((counters ['hits']+counters ['shared'])/lookups ,3 )if lookups else None }
\ No newline at end of file
@@ -1,32 +1,112 @@
-from typing import Optional 
+from typing import Optional ,Dict ,List 
+import json 
+import os 
+import threading 
+import time 
 from selenium import webdriver 
 from selenium .webdriver .chrome .options import Options 
+from selenium .webdriver .chrome .service import Service 
 import chromedriver_autoinstaller 
+import contextlib 
 import logging 
+from .tabs import Tab 
 logger =logging .getLogger (__name__ )
+_driver_path :Optional [str ]=None 
+_driver_lock =threading .Lock ()
+PROFILES =("full","scrape")
+SCRAPE_BLOCKED_URLS =[
+"*.png","*.jpg","*.jpeg","*.gif","*.webp","*.svg","*.ico",
+"*.woff","*.woff2","*.ttf","*.otf","*.eot",
+"*.mp4","*.webm","*.mp3","*.ogg",
+]
+def _major (version :Optional [str ])->Optional [str ]:
+    if not version :
+        return None 
+    return str (version ).split (".")[0 ]
+def _cache_file ():
+    from dv_admin_automator .activation .storage import LocalStore 
+    return LocalStore ().base_dir /"chromedriver.json"
+def _load_cached_driver (chrome_version :Optional [str ])->Optional [str ]:
+    try :
+        data =json .loads (_cache_file ().read_text (encoding ="utf-8"))
+    except Exception :
+        return None 
+    path =data .get ("path")
+    if not path or not os .path .isfile (path ):
+        return None 
+    if chrome_version and _major (data .get ("chrome_version"))!=_major (chrome_version ):
+        logger .info ("cached chromedriver was resolved for Chrome %s, now %s; resolving again",data .get ("chrome_version"),chrome_version )
+        return None 
+    return path 
+def _save_cached_driver (path :str ,chrome_version :Optional [str ]):
+    try :
+        f =_cache_file ()
+        f .parent .mkdir (parents =True ,exist_ok =True )
+        f .write_text (json .dumps ({"path":path ,"chrome_version":chrome_version ,"resolved_at":time .time ()},indent =2 ),encoding ="utf-8")
+    except Exception :
+        logger .warning ("could not persist chromedriver path to cache",exc_info =True )
+def _install_chromedriver ()->Optional [str ]:
+    try :
+        return chromedriver_autoinstaller .install ()
+    except Exception as e :
+        logger .warning (
+        "chromedriver_autoinstaller.install() failed: %s - retrying with no_ssl=True",
+        e ,
+        )
+        try :
+            return chromedriver_autoinstaller .install (no_ssl =True )
+        except Exception :
+            logger .exception (
+            "chromedriver_autoinstaller failed even with no_ssl=True. "
+            "Consider manually installing chromedriver and placing it on PATH, "
+            "or fixing system CA certificates (install certifi or run OS cert update)."
+            )
+            raise 
+def resolve_chromedriver (force :bool =False )->Optional [str ]:
+    global _driver_path 
+    with _driver_lock :
+        if _driver_path and not force and os .path .isfile (_driver_path ):
+            return _driver_path 
+        try :
+            chrome_version =chromedriver_autoinstaller .get_chrome_version ()
+        except Exception :
+            chrome_version =None 
+        path =None if force else _load_cached_driver (chrome_version )
+        if path :
+            d =os .path .dirname (path )
+            if d not in os .environ .get ("PATH","").split (os .pathsep ):
+                os .environ ["PATH"]=d +os .pathsep +os .environ .get ("PATH","")
+        else :
+            path =_install_chromedriver ()
+            if path :
+                _save_cached_driver (path ,chrome_version )
+        _driver_path =path 
+        logger .info ("using chromedriver %s (Chrome %s)",path ,chrome_version )
+        return path 
 class BrowserManager :
-    def __init__ (self ,browser :str ="chrome",headless :bool =True ,window :str ="1920x1080"):
+    def __init__ (self ,browser :str ="chrome",headless :bool =True ,window :str ="1920x1080",profile :str ="full",max_tabs :Optional [int ]=None ,user_data_dir :Optional [str ]=None ):
+        if profile not in PROFILES :
+            raise ValueError (f"unknown browser profile {profile!r}; expected one of {PROFILES }")
         self .browser =browser 
         self .headless =headless 
         self .window =window 
+        self .profile =profile 
+        self .user_data_dir =user_data_dir 
+        self .max_tabs =int (os .environ .get ("DV_MAX_TABS","4"))if max_tabs is None else int (max_tabs )
         self .driver :Optional [webdriver .Chrome ]=None 
-    def start (self ):
-        try :
-            chromedriver_autoinstaller .install ()
-        except Exception as e :
-            logger .warning (
-            "chromedriver_autoinstaller.install() failed: %s - retrying with no_ssl=True",
-            e ,
-            )
-            try :
-                chromedriver_autoinstaller .install (no_ssl =True )
-            except Exception :
-                logger .exception (
-                "chromedriver_autoinstaller failed even with no_ssl=True. "
-                "Consider manually installing chromedriver and placing it on PATH, "
-                "or fixing system CA certificates (install certifi or run OS cert update)."
-                )
-                raise 
+        self .timings :Dict [str ,float ]={}
+        self ._cmd_lock =threading .RLock ()
+        self ._tab_cond =threading .Condition ()
+        self ._tabs :List [Tab ]=[]
+        self ._free_tabs :List [Tab ]=[]
+        self ._tabs_reserved =0 
+        self ._main_handle :Optional [str ]=None 
+        self ._current_handle :Optional [str ]=None 
+    def start (self ,first_url :Optional [str ]=None ):
+        t0 =time .perf_counter ()
+        path =resolve_chromedriver ()
+        t1 =time .perf_counter ()
+        self .timings ={"driver_resolve":round (t1 -t0 ,4 )}
         opts =Options ()
         if self .headless :
             opts .add_argument ("--headless=new")
@@ -34,13 +114,105 @@ class BrowserManager :
         opts .add_argument ("--disable-dev-shm-usage")
         opts .add_argument (f"--window-size={self .window }")
         opts .add_argument ("--disable-gpu")
+        if self .user_data_dir :
+            opts .add_argument (f"--user-data-dir={self .user_data_dir }")
         opts .add_experimental_option ("excludeSwitches",["enable-automation"])
         opts .add_experimental_option ("useAutomationExtension",False )
-        self .driver =webdriver .Chrome (options =opts )
+        if self .profile =="scrape":
+            opts .page_load_strategy ="eager"
+            opts .add_argument ("--disable-extensions")
+            opts .add_argument ("--disable-background-networking")
+        service =Service (executable_path =path )if path else Service ()
+        self .driver =webdriver .Chrome (service =service ,options =opts )
         self .driver .implicitly_wait (0 )
-        logger .info ("Browser started")
+        self ._main_handle =self ._current_handle =self .driver .current_window_handle 
+        if self .profile =="scrape":
+            try :
+                self .driver .execute_cdp_cmd ("Network.enable",{})
+                self .driver .execute_cdp_cmd ("Network.setBlockedURLs",{"urls":SCRAPE_BLOCKED_URLS })
+            except Exception :
+                logger .warning ("could not enable resource blocking for scrape profile",exc_info =True )
+        t2 =time .perf_counter ()
+        self .timings ["chrome_launch"]=round (t2 -t1 ,4 )
+        if first_url :
+            self .driver .get (first_url )
+            self .timings ["first_navigation"]=round (time .perf_counter ()-t2 ,4 )
+        logger .info ("Browser started (profile=%s, %s)",self .profile ,", ".join (f"{k }={v :.2f}s"for k ,v in self .timings .items ()))
         return self .driver 
+    def acquire_tab (self ,timeout :Optional [float ]=None )->Tab :
+        if not self .driver :
+            raise RuntimeError ("browser not started")
+        deadline =None if timeout is None else time .monotonic ()+timeout 
+        with self ._tab_cond :
+            while not self ._free_tabs and self ._tabs_reserved >=self .max_tabs :
+                remaining =None if deadline is None else deadline -time .monotonic ()
+                if remaining is not None and remaining <=0 :
+                    raise TimeoutError (f"no free tab within {timeout }s ({self .max_tabs } in use)")
+                self ._tab_cond .wait (remaining )
+            if self ._free_tabs :
+                return self ._free_tabs .pop ()
+            self ._tabs_reserved +=1 
+        try :
+            with self ._cmd_lock :
+                self .driver .switch_to .new_window ("tab")
+                handle =self .driver .current_window_handle 
+                self ._current_handle =handle 
+        except Exception :
+            with self ._tab_cond :
+                self ._tabs_reserved -=1 
+                self ._tab_cond .notify ()
+            raise 
+        tab =Tab (self ,handle )
+        with self ._tab_cond :
+            self ._tabs .append (tab )
+        return tab 
+    def release_tab (self ,tab :Tab ):
+        with self ._tab_cond :
+            if tab not in self ._tabs or tab in self ._free_tabs :
+                return 
+            self ._free_tabs .append (tab )
+            all_free =len (self ._free_tabs )==len (self ._tabs )
+            self ._tab_cond .notify ()
+        if all_free :
+            self ._focus_main ()
+    @contextlib .contextmanager 
+    def tab (self ,timeout :Optional [float ]=None ):
+        t =self .acquire_tab (timeout )
+        try :
+            yield t 
+        finally :
+            self .release_tab (t )
+    def close_tabs (self ):
+        with self ._tab_cond :
+            tabs ,self ._tabs ,self ._free_tabs =self ._tabs ,[],[]
+            self ._tabs_reserved =0 
+            self ._tab_cond .notify_all ()
+        if not tabs or not self .driver :
+            return 
+        with self ._cmd_lock :
+            for t in tabs :
+                try :
+                    self .driver .switch_to .window (t .handle )
+                    self .driver .close ()
+                except Exception :
+                    logger .debug ("could not close tab %s",t .handle ,exc_info =True )
+            self ._current_handle =None 
+        self ._focus_main ()
+    def _focus_main (self ):
+        if not self .driver or not self ._main_handle :
+            return 
+        with self ._cmd_lock :
+            if self ._current_handle !=self ._main_handle :
+                try :
+                    self .driver .switch_to .window (self ._main_handle )
+                    self ._current_handle =self ._main_handle 
+                except Exception :
+                    logger .warning ("could not switch back to the main window",exc_info =True )
     def quit (self ):
+        with self ._tab_cond :
+            self ._tabs ,self ._free_tabs =[],[]
+            self ._tabs_reserved =0 
+            self ._tab_cond .notify_all ()
         if self .driver :
             try :
                 self .driver .quit ()
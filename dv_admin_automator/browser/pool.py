@@ -1,21 +1,206 @@
+import os 
 import threading 
 import time 
 import uuid 
 import logging 
-from typing import Optional ,Dict 
+import contextlib 
+from collections import deque ,OrderedDict 
+from concurrent .futures import Future ,ThreadPoolExecutor ,wait as wait_futures 
+from typing import Optional ,Dict ,Union ,Callable 
 from .manager import BrowserManager 
+from .profiles import ProfileSlots 
 logger =logging .getLogger ('dv_admin_automator.browser.pool')
-class BrowserPool :
+_HEARTBEAT_JS ="return document.location.href;"
+class LeaseTimeout (TimeoutError ):
+    pass 
+class PoolExhausted (RuntimeError ):
+    pass 
+class SessionDegraded (RuntimeError ):
+    pass 
+def _proc_children ()->Dict [int ,list ]:
+    children :Dict [int ,list ]={}
+    try :
+        entries =os .listdir ('/proc')
+    except OSError :
+        return children 
+    for name in entries :
+        if not name .isdigit ():
+            continue 
+        try :
+            with open (f'/proc/{name }/stat','rb')as f :
+                stat =f .read ().decode ('utf-8','replace')
+            ppid =int (stat .rsplit (')',1 )[1 ].split ()[1 ])
+        except Exception :
+            continue 
+        children .setdefault (ppid ,[]).append (int (name ))
+    return children 
+def _process_rss (pid :int )->int :
+    try :
+        with open (f'/proc/{pid }/statm')as f :
+            return int (f .read ().split ()[1 ])*os .sysconf ('SC_PAGE_SIZE')
+    except Exception :
+        return 0 
+def _tree_rss (root_pid :int ,children :Dict [int ,list ])->int :
+    total =0 
+    stack =[root_pid ]
+    seen =set ()
+    while stack :
+        pid =stack .pop ()
+        if pid in seen :
+            continue 
+        seen .add (pid )
+        total +=_process_rss (pid )
+        stack .extend (children .get (pid ,()))
+    return total 
+def _driver_pid (mgr )->Optional [int ]:
+    try :
+        return int (mgr .driver .service .process .pid )
+    except Exception :
+        return None 
+class _FairLock :
     def __init__ (self ):
+        self ._cond =threading .Condition ()
+        self ._owner =None 
+        self ._depth =0 
+        self ._waiters =deque ()
+    def owned (self )->bool :
+        with self ._cond :
+            return self ._owner ==threading .get_ident ()
+    def busy (self )->bool :
+        with self ._cond :
+            return self ._owner is not None 
+    def waiting (self )->int :
+        with self ._cond :
+            return len (self ._waiters )
+    def acquire (self ,timeout :Optional [float ]=None )->bool :
+        me =threading .get_ident ()
+        with self ._cond :
+            if self ._owner ==me :
+                self ._depth +=1 
+                return True 
+            ticket =object ()
+            self ._waiters .append (ticket )
+            deadline =None if timeout is None else time .monotonic ()+max (0.0 ,timeout )
+            try :
+                while self ._owner is not None or self ._waiters [0 ]is not ticket :
+                    remaining =None if deadline is None else deadline -time .monotonic ()
+                    if remaining is not None and remaining <=0 :
+                        return False 
+                    self ._cond .wait (remaining )
+                self ._owner =me 
+                self ._depth =1 
+                return True 
+            finally :
+                self ._waiters .remove (ticket )
+                self ._cond .notify_all ()
+    def release (self ):
+        with self ._cond :
+            if self ._owner !=threading .get_ident ():
+                raise RuntimeError ('lease released by a thread that does not hold it')
+            self ._depth -=1 
+            if self ._depth ==0 :
+                self ._owner =None 
+                self ._cond .notify_all ()
+class _LeaseStats :
+    def __init__ (self ,window :int =500 ):
+        self ._lock =threading .Lock ()
+        self .leases =0 
+        self .timeouts =0 
+        self .wait_total =0.0 
+        self .wait_max =0.0 
+        self .hold_total =0.0 
+        self .hold_max =0.0 
+        self ._waits =deque (maxlen =window )
+        self ._holds =deque (maxlen =window )
+    def record_wait (self ,seconds :float ,acquired :bool ):
+        with self ._lock :
+            if not acquired :
+                self .timeouts +=1 
+                return 
+            self .leases +=1 
+            self .wait_total +=seconds 
+            self .wait_max =max (self .wait_max ,seconds )
+            self ._waits .append (seconds )
+    def record_hold (self ,seconds :float ):
+        with self ._lock :
+            self .hold_total +=seconds 
+            self .hold_max =max (self .hold_max ,seconds )
+            self ._holds .append (seconds )
+    @staticmethod 
+    def _percentile (values ,pct :float )->float :
+        if not values :
+            return 0.0 
+        ordered =sorted (values )
+        idx =min (len (ordered )-1 ,int (round (pct *(len (ordered )-1 ))))
+        return round (ordered [idx ],4 )
+    def snapshot (self )->Dict :
+        with self ._lock :
+            waits =list (self ._waits )
+            holds =list (self ._holds )
+            return {
+            'leases':self .leases ,
+            'timeouts':self .timeouts ,
+            'wait_avg':round (self .wait_total /self .leases ,4 )if self .leases else 0.0 ,
+            'wait_p50':self ._percentile (waits ,0.5 ),
+            'wait_p95':self ._percentile (waits ,0.95 ),
+            'wait_max':round (self .wait_max ,4 ),
+            'hold_avg':round (sum (holds )/len (holds ),4 )if holds else 0.0 ,
+            'hold_p50':self ._percentile (holds ,0.5 ),
+            'hold_p95':self ._percentile (holds ,0.95 ),
+            'hold_max':round (self .hold_max ,4 ),
+            }
+class BrowserPool :
+    def __init__ (self ,warm_size :Optional [int ]=None ):
         self ._lock =threading .Lock ()
         self ._sessions :Dict [str ,Dict ]={}
-    def create_session (self ,headless :bool =True ,window :str ='1920x1080')->str :
-        bm =BrowserManager (headless =headless ,window =window )
-        driver =bm .start ()
-        sess =uuid .uuid4 ().hex 
+        self ._idle =deque ()
+        self ._warm_size =int (os .environ .get ('DV_WARM_POOL_SIZE','2'))if warm_size is None else int (warm_size )
+        self ._warm_credentials :Optional [Dict ]=None 
+        self ._warm_headless =True 
+        self ._warm_profile ='scrape'
+        self ._refill_wakeup =threading .Event ()
+        self ._refill_thread :Optional [threading .Thread ]=None 
+        self ._lease_timeout =float (os .environ .get ('DV_LEASE_TIMEOUT','120'))
+        self ._lease_stats =_LeaseStats ()
+        self ._max_sessions =int (os .environ .get ('DV_MAX_SESSIONS','6'))
+        self ._idle_ttl =float (os .environ .get ('DV_SESSION_IDLE_TTL','900'))
+        self ._max_lease_age =float (os .environ .get ('DV_SESSION_MAX_LEASE','3600'))
+        self ._rss_cap =int (float (os .environ .get ('DV_CHROME_RSS_CAP_MB','3072'))*1024 *1024 )
+        self ._reaper_thread :Optional [threading .Thread ]=None 
+        self ._heartbeat_thread :Optional [threading .Thread ]=None 
+        self ._persistent =os .environ .get ('DV_PERSISTENT_PROFILES','0').strip ().lower ()in ('1','true','yes')
+        self ._profile_slots :Optional [ProfileSlots ]=None 
+        self ._hb_min =float (os .environ .get ('DV_HEARTBEAT_MIN_INTERVAL','10'))
+        self ._hb_max =float (os .environ .get ('DV_HEARTBEAT_MAX_INTERVAL','120'))
+        self ._hb_timeout =float (os .environ .get ('DV_HEARTBEAT_TIMEOUT','10'))
+        self ._hb_max_failures =int (os .environ .get ('DV_HEARTBEAT_MAX_FAILURES','3'))
+        self ._hb_interval =self ._hb_min 
+        self ._hb_wakeup =threading .Event ()
+        self ._hb_executor :Optional [ThreadPoolExecutor ]=None 
+        self ._hb_inflight :Dict [str ,object ]={}
+        self ._health :Dict [str ,Dict ]={}
+        self ._rss_cache :Dict [str ,int ]={}
+        self ._rss_cached_at =0.0 
+        self ._credentials_provider :Optional [Callable [[str ],Optional [Dict ]]]=None 
+        self ._tombstones :'OrderedDict[str, Dict]'=OrderedDict ()
+        self ._resurrecting :Dict [str ,Future ]={}
+        self ._resurrect_executor :Optional [ThreadPoolExecutor ]=None 
+    def create_session (self ,headless :bool =True ,window :str ='1920x1080',first_url :Optional [str ]=None ,profile :str ='full',persistent :Optional [bool ]=None ,session_id :Optional [str ]=None )->str :
+        self ._ensure_reaper ()
+        self ._reclaim_for_capacity ()
+        slot =self ._slots ().claim ()if (self ._persistent if persistent is None else persistent )else None 
+        bm =BrowserManager (headless =headless ,window =window ,profile =profile ,user_data_dir =str (slot )if slot else None )
+        try :
+            driver =bm .start (first_url =first_url )
+        except Exception :
+            self ._slots ().release (slot )
+            raise 
+        sess =session_id or uuid .uuid4 ().hex 
+        bm .session_id =sess 
+        now =time .time ()
         with self ._lock :
-            self ._sessions [sess ]={'manager':bm ,'created_at':time .time ()}
-        logger .info ('created browser session %s (headless=%s)',sess ,headless )
+            self ._sessions [sess ]={'manager':bm ,'created_at':now ,'last_used':now ,'headless':headless ,'profile':profile ,'authenticated':False ,'username':None ,'leased':False ,'lock':_FairLock (),'lease_count':0 ,'profile_dir':slot ,'timings':dict (getattr (bm ,'timings',{})or {})}
+        logger .info ('created browser session %s (headless=%s, profile=%s, timings=%s)',sess ,headless ,profile ,self ._sessions [sess ]['timings'])
         return sess 
     def get_manager (self ,session_id :str )->Optional [BrowserManager ]:
         with self ._lock :
@@ -26,6 +211,15 @@ class BrowserPool :
     def close_session (self ,session_id :str )->bool :
         with self ._lock :
             info =self ._sessions .pop (session_id ,None )
+            self ._health .pop (session_id ,None )
+            if info is not None :
+                self ._tombstones [session_id ]={'headless':info .get ('headless'),'profile':info .get ('profile'),'username':info .get ('username'),'closed_at':time .time ()}
+                while len (self ._tombstones )>200 :
+                    self ._tombstones .popitem (last =False )
+            try :
+                self ._idle .remove (session_id )
+            except ValueError :
+                pass 
         if not info :
             return False 
         try :
@@ -33,11 +227,563 @@ class BrowserPool :
             mgr .quit ()
         except Exception :
             logger .exception ('error closing session %s',session_id )
+        if info .get ('profile_dir'):
+            self ._slots ().release (info ['profile_dir'])
         logger .info ('closed session %s',session_id )
+        self ._refill_wakeup .set ()
         return True 
+    def _slots (self )->ProfileSlots :
+        with self ._lock :
+            if self ._profile_slots is None :
+                self ._profile_slots =ProfileSlots (size =max (self ._max_sessions ,1 ))
+            return self ._profile_slots 
+    def restore_login (self ,session_id :str ,username :Optional [str ]=None )->bool :
+        from .service import MOODASHBOARD_URL ,is_logged_in 
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            slot =info .get ('profile_dir')if info else None 
+        meta =ProfileSlots .read_meta (slot )
+        if not meta .get ('username')or (username and meta ['username']!=username ):
+            return False 
+        mgr =self .get_manager (session_id )
+        if not mgr or not getattr (mgr ,'driver',None ):
+            return False 
+        t0 =time .perf_counter ()
+        try :
+            with self .lease (session_id ):
+                mgr .driver .get (MOODASHBOARD_URL )
+                ok =is_logged_in (mgr .driver )
+        except Exception :
+            logger .exception ('could not validate stored login for session %s',session_id )
+            ok =False 
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            if info is not None and ok :
+                info ['authenticated']=True 
+                info ['username']=meta ['username']
+                info .setdefault ('timings',{})['restore']=round (time .perf_counter ()-t0 ,4 )
+        logger .info ('stored login for session %s (user=%s) valid=%s',session_id ,meta ['username'],ok )
+        return ok 
+    def login_session (self ,session_id :str ,username :str ,password :str )->bool :
+        from .service import login_driver 
+        mgr =self .get_manager (session_id )
+        if not mgr or not getattr (mgr ,'driver',None ):
+            return False 
+        with self ._lock :
+            slot =self ._sessions .get (session_id ,{}).get ('profile_dir')
+        if slot is not None :
+            if self .restore_login (session_id ,username ):
+                return True 
+            if ProfileSlots .read_meta (slot ).get ('username'):
+                try :
+                    with self .lease (session_id ):
+                        mgr .driver .delete_all_cookies ()
+                except Exception :
+                    logger .debug ('could not clear cookies of session %s',session_id ,exc_info =True )
+        t0 =time .perf_counter ()
+        try :
+            with self .lease (session_id ):
+                ok =login_driver (mgr .driver ,username ,password )
+        except Exception :
+            logger .exception ('login failed for session %s',session_id )
+            ok =False 
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            if info is not None :
+                info ['authenticated']=bool (ok )
+                info ['username']=username if ok else None 
+                info .setdefault ('timings',{})['login']=round (time .perf_counter ()-t0 ,4 )
+        if slot is not None :
+            ProfileSlots .write_meta (slot ,username =username if ok else None )
+        logger .info ('login for session %s success=%s',session_id ,ok )
+        return ok 
+    def session_timings (self ,session_id :str )->Dict [str ,float ]:
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            return dict (info .get ('timings')or {})if info else {}
+    def is_authenticated (self ,session_id :str )->bool :
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            return bool (info and info .get ('authenticated'))
+    def configure_warm (self ,username :str ,password :str ,headless :bool =True ,size :Optional [int ]=None ,profile :str ='scrape'):
+        with self ._lock :
+            self ._warm_credentials ={'username':username ,'password':password }
+            self ._warm_headless =bool (headless )
+            self ._warm_profile =profile 
+            if size is not None :
+                self ._warm_size =max (0 ,int (size ))
+            start =self ._refill_thread is None or not self ._refill_thread .is_alive ()
+            if start :
+                self ._refill_thread =threading .Thread (target =self ._refill_loop ,name ='browser-pool-refill',daemon =True )
+        if start :
+            self ._refill_thread .start ()
+        self ._refill_wakeup .set ()
+        logger .info ('warm pool configured (size=%s, headless=%s, user=%s)',self ._warm_size ,headless ,username )
+    def acquire_session (self ,headless :bool =True ,username :Optional [str ]=None ,password :Optional [str ]=None ,profile :str ='full')->str :
+        while True :
+            sid =None 
+            with self ._lock :
+                for candidate in list (self ._idle ):
+                    info =self ._sessions .get (candidate )
+                    if info is None :
+                        self ._idle .remove (candidate )
+                        continue 
+                    if bool (info .get ('headless'))!=bool (headless )or info .get ('profile')!=profile :
+                        continue 
+                    if username and info .get ('username')!=username :
+                        continue 
+                    self ._idle .remove (candidate )
+                    info ['leased']=True 
+                    info ['last_used']=time .time ()
+                    sid =candidate 
+                    break 
+            self ._refill_wakeup .set ()
+            if sid is None :
+                break 
+            if self ._is_alive (sid ):
+                logger .info ('leased warm browser session %s',sid )
+                return sid 
+            self .close_session (sid )
+        sid =self .create_session (headless =headless ,profile =profile )
+        with self ._lock :
+            self ._sessions [sid ]['leased']=True 
+            creds =self ._warm_credentials 
+        if not username or not password :
+            if creds :
+                username ,password =creds .get ('username'),creds .get ('password')
+        if username and password :
+            self .login_session (sid ,username ,password )
+        else :
+            self .restore_login (sid ,username )
+        return sid 
+    def release_session (self ,session_id :str )->bool :
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            if not info :
+                return False 
+            info ['leased']=False 
+            info ['last_used']=time .time ()
+            keep =(self ._warm_credentials is not None and info .get ('authenticated')
+            and bool (info .get ('headless'))==self ._warm_headless 
+            and info .get ('profile')==self ._warm_profile 
+            and info .get ('username')==self ._warm_credentials .get ('username')
+            and len (self ._idle )<self ._warm_size )
+        if keep and self ._is_alive (session_id ):
+            try :
+                info ['manager'].close_tabs ()
+            except Exception :
+                logger .debug ('could not close tabs of session %s',session_id ,exc_info =True )
+            with self ._lock :
+                if session_id in self ._sessions and session_id not in self ._idle :
+                    self ._idle .append (session_id )
+            logger .info ('returned browser session %s to warm pool',session_id )
+            return True 
+        return self .close_session (session_id )
+    def _resolve_session_id (self ,target :Union [str ,BrowserManager ,None ])->Optional [str ]:
+        if target is None :
+            return None 
+        if isinstance (target ,str ):
+            return target 
+        sid =getattr (target ,'session_id',None )
+        with self ._lock :
+            info =self ._sessions .get (sid )if sid else None 
+            if info and info .get ('manager')is target :
+                return sid 
+        return None 
+    def acquire_lease (self ,target :Union [str ,BrowserManager ,None ],timeout :Optional [float ]=None ,touch :bool =True )->Optional [Dict ]:
+        sid =self ._resolve_session_id (target )
+        if sid is None :
+            return None 
+        with self ._lock :
+            info =self ._sessions .get (sid )
+            lock =info .get ('lock')if info else None 
+        if lock is None :
+            return None 
+        reentrant =lock .owned ()
+        t0 =time .monotonic ()
+        ok =lock .acquire (self ._lease_timeout if timeout is None else timeout )
+        waited =time .monotonic ()-t0 
+        if not reentrant :
+            self ._lease_stats .record_wait (waited ,ok )
+        if not ok :
+            logger .warning ('lease on session %s timed out after %.1fs (%s waiting)',sid ,waited ,lock .waiting ())
+            raise LeaseTimeout (f'browser session {sid } is busy')
+        if not reentrant :
+            with self ._lock :
+                if sid in self ._sessions :
+                    self ._sessions [sid ]['lease_count']=self ._sessions [sid ].get ('lease_count',0 )+1 
+                    if touch :
+                        self ._sessions [sid ]['last_used']=time .time ()
+        return {'session_id':sid ,'lock':lock ,'acquired_at':time .monotonic (),'reentrant':reentrant ,'touch':touch }
+    def release_lease (self ,lease :Optional [Dict ]):
+        if not lease :
+            return 
+        lease ['lock'].release ()
+        if not lease ['reentrant']:
+            self ._lease_stats .record_hold (time .monotonic ()-lease ['acquired_at'])
+            if lease .get ('touch',True ):
+                self ._touch (lease ['session_id'])
+    @contextlib .contextmanager 
+    def lease (self ,target :Union [str ,BrowserManager ,None ],timeout :Optional [float ]=None ,touch :bool =True ):
+        held =self .acquire_lease (target ,timeout ,touch =touch )
+        try :
+            if isinstance (target ,str ):
+                yield self .get_manager (target )
+            else :
+                yield target 
+        finally :
+            self .release_lease (held )
+    def lease_stats (self )->Dict :
+        stats =self ._lease_stats .snapshot ()
+        with self ._lock :
+            infos =list (self ._sessions .items ())
+        stats ['sessions']=len (infos )
+        stats ['busy']=sum (1 for _ ,info in infos if info ['lock'].busy ())
+        stats ['waiting']=sum (info ['lock'].waiting ()for _ ,info in infos )
+        stats ['per_session']={sid :{'leases':info .get ('lease_count',0 ),'busy':info ['lock'].busy (),'waiting':info ['lock'].waiting ()}for sid ,info in infos }
+        return stats 
+    def set_credentials_provider (self ,provider :Optional [Callable [[str ],Optional [Dict ]]]):
+        self ._credentials_provider =provider 
+    def credentials_for (self ,session_id :Optional [str ]=None )->Optional [Dict ]:
+        if session_id and self ._credentials_provider is not None :
+            try :
+                creds =self ._credentials_provider (session_id )
+            except Exception :
+                creds =None 
+            if creds and creds .get ('username')and creds .get ('password'):
+                return {'username':creds ['username'],'password':creds ['password']}
+        with self ._lock :
+            return dict (self ._warm_credentials )if self ._warm_credentials else None 
+    def export_cookies (self ,session_id :str ,timeout :Optional [float ]=5 )->list :
+        mgr =self .get_manager (session_id )
+        if not mgr or not getattr (mgr ,'driver',None )or not self .is_authenticated (session_id ):
+            return []
+        with self .lease (session_id ,timeout =timeout ,touch =False ):
+            return list (mgr .driver .get_cookies ()or [])
+    def ensure_ready (self ,session_id :str )->Future :
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            dead =bool ((self ._health .get (session_id )or {}).get ('dead'))
+            pending =self ._resurrecting .get (session_id )
+            if pending is not None and not pending .done ():
+                return pending 
+            if info is not None and not dead :
+                fut =Future ()
+                fut .set_result (True )
+                return fut 
+            known =info is not None or session_id in self ._tombstones 
+        creds =None 
+        if known and self ._credentials_provider is not None :
+            try :
+                creds =self ._credentials_provider (session_id )
+            except Exception :
+                logger .exception ('credentials provider failed for session %s',session_id )
+        if not creds or not creds .get ('username')or not creds .get ('password'):
+            fut =Future ()
+            fut .set_result (False )
+            return fut 
+        with self ._lock :
+            pending =self ._resurrecting .get (session_id )
+            if pending is not None and not pending .done ():
+                return pending 
+            if self ._resurrect_executor is None :
+                self ._resurrect_executor =ThreadPoolExecutor (max_workers =2 ,thread_name_prefix ='browser-resurrect')
+            fut =self ._resurrect_executor .submit (self ._resurrect ,session_id ,creds )
+            self ._resurrecting [session_id ]=fut 
+        return fut 
+    def _resurrect (self ,session_id :str ,creds :Dict )->bool :
+        try :
+            with self ._lock :
+                alive =session_id in self ._sessions 
+                tomb =self ._tombstones .get (session_id )or {}
+            if alive :
+                self .close_session (session_id )
+                with self ._lock :
+                    tomb =self ._tombstones .get (session_id )or tomb 
+            headless =creds .get ('headless',tomb .get ('headless',True ))
+            profile =tomb .get ('profile')or 'full'
+            logger .info ('resurrecting browser session %s (headless=%s, profile=%s)',session_id ,headless ,profile )
+            self .create_session (headless =bool (headless ),profile =profile ,session_id =session_id )
+            with self ._lock :
+                self ._tombstones .pop (session_id ,None )
+            ok =self .login_session (session_id ,creds ['username'],creds ['password'])
+            if not ok :
+                logger .warning ('resurrected session %s could not log in',session_id )
+            return ok 
+        except Exception :
+            logger .exception ('could not resurrect browser session %s',session_id )
+            return False 
+        finally :
+            with self ._lock :
+                self ._resurrecting .pop (session_id ,None )
+    def _touch (self ,session_id :str ):
+        with self ._lock :
+            info =self ._sessions .get (session_id )
+            if info is not None :
+                info ['last_used']=time .time ()
+    def _reclaimable (self ,now :float ):
+        with self ._lock :
+            out =[]
+            for sid ,info in self ._sessions .items ():
+                if info ['lock'].busy ():
+                    continue 
+                warm =sid in self ._idle 
+                if info .get ('leased')and now -info .get ('last_used',now )<self ._max_lease_age :
+                    continue 
+                out .append ((not warm ,info .get ('last_used',0 ),sid ))
+        out .sort ()
+        return [sid for _ ,_ ,sid in out ]
+    def _reclaim_for_capacity (self ):
+        if self ._max_sessions <=0 :
+            return 
+        with self ._lock :
+            excess =len (self ._sessions )-self ._max_sessions +1 
+        if excess <=0 :
+            return 
+        victims =self ._reclaimable (time .time ())[:excess ]
+        for sid in victims :
+            logger .info ('pool at capacity (%s); reclaiming least recently used session %s',self ._max_sessions ,sid )
+            self .close_session (sid )
+        if len (victims )<excess :
+            raise PoolExhausted (f'browser pool is full ({self ._max_sessions } sessions in use)')
+    def session_rss (self )->Dict [str ,int ]:
+        children =_proc_children ()
+        with self ._lock :
+            managers =[(sid ,info .get ('manager'))for sid ,info in self ._sessions .items ()]
+        out ={}
+        for sid ,mgr in managers :
+            pid =_driver_pid (mgr )
+            out [sid ]=_tree_rss (pid ,children )if pid and children else 0 
+        return out 
+    def reap (self )->list :
+        now =time .time ()
+        closed =[]
+        with self ._lock :
+            expired =[sid for sid ,info in self ._sessions .items ()
+            if sid not in self ._idle and not info ['lock'].busy ()
+            and now -info .get ('last_used',now )>(self ._max_lease_age if info .get ('leased')else self ._idle_ttl )]
+        for sid in expired :
+            logger .info ('evicting idle browser session %s',sid )
+            if self .close_session (sid ):
+                closed .append (sid )
+        if self ._rss_cap >0 :
+            rss =self .session_rss ()
+            with self ._lock :
+                self ._rss_cache =rss 
+                self ._rss_cached_at =time .time ()
+            total =sum (rss .values ())
+            if total >self ._rss_cap :
+                for sid in self ._reclaimable (now ):
+                    if total <=self ._rss_cap :
+                        break 
+                    logger .warning ('chrome RSS %.0fMB over cap %.0fMB; closing session %s',total /1048576 ,self ._rss_cap /1048576 ,sid )
+                    if self .close_session (sid ):
+                        closed .append (sid )
+                        total -=rss .get (sid ,0 )
+        return closed 
+    def sessions_info (self )->list :
+        now =time .time ()
+        with self ._lock :
+            rss =dict (self ._rss_cache )
+            stale =now -self ._rss_cached_at >=self ._hb_max 
+            items =list (self ._sessions .items ())
+            idle =set (self ._idle )
+            health ={sid :dict (h )for sid ,h in self ._health .items ()}
+        out =[]
+        for sid ,info in items :
+            out .append ({
+            'id':sid ,
+            'headless':bool (info .get ('headless')),
+            'profile':info .get ('profile'),
+            'authenticated':bool (info .get ('authenticated')),
+            'username':info .get ('username'),
+            'leased':bool (info .get ('leased')),
+            'busy':info ['lock'].busy (),
+            'warm':sid in idle ,
+            'age_s':round (now -info .get ('created_at',now ),1 ),
+            'idle_s':round (now -info .get ('last_used',now ),1 ),
+            'rss_mb':round (rss [sid ]/1048576 ,1 )if sid in rss else None ,
+            'timings':dict (info .get ('timings')or {}),
+            'health':health .get (sid ),
+            })
+        if stale and items :
+            self .request_heartbeat ()
+        return out 
+    def health_snapshot (self ,session_id :Optional [str ]=None ):
+        with self ._lock :
+            if session_id is not None :
+                h =self ._health .get (session_id )
+                return dict (h )if h else None 
+            return {sid :dict (h )for sid ,h in self ._health .items ()}
+    def request_heartbeat (self ,session_id :Optional [str ]=None ,touch :bool =False ):
+        self ._ensure_reaper ()
+        if session_id is None :
+            self ._hb_wakeup .set ()
+            return None 
+        if touch :
+            self ._touch (session_id )
+        return self ._submit_probe (session_id )
+    def _submit_probe (self ,session_id :str ):
+        with self ._lock :
+            if session_id not in self ._sessions :
+                return None 
+            pending =self ._hb_inflight .get (session_id )
+            if pending is not None and not pending .done ():
+                return pending 
+            if self ._hb_executor is None :
+                self ._hb_executor =ThreadPoolExecutor (max_workers =4 ,thread_name_prefix ='browser-heartbeat')
+            fut =self ._hb_executor .submit (self ._probe ,session_id )
+            self ._hb_inflight [session_id ]=fut 
+            return fut 
+    def _probe (self ,session_id :str )->Dict :
+        mgr =self .get_manager (session_id )
+        started =time .monotonic ()
+        result ={'active':False ,'busy':False ,'degraded':False ,'url':None ,'error':None }
+        if not mgr or not getattr (mgr ,'driver',None ):
+            result ['error']='no_driver'
+        else :
+            try :
+                with self .lease (session_id ,timeout =0 ,touch =False ):
+                    result ['url']=self ._cheap_probe (session_id ,mgr .driver )
+                result ['active']=True 
+            except LeaseTimeout :
+                result ['active']=True 
+                result ['busy']=True 
+            except SessionDegraded as e :
+                result ['degraded']=True 
+                result ['error']=str (e )
+            except Exception as e :
+                result ['error']=str (e )
+        result ['latency']=round (time .monotonic ()-started ,4 )
+        self ._record_health (session_id ,result )
+        return result 
+    def _cheap_probe (self ,session_id :str ,driver )->Optional [str ]:
+        try :
+            return driver .execute_script (_HEARTBEAT_JS )
+        except Exception as e :
+            try :
+                alive =bool (driver .window_handles )
+            except Exception :
+                alive =False 
+            if not alive :
+                raise 
+            logger .info ('heartbeat script failed on session %s, window still open: %s',session_id ,e )
+            raise SessionDegraded (f'page not scriptable: {e }')from e 
+    def _record_health (self ,session_id :str ,result :Dict ):
+        with self ._lock :
+            if session_id not in self ._sessions :
+                return 
+            prev =self ._health .get (session_id )or {}
+            h =dict (prev )
+            h .update (result )
+            h ['checked_at']=time .time ()
+            if result .get ('active'):
+                h ['failures']=0 
+                if result .get ('url')is None :
+                    h ['url']=prev .get ('url')
+            else :
+                h ['failures']=prev .get ('failures',0 )+1 
+            h ['dead']=h ['failures']>=self ._hb_max_failures 
+            self ._health [session_id ]=h 
+            dead =h ['dead']and not self ._sessions [session_id ].get ('leased')
+        if dead :
+            logger .warning ('browser session %s failed %s heartbeats (%s); closing it',session_id ,h ['failures'],h .get ('error'))
+            threading .Thread (target =self .close_session ,args =(session_id ,),name ='browser-pool-close',daemon =True ).start ()
+    def check_health (self ,timeout :Optional [float ]=None )->Dict [str ,Dict ]:
+        with self ._lock :
+            sids =list (self ._sessions .keys ())
+        futures ={sid :self ._submit_probe (sid )for sid in sids }
+        futures ={sid :f for sid ,f in futures .items ()if f is not None }
+        done ,pending =wait_futures (list (futures .values ()),timeout =self ._hb_timeout if timeout is None else timeout )
+        for sid ,fut in futures .items ():
+            if fut in pending :
+                self ._record_health (sid ,{'active':False ,'busy':False ,'error':'heartbeat_timeout','latency':None })
+        rss =self .session_rss ()
+        with self ._lock :
+            self ._rss_cache =rss 
+            self ._rss_cached_at =time .time ()
+        return self .health_snapshot ()
+    def _heartbeat_loop (self ):
+        while True :
+            self ._hb_wakeup .wait (self ._hb_interval )
+            self ._hb_wakeup .clear ()
+            try :
+                health =self .check_health ()
+            except Exception :
+                logger .exception ('browser heartbeat failed')
+                continue 
+            unhealthy =any (not h .get ('active')for h in health .values ())
+            if unhealthy :
+                self ._hb_interval =max (self ._hb_min ,self ._hb_interval /2 )
+            else :
+                self ._hb_interval =min (self ._hb_max ,self ._hb_interval *1.5 )
+    def _ensure_reaper (self ):
+        with self ._lock :
+            if self ._reaper_thread is not None and self ._reaper_thread .is_alive ():
+                return 
+            self ._reaper_thread =threading .Thread (target =self ._reaper_loop ,name ='browser-pool-reaper',daemon =True )
+            self ._heartbeat_thread =threading .Thread (target =self ._heartbeat_loop ,name ='browser-pool-heartbeat',daemon =True )
+        self ._reaper_thread .start ()
+        self ._heartbeat_thread .start ()
+    def _reaper_loop (self ):
+        while True :
+            time .sleep (max (5.0 ,min (30.0 ,self ._idle_ttl /4 )))
+            try :
+                self .reap ()
+            except Exception :
+                logger .exception ('browser pool reaper failed')
+    def _is_alive (self ,session_id :str )->bool :
+        mgr =self .get_manager (session_id )
+        if not mgr or not getattr (mgr ,'driver',None ):
+            return False 
+        try :
+            with self .lease (session_id ,timeout =0 ,touch =False ):
+                mgr .driver .current_url 
+            return True 
+        except LeaseTimeout :
+            return True 
+        except Exception :
+            return False 
+    def _refill_loop (self ):
+        failures =0 
+        while True :
+            self ._refill_wakeup .wait (30 )
+            self ._refill_wakeup .clear ()
+            with self ._lock :
+                creds =self ._warm_credentials 
+                missing =self ._warm_size -len (self ._idle )
+                if self ._max_sessions >0 :
+                    missing =min (missing ,self ._max_sessions -len (self ._sessions ))
+                headless =self ._warm_headless 
+                profile =self ._warm_profile 
+            if not creds or missing <=0 :
+                continue 
+            for _ in range (missing ):
+                try :
+                    sid =self .create_session (headless =headless ,profile =profile )
+                except Exception :
+                    logger .exception ('warm pool refill could not start a browser')
+                    failures +=1 
+                    time .sleep (min (60.0 ,5.0 *failures ))
+                    break 
+                if not self .login_session (sid ,creds ['username'],creds ['password']):
+                    self .close_session (sid )
+                    failures +=1 
+                    time .sleep (min (60.0 ,5.0 *failures ))
+                    break 
+                failures =0 
+                with self ._lock :
+                    if sid in self ._sessions and len (self ._idle )<self ._warm_size :
+                        self ._idle .append (sid )
+                        sid =None 
+                if sid :
+                    self .close_session (sid )
+            logger .info ('warm pool refill done (idle=%s/%s)',len (self ._idle ),self ._warm_size )
 _default_pool :Optional [BrowserPool ]=None 
+_default_pool_lock =threading .Lock ()
 def get_default_pool ()->BrowserPool :
     global _default_pool 
-    if _default_pool is None :
-        _default_pool =BrowserPool ()
+    with _default_pool_lock :
+        if _default_pool is None :
+            _default_pool =BrowserPool ()
     return _default_pool 
\ No newline at end of file
@@ -0,0 +1,93 @@
+import json 
+import os 
+import threading 
+import time 
+import logging 
+from pathlib import Path 
+from typing import Optional ,Dict 
+try :
+    import fcntl 
+    def _lock_fd (fd :int )->bool :
+        try :
+            fcntl .flock (fd ,fcntl .LOCK_EX |fcntl .LOCK_NB )
+            return True 
+        except OSError :
+            return False 
+    def _unlock_fd (fd :int ):
+        fcntl .flock (fd ,fcntl .LOCK_UN )
+except ImportError :
+    import msvcrt 
+    def _lock_fd (fd :int )->bool :
+        try :
+            msvcrt .locking (fd ,msvcrt .LK_NBLCK ,1 )
+            return True 
+        except OSError :
+            return False 
+    def _unlock_fd (fd :int ):
+        os .lseek (fd ,0 ,os .SEEK_SET )
+        msvcrt .locking (fd ,msvcrt .LK_UNLCK ,1 )
+logger =logging .getLogger ('dv_admin_automator.browser.profiles')
+LOCK_NAME ='dv_slot.lock'
+META_NAME ='dv_slot.json'
+class ProfileSlots :
+    def __init__ (self ,root :Optional [Path ]=None ,size :Optional [int ]=None ):
+        if root is None :
+            from dv_admin_automator .activation .storage import LocalStore 
+            root =LocalStore ().base_dir /'chrome_profiles'
+        self .root =Path (root )
+        self .size =int (os .environ .get ('DV_PROFILE_SLOTS','6'))if size is None else int (size )
+        self ._lock =threading .Lock ()
+        self ._held :Dict [str ,int ]={}
+    def claim (self )->Optional [Path ]:
+        with self ._lock :
+            for i in range (self .size ):
+                slot =self .root /f'slot-{i }'
+                key =str (slot )
+                if key in self ._held :
+                    continue 
+                try :
+                    slot .mkdir (parents =True ,exist_ok =True )
+                    fd =os .open (str (slot /LOCK_NAME ),os .O_RDWR |os .O_CREAT ,0o600 )
+                except OSError :
+                    logger .warning ('could not open profile slot %s',slot ,exc_info =True )
+                    continue 
+                if not _lock_fd (fd ):
+                    os .close (fd )
+                    continue 
+                self ._held [key ]=fd 
+                logger .info ('claimed chrome profile slot %s',slot )
+                return slot 
+        logger .warning ('all %s chrome profile slots are in use',self .size )
+        return None 
+    def release (self ,slot :Optional [Path ]):
+        if slot is None :
+            return 
+        with self ._lock :
+            fd =self ._held .pop (str (slot ),None )
+        if fd is None :
+            return 
+        try :
+            _unlock_fd (fd )
+        except OSError :
+            pass 
+        finally :
+            os .close (fd )
+    @staticmethod 
+    def read_meta (slot :Optional [Path ])->Dict :
+        if slot is None :
+            return {}
+        try :
+            return json .loads ((Path (slot )/META_NAME ).read_text (encoding ='utf-8'))
+        except Exception :
+            return {}
+    @staticmethod 
+    def write_meta (slot :Optional [Path ],**values ):
+        if slot is None :
+            return 
+        meta =ProfileSlots .read_meta (slot )
+        meta .update (values )
+        meta ['saved_at']=time .time ()
+        try :
+            (Path (slot )/META_NAME ).write_text (json .dumps (meta ,indent =2 ),encoding ='utf-8')
+        except Exception :
+            logger .warning ('could not write profile slot metadata for %s',slot ,exc_info =True )
\ No newline at end of file
@@ -1,6 +1,7 @@
 import logging 
 from typing import Optional 
 from .manager import BrowserManager 
+from dv_admin_automator .pages .base_page import wait_page_after 
 logger =logging .getLogger ("dv_admin_automator.browser.service")
 class BrowserService :
     def __init__ (self ,browser :str ="chrome",headless :bool =False ,window :str ="1920x1080"):
@@ -15,11 +16,9 @@ class BrowserService :
             from selenium .webdriver .common .by import By 
             from selenium .webdriver .support .ui import WebDriverWait 
             from selenium .webdriver .support import expected_conditions as EC 
-            import time 
             wait =WebDriverWait (driver ,timeout )
             logger .info ('Navigating to %s',url )
             driver .get (url )
-            time .sleep (1 )
             username_selector ="input[type='text'], input[name='username'], input[name='user'], input[id*='username'], input[id*='user'], input[placeholder*='usuário'], input[placeholder*='username']"
             password_selector ="input[type='password'], input[name='password'], input[id*='password'], input[placeholder*='senha']"
             u_field =wait .until (EC .presence_of_element_located ((By .CSS_SELECTOR ,username_selector )))
@@ -31,7 +30,50 @@ class BrowserService :
                 login_btn .click ()
             except Exception :
                 logger .exception ('Login button not found or click failed')
-            time .sleep (3 )
+            wait_page_after (driver ,p_field ,timeout =timeout )
             logger .info ('login_to_site finished, leaving browser open for inspection')
         finally :
-            pass 
\ No newline at end of file
+            pass 
+MOODASHBOARD_URL ='https://webapp.moodar.com.br/moodashboard/'
+USERNAME_SELECTOR ="input[type='text'], input[name='username'], input[name='user'], input[id*='username'], input[id*='user'], input[placeholder*='usuário'], input[placeholder*='username']"
+PASSWORD_SELECTOR ="input[type='password'], input[name='password'], input[id*='password'], input[placeholder*='senha']"
+SUBMIT_SELECTOR ="button[type='submit'], input[type='submit'], button[class*='login'], button[class*='entrar']"
+def login_driver (driver ,username :str ,password :str ,url :str =MOODASHBOARD_URL ,timeout :int =15 )->bool :
+    from selenium .webdriver .common .by import By 
+    from selenium .webdriver .support .ui import WebDriverWait 
+    from selenium .webdriver .support import expected_conditions as EC 
+    wait =WebDriverWait (driver ,timeout )
+    driver .get (url )
+    u_field =wait .until (EC .presence_of_element_located ((By .CSS_SELECTOR ,USERNAME_SELECTOR )))
+    p_field =driver .find_element (By .CSS_SELECTOR ,PASSWORD_SELECTOR )
+    u_field .clear ();u_field .send_keys (username )
+    p_field .clear ();p_field .send_keys (password )
+    try :
+        login_btn =driver .find_element (By .CSS_SELECTOR ,SUBMIT_SELECTOR )
+        login_btn .click ()
+    except Exception :
+        logger .exception ('Login button not found or click failed')
+        p_field .submit ()
+    if not wait_page_after (driver ,p_field ,timeout =timeout ):
+        logger .warning ('login form still present after %ss',timeout )
+    return is_logged_in (driver )
+def is_logged_in (driver )->bool :
+    from selenium .webdriver .common .by import By 
+    try :
+        if driver .find_elements (By .CSS_SELECTOR ,PASSWORD_SELECTOR ):
+            return False 
+    except Exception :
+        return False 
+    try :
+        cur =driver .execute_script ('return document.location.href;')
+    except Exception :
+        cur =None 
+    if cur and isinstance (cur ,str )and cur .startswith (MOODASHBOARD_URL )and '/login'not in cur :
+        return True 
+    for sel in ("button.logout","a.logout","[data-logged-in='true']","nav"):
+        try :
+            if driver .find_elements (By .CSS_SELECTOR ,sel ):
+                return True 
+        except Exception :
+            continue 
+    return False 
\ No newline at end of file
@@ -0,0 +1,92 @@
+import contextlib 
+import time 
+import uuid 
+from typing import Any 
+from selenium .common .exceptions import TimeoutException 
+from selenium .webdriver .remote .webelement import WebElement 
+_NAV_START_JS =("var u = new URL(arguments[0], window.location.href).href;"
+"var hashOnly = u.indexOf('#') >= 0 && u.split('#')[0] === window.location.href.split('#')[0];"
+"if (!hashOnly) { window.__dvNav = arguments[1]; }"
+"window.location.href = u; return hashOnly;")
+_NAV_STATE_JS ="return window.__dvNav === arguments[0] ? 'pending' : document.readyState;"
+class _TabProxy :
+    def __init__ (self ,tab ,target ):
+        object .__setattr__ (self ,'_tab',tab )
+        object .__setattr__ (self ,'_target',target )
+    def __getattr__ (self ,name ):
+        with self ._tab .focus ():
+            attr =getattr (self ._target ,name )
+        if not callable (attr ):
+            return self ._tab .wrap (attr )
+        def call (*args ,**kwargs ):
+            args =[self ._tab .unwrap (a )for a in args ]
+            with self ._tab .focus ():
+                return self ._tab .wrap (attr (*args ,**kwargs ))
+        return call 
+    def __eq__ (self ,other ):
+        return self ._target ==self ._tab .unwrap (other )
+    def __hash__ (self ):
+        return hash (self ._target )
+    def __repr__ (self ):
+        return f'<{type (self ).__name__ } {self ._tab .handle } {self ._target!r}>'
+class TabElement (_TabProxy ):
+    pass 
+class TabDriver (_TabProxy ):
+    def __init__ (self ,tab ,target ):
+        super ().__init__ (tab ,target )
+        object .__setattr__ (self ,'_nav_token',None )
+    def __getattr__ (self ,name ):
+        if name =='switch_to':
+            raise AttributeError ('a tab driver stays on its leased window; take another mgr.tab() instead of switch_to')
+        return super ().__getattr__ (name )
+    def get (self ,url :str ,timeout :float =30.0 ,poll :float =0.05 ):
+        if self .start_navigation (url ):
+            self .wait_navigation (timeout =timeout ,poll =poll )
+    def start_navigation (self ,url :str )->bool :
+        token =uuid .uuid4 ().hex 
+        with self ._tab .focus ()as driver :
+            hash_only =driver .execute_script (_NAV_START_JS ,url ,token )
+        object .__setattr__ (self ,'_nav_token',None if hash_only else token )
+        return not hash_only 
+    def wait_navigation (self ,timeout :float =30.0 ,poll :float =0.05 ):
+        token =object .__getattribute__ (self ,'_nav_token')
+        deadline =time .monotonic ()+timeout 
+        ready =('interactive','complete')if self ._tab .manager .profile =='scrape'else ('complete',)
+        while True :
+            try :
+                with self ._tab .focus ()as driver :
+                    state =driver .execute_script (_NAV_STATE_JS ,token )
+            except Exception :
+                state ='pending'
+            if state in ready :
+                return 
+            if time .monotonic ()>=deadline :
+                raise TimeoutException (f'tab {self ._tab .handle } did not finish loading within {timeout }s')
+            time .sleep (poll )
+class Tab :
+    def __init__ (self ,manager ,handle :str ):
+        self .manager =manager 
+        self .handle =handle 
+        self .driver =TabDriver (self ,manager .driver )
+        self .session_id =None 
+    @contextlib .contextmanager 
+    def focus (self ):
+        mgr =self .manager 
+        with mgr ._cmd_lock :
+            if mgr ._current_handle !=self .handle :
+                mgr .driver .switch_to .window (self .handle )
+                mgr ._current_handle =self .handle 
+            yield mgr .driver 
+    def wrap (self ,value :Any )->Any :
+        if isinstance (value ,WebElement ):
+            return TabElement (self ,value )
+        if isinstance (value ,list ):
+            return [self .wrap (v )for v in value ]
+        return value 
+    @staticmethod 
+    def unwrap (value :Any )->Any :
+        if isinstance (value ,_TabProxy ):
+            return object .__getattribute__ (value ,'_target')
+        if isinstance (value ,(list ,tuple )):
+            return type (value )(Tab .unwrap (v )for v in value )
+        return value 
\ No newline at end of file
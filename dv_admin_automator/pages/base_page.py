@@ -2,7 +2,115 @@ from selenium .webdriver .remote .webdriver import WebDriver
 from selenium .webdriver .support .ui import WebDriverWait 
 from selenium .webdriver .support import expected_conditions as EC 
 from selenium .webdriver .common .by import By 
-from typing import Optional 
+from selenium .common .exceptions import TimeoutException ,StaleElementReferenceException 
+from collections import deque 
+from typing import Optional ,Callable ,Any ,Dict 
+import logging 
+import threading 
+import time 
+logger =logging .getLogger ('dv_admin_automator.pages.base_page')
+class WaitStats :
+    def __init__ (self ,window :int =200 ):
+        self ._lock =threading .Lock ()
+        self ._window =window 
+        self ._by_name :Dict [str ,Dict ]={}
+    def record (self ,name :str ,elapsed :float ,ok :bool ):
+        with self ._lock :
+            st =self ._by_name .get (name )
+            if st is None :
+                st =self ._by_name [name ]={'count':0 ,'timeouts':0 ,'total':0.0 ,'max':0.0 ,'recent':deque (maxlen =self ._window )}
+            st ['count']+=1 
+            st ['total']+=elapsed 
+            st ['max']=max (st ['max'],elapsed )
+            st ['recent'].append (elapsed )
+            if not ok :
+                st ['timeouts']+=1 
+    def snapshot (self )->Dict [str ,Dict ]:
+        with self ._lock :
+            out ={}
+            for name ,st in self ._by_name .items ():
+                recent =sorted (st ['recent'])
+                out [name ]={
+                'count':st ['count'],
+                'timeouts':st ['timeouts'],
+                'avg':round (st ['total']/st ['count'],4 )if st ['count']else 0.0 ,
+                'p95':round (recent [min (len (recent )-1 ,int (round (0.95 *(len (recent )-1 ))))],4 )if recent else 0.0 ,
+                'max':round (st ['max'],4 ),
+                }
+            return out 
+_wait_stats =WaitStats ()
+def wait_stats ()->Dict [str ,Dict ]:
+    return _wait_stats .snapshot ()
+def _js (driver ,script :str ,*args ):
+    try :
+        return driver .execute_script (script ,*args )
+    except StaleElementReferenceException :
+        return None 
+def document_ready (driver )->bool :
+    return _js (driver ,"return document.readyState;")in ('interactive','complete')
+def changelist_rendered (driver )->bool :
+    return bool (_js (driver ,"return document.readyState !== 'loading' && !!(document.getElementById('result_list') || document.getElementById('changelist') || document.querySelector('.paginator'));"))
+def select2_open (driver )->bool :
+    return bool (_js (driver ,"return !!document.querySelector('.select2-container--open .select2-search__field, .select2-dropdown .select2-search__field');"))
+def select2_closed (driver )->bool :
+    return not _js (driver ,"return !!document.querySelector('.select2-container--open');")
+def select2_loading (driver )->bool :
+    return bool (_js (driver ,"return !!document.querySelector('.select2-results__option.loading-results');"))
+def select2_results_loaded (driver )->bool :
+    return bool (_js (driver ,(
+    "var opts = document.querySelectorAll('.select2-results__option');"
+    "if (!opts.length) return false;"
+    "for (var i = 0; i < opts.length; i++) { if (opts[i].classList.contains('loading-results')) return false; }"
+    "return true;"
+    )))
+def element_present (css :str )->Callable :
+    def _present (driver ):
+        return bool (_js (driver ,"return !!document.querySelector(arguments[0]);",css ))
+    _present .__name__ =f'element_present({css })'
+    return _present 
+def page_replaced (element )->Callable :
+    def _replaced (driver ):
+        try :
+            element .is_enabled ()
+            return False 
+        except StaleElementReferenceException :
+            return True 
+        except Exception :
+            return True 
+    _replaced .__name__ ='page_replaced'
+    return _replaced 
+def form_saved (driver )->Optional [str ]:
+    return _js (driver ,(
+    "if (document.readyState === 'loading') return null;"
+    "if (document.querySelector('.errornote, .errorlist')) return 'error';"
+    "if (document.querySelector('.messagelist .success, ul.messagelist li.success')) return 'saved';"
+    "if (!/\\/add\\/?(\\?|$)/.test(location.pathname + location.search)) return 'saved';"
+    "return null;"
+    ))
+def wait_for (driver ,predicate :Callable [[Any ],Any ],timeout :float =15 ,poll :float =0.1 ,name :Optional [str ]=None ,raise_on_timeout :bool =True ):
+    label =name or getattr (predicate ,'__name__','condition')
+    started =time .perf_counter ()
+    try :
+        result =WebDriverWait (driver ,timeout ,poll_frequency =poll ).until (predicate )
+        ok =True 
+    except TimeoutException :
+        result =None 
+        ok =False 
+    elapsed =time .perf_counter ()-started 
+    _wait_stats .record (label ,elapsed ,ok )
+    logger .debug ('wait %s took %.3fs ok=%s',label ,elapsed ,ok )
+    if not ok and raise_on_timeout :
+        raise TimeoutException (f'{label } not reached within {timeout }s')
+    return result 
+def wait_select2_results (driver ,timeout :float =10 ):
+    wait_for (driver ,select2_loading ,timeout =0.6 ,poll =0.05 ,raise_on_timeout =False )
+    return wait_for (driver ,select2_results_loaded ,timeout =timeout ,poll =0.05 ,raise_on_timeout =False )
+def wait_page_after (driver ,element ,predicate :Callable =document_ready ,timeout :float =15 ):
+    wait_for (driver ,page_replaced (element ),timeout =timeout ,raise_on_timeout =False )
+    return wait_for (driver ,predicate ,timeout =timeout ,raise_on_timeout =False )
+def wait_form_saved (driver ,submit_element ,timeout :float =15 )->Optional [str ]:
+    wait_for (driver ,page_replaced (submit_element ),timeout =timeout ,raise_on_timeout =False )
+    return wait_for (driver ,form_saved ,timeout =timeout ,raise_on_timeout =False )
 class BasePage :
     def __init__ (self ,driver :WebDriver ,timeout :int =15 ):
         self .driver =driver 
@@ -16,4 +124,14 @@ class BasePage :
     def fill (self ,by :By ,value :str ,text :str ):
         el =self .find (by ,value )
         el .clear ()
-        el .send_keys (text )
\ No newline at end of file
+        el .send_keys (text )
+    def wait_until (self ,predicate :Callable [[Any ],Any ],timeout :Optional [float ]=None ,name :Optional [str ]=None ,raise_on_timeout :bool =True ):
+        return wait_for (self .driver ,predicate ,timeout =self .timeout if timeout is None else timeout ,name =name ,raise_on_timeout =raise_on_timeout )
+    def wait_ready (self ,timeout :Optional [float ]=None ):
+        return self .wait_until (document_ready ,timeout )
+    def wait_changelist (self ,timeout :Optional [float ]=None ):
+        return self .wait_until (changelist_rendered ,timeout )
+    def wait_select2_results (self ,timeout :Optional [float ]=None ):
+        return wait_select2_results (self .driver ,self .timeout if timeout is None else timeout )
+    def wait_form_saved (self ,submit_element ,timeout :Optional [float ]=None )->Optional [str ]:
+        return wait_form_saved (self .driver ,submit_element ,self .timeout if timeout is None else timeout )
\ No newline at end of file
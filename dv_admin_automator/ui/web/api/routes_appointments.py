@@ -2,9 +2,11 @@ from fastapi import APIRouter ,HTTPException ,Request ,Body
 from fastapi .responses import JSONResponse 
 from pydantic import BaseModel 
 from typing import List ,Optional 
-from dv_admin_automator .browser .pool import get_default_pool 
+from dv_admin_automator .browser .pool import get_default_pool ,LeaseTimeout 
+from dv_admin_automator .backend .history_store import get_history_store 
+from dv_admin_automator .backend .appointments import forget_participant_history ,history_flight_stats 
+from dv_admin_automator .backend .participants import exact_participant ,get_participant_directory ,resolve_participant 
 import asyncio 
-_history_inflight ={}
 router =APIRouter ()
 class ScheduleCycleRequest (BaseModel ):
     participant_id :str 
@@ -28,6 +30,10 @@ req :ScheduleCycleRequest =Body (...)
         print (f"[api_appointments_schedule] browser_session_id: {req .browser_session_id }")
         pool =get_default_pool ()
         if req .browser_session_id :
+            try :
+                await asyncio .wait_for (asyncio .wrap_future (pool .ensure_ready (req .browser_session_id )),timeout =120 )
+            except Exception as e :
+                print (f"[api_appointments_schedule] waiting for browser session {req .browser_session_id } failed: {e }")
             mgr =pool .get_manager (req .browser_session_id )
             if mgr :
                 chosen_sid =req .browser_session_id 
@@ -49,13 +55,14 @@ req :ScheduleCycleRequest =Body (...)
                         if not drv :
                             continue 
                         url =None 
-                        try :
-                            url =drv .execute_script ('return document.location.href;')
-                        except Exception :
+                        with pool .lease (sid ,timeout =0 ,touch =False ):
                             try :
-                                url =drv .current_url if hasattr (drv ,'current_url')else None 
+                                url =drv .execute_script ('return document.location.href;')
                             except Exception :
-                                url =None 
+                                try :
+                                    url =drv .current_url if hasattr (drv ,'current_url')else None 
+                                except Exception :
+                                    url =None 
                         if url and ('/moodashboard'in url or '/participante'in url or '/import/'in url ):
                             chosen =(sid ,mgr_candidate )
                             break 
@@ -78,19 +85,17 @@ req :ScheduleCycleRequest =Body (...)
             if resolved_participant_id and ('@'in str (resolved_participant_id )or not str (resolved_participant_id ).strip ().isdigit ()):
                 try :
                     from dv_admin_automator .backend .appointments import search_participant_rows 
-                    rows =search_participant_rows (resolved_participant_id ,manager =mgr )
-                    if rows :
-                        match =None 
-                        for r in rows :
-                            if r .get ('email')and r .get ('email').lower ()==str (resolved_participant_id ).lower ():
-                                match =r 
-                                break 
-                        if match is None :
-                            match =rows [0 ]
-                        if match :
-                            resolved_participant_id =str (match .get ('id')or match .get ('patient_id')or resolved_participant_id )
-                            resolved_participant_name =resolved_participant_name or match .get ('name')
-                            print (f"[api_appointments_schedule] Resolved participant_id '{req .participant_id }' -> '{resolved_participant_id }' (name='{resolved_participant_name }')")
+                    local ,candidates =resolve_participant (resolved_participant_id )
+                    if local is None and not candidates :
+                        candidates =search_participant_rows (resolved_participant_id ,manager =mgr )or []
+                    match =local or exact_participant (candidates ,resolved_participant_id )
+                    if match is None and candidates :
+                        print (f"[api_appointments_schedule] '{req .participant_id }' is ambiguous, {len (candidates )} candidates need confirmation")
+                        return JSONResponse ({'ok':False ,'error':'participant_not_confirmed','message':'Participant did not match exactly; confirm one of the candidates and retry with its id','candidates':candidates },status_code =409 )
+                    if match :
+                        resolved_participant_id =str (match .get ('id')or match .get ('patient_id')or resolved_participant_id )
+                        resolved_participant_name =resolved_participant_name or match .get ('name')
+                        print (f"[api_appointments_schedule] Resolved participant_id '{req .participant_id }' -> '{resolved_participant_id }' (name='{resolved_participant_name }')")
                 except Exception as e :
                     print (f"[api_appointments_schedule] participant_id resolution failed: {e }")
         except Exception :
@@ -108,9 +113,49 @@ req :ScheduleCycleRequest =Body (...)
         manager =mgr 
         )
         return JSONResponse (result )
+    except LeaseTimeout as e :
+        print (f"[api_appointments_schedule] Browser session busy: {e }")
+        return JSONResponse ({'ok':False ,'error':'browser_session_busy'},status_code =409 )
     except Exception as e :
         print (f"[api_appointments_schedule] Exception: {e }")
         return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
+@router .get ('/api/participants/directory')
+async def api_participants_directory ():
+    directory =get_participant_directory ()
+    if directory is None :
+        return JSONResponse ({'ok':True ,'enabled':False })
+    return JSONResponse ({'ok':True ,'enabled':True ,**directory .stats ()})
+@router .post ('/api/participants/directory/sync')
+async def api_participants_directory_sync (full :bool =False ,background :bool =False ):
+    directory =get_participant_directory ()
+    if directory is None :
+        return JSONResponse ({'ok':False ,'error':'directory_disabled'},status_code =400 )
+    if background :
+        return JSONResponse ({'ok':True ,'started':directory .ensure_fresh (force =True ,full =full )},status_code =202 )
+    loop =asyncio .get_running_loop ()
+    try :
+        result =await loop .run_in_executor (None ,lambda :directory .sync (full =full ))
+    except LeaseTimeout :
+        return JSONResponse ({'ok':False ,'error':'browser_session_busy'},status_code =409 )
+    except Exception as e :
+        return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
+    return JSONResponse (result )
+@router .get ('/api/appointments/history/cache')
+async def api_appointments_history_cache ():
+    store =get_history_store ()
+    if store is None :
+        return JSONResponse ({'ok':True ,'enabled':False })
+    return JSONResponse ({'ok':True ,'enabled':True ,**store .stats ()})
+@router .delete ('/api/appointments/history/cache')
+async def api_appointments_history_cache_clear (participant :str =None ):
+    store =get_history_store ()
+    if store is not None :
+        store .invalidate (participant )
+    forget_participant_history (participant )
+    return JSONResponse ({'ok':True })
+@router .get ('/api/appointments/history/stats')
+async def api_appointments_history_stats ():
+    return JSONResponse ({'ok':True ,**history_flight_stats ()})
 @router .get ('/api/appointments/history')
 async def api_appointments_history (
 participant :str =None ,
@@ -121,7 +166,22 @@ browser_session_id :str =None ,
 for_schedule :bool =False 
 ):
     try :
-        from dv_admin_automator .backend .appointments import search_participant_rows 
+        from dv_admin_automator .backend .appointments import search_participant_rows ,cached_participant_history 
+        if for_schedule and (participant_id or participant ):
+            directory =get_participant_directory ()
+            if directory is not None :
+                rows =directory .search (participant_id or participant )
+                if rows :
+                    return JSONResponse ({'ok':True ,'participants':rows })
+        if not email and not for_schedule and (participant_id or participant ):
+            local ,_ =resolve_participant (participant_id or participant )
+            if local and '@'in (local .get ('email')or ''):
+                print (f"[api_appointments_history] resolved {participant_id or participant } -> {local ['email']} from the participant directory")
+                email =local ['email']
+        if email and not for_schedule :
+            history =cached_participant_history (email )
+            if history :
+                return JSONResponse ({'ok':True ,**history })
         mgr =None 
         if browser_session_id :
             try :
@@ -163,13 +223,14 @@ for_schedule :bool =False
                         if not drv :
                             continue 
                         url =None 
-                        try :
-                            url =drv .execute_script ('return document.location.href;')
-                        except Exception :
+                        with pool .lease (sid ,timeout =0 ,touch =False ):
                             try :
-                                url =drv .current_url if hasattr (drv ,'current_url')else None 
+                                url =drv .execute_script ('return document.location.href;')
                             except Exception :
-                                url =None 
+                                try :
+                                    url =drv .current_url if hasattr (drv ,'current_url')else None 
+                                except Exception :
+                                    url =None 
                         if url and ('/moodashboard'in url or '/participante'in url or '/import/'in url ):
                             chosen =(sid ,mgr_candidate )
                             break 
@@ -182,37 +243,17 @@ for_schedule :bool =False
                     print (f"Using fallback browser session {browser_session_id } for appointments search")
             except Exception :
                 mgr =None 
+        if browser_session_id :
+            try :
+                ready =await asyncio .wait_for (asyncio .wrap_future (get_default_pool ().ensure_ready (browser_session_id )),timeout =120 )
+            except Exception as e :
+                print (f"[api_appointments_history] waiting for browser session {browser_session_id } failed: {e }")
+                ready =False 
+            if ready :
+                mgr =get_default_pool ().get_manager (browser_session_id )
         if browser_session_id and mgr is None :
             msg =f"Requested browser_session_id='{browser_session_id }' has no active session"
             print (msg )
-            try :
-                from dv_admin_automator .ui .web .api import routes_auth 
-                creds =routes_auth ._SESSION_CREDENTIALS .get (browser_session_id )
-            except Exception :
-                creds =None 
-            if creds and isinstance (creds ,dict ):
-                try :
-                    pool =get_default_pool ()
-                    headless =bool (creds .get ('headless',False ))
-                    new_sid =pool .create_session (headless =headless )
-                    from dv_admin_automator .ui .web .api import routes_auth as auth_routes 
-                    from dv_admin_automator import jobs 
-                    jm =jobs .get_default_manager ()
-                    job_id =jm .submit (lambda :auth_routes ._login_job (new_sid ,creds .get ('username'),creds .get ('password'),headless ))
-                    return JSONResponse ({
-                    'ok':True ,
-                    'message':'scheduled_login_for_missing_session',
-                    'browser_session_id':new_sid ,
-                    'job_id':job_id 
-                    })
-                except Exception as e :
-                    return JSONResponse ({
-                    'ok':False ,
-                    'error':'no_active_browser_session',
-                    'message':msg ,
-                    'browser_session_id':browser_session_id ,
-                    'scheduling_error':str (e )
-                    },status_code =500 )
             return JSONResponse ({
             'ok':False ,
             'error':'no_active_browser_session',
@@ -235,20 +276,7 @@ for_schedule :bool =False
             if email :
                 try :
                     loop =asyncio .get_running_loop ()
-                    if email in _history_inflight :
-                        print (f"[api_appointments_history] awaiting existing in-flight history request for {email }")
-                        history =await _history_inflight [email ]
-                    else :
-                        fut =loop .create_future ()
-                        _history_inflight [email ]=fut 
-                        try :
-                            history =await loop .run_in_executor (None ,lambda :get_participant_history (email ,manager =mgr ))
-                            fut .set_result (history )
-                        except Exception as e :
-                            fut .set_exception (e )
-                            raise 
-                        finally :
-                            _history_inflight .pop (email ,None )
+                    history =await loop .run_in_executor (None ,lambda :get_participant_history (email ,manager =mgr ))
                 except Exception as e :
                     print (f"[api_appointments_history] error fetching history by email: {e }")
                     history =None 
@@ -280,20 +308,7 @@ for_schedule :bool =False
             if search_query :
                 try :
                     loop =asyncio .get_running_loop ()
-                    if search_query in _history_inflight :
-                        print (f"[api_appointments_history] awaiting existing in-flight history request for {search_query }")
-                        history =await _history_inflight [search_query ]
-                    else :
-                        fut =loop .create_future ()
-                        _history_inflight [search_query ]=fut 
-                        try :
-                            history =await loop .run_in_executor (None ,lambda :get_participant_history (search_query ,manager =mgr ))
-                            fut .set_result (history )
-                        except Exception as e :
-                            fut .set_exception (e )
-                            raise 
-                        finally :
-                            _history_inflight .pop (search_query ,None )
+                    history =await loop .run_in_executor (None ,lambda :get_participant_history (search_query ,manager =mgr ))
                 except Exception :
                     history =None 
                 if history :
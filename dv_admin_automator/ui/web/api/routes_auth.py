@@ -7,6 +7,10 @@ router =APIRouter ()
 logger =logging .getLogger ('dv_admin_automator.ui.web.api.routes_auth')
 _SESSION_CREDENTIALS ={}
 _PENDING_LOGINS ={}
+def _credentials_for_session (session_id :str ):
+    creds =_SESSION_CREDENTIALS .get (session_id )
+    return dict (creds )if isinstance (creds ,dict )else None 
+get_default_pool ().set_credentials_provider (_credentials_for_session )
 @router .post ('/login')
 async def login_endpoint (payload :dict ,request :Request ):
     username =payload .get ('username')
@@ -61,13 +65,17 @@ async def complete_login (payload :dict ,request :Request ):
         logger .exception ('failed storing credentials in session during complete_login')
     try :
         if session_id :
-            _SESSION_CREDENTIALS [session_id ]={'username':username ,'password':password }
+            _SESSION_CREDENTIALS [session_id ]={**_SESSION_CREDENTIALS .get (session_id ,{}),'username':username ,'password':password }
     except Exception :
         logger .exception ('failed storing credentials in _SESSION_CREDENTIALS during complete_login')
     try :
         del _PENDING_LOGINS [job_id ]
     except Exception :
         pass 
+    try :
+        get_default_pool ().configure_warm (username ,password ,headless =True )
+    except Exception :
+        logger .exception ('failed configuring warm browser pool')
     resp ={'ok':True }
     if session_id :
         resp ['browser_session_id']=session_id 
@@ -106,50 +114,18 @@ def _login_job (session_id :str ,username :str ,password :str ,headless :bool =F
             driver =bm .start ()
         else :
             driver =mgr .driver 
-        from selenium .webdriver .common .by import By 
-        from selenium .webdriver .support .ui import WebDriverWait 
-        from selenium .webdriver .support import expected_conditions as EC 
-        import time 
-        url ='https://webapp.moodar.com.br/moodashboard/'
+        from dv_admin_automator .browser .service import login_driver 
         logging .getLogger ('dv_admin_automator.ui.web.api.routes_auth').info ('Starting login job for session %s (headless=%s)',session_id ,headless )
-        wait =WebDriverWait (driver ,15 )
-        driver .get (url )
-        time .sleep (1 )
-        username_selector ="input[type='text'], input[name='username'], input[name='user'], input[id*='username'], input[id*='user'], input[placeholder*='usuário'], input[placeholder*='username']"
-        password_selector ="input[type='password'], input[name='password'], input[id*='password'], input[placeholder*='senha']"
-        u_field =wait .until (EC .presence_of_element_located ((By .CSS_SELECTOR ,username_selector )))
-        p_field =driver .find_element (By .CSS_SELECTOR ,password_selector )
-        u_field .clear ();u_field .send_keys (username )
-        p_field .clear ();p_field .send_keys (password )
-        try :
-            login_btn =driver .find_element (By .CSS_SELECTOR ,"button[type='submit'], input[type='submit'], button[class*='login'], button[class*='entrar']")
-            login_btn .click ()
-            logging .getLogger ('dv_admin_automator.ui.web.api.routes_auth').info ('Clicked login button for session %s',session_id )
-        except Exception :
-            logger .exception ('Login button not found or click failed')
-        time .sleep (3 )
-        success =False 
         message =None 
-        try :
+        if mgr :
+            success =pool .login_session (session_id ,username ,password )
+        else :
             try :
-                cur =driver .execute_script ('return document.location.href;')
-            except Exception :
-                cur =None 
-            dashboard_prefix ='https://webapp.moodar.com.br/moodashboard/'
-            if cur and isinstance (cur ,str )and cur .startswith (dashboard_prefix ):
-                success =True 
-            else :
-                possible =["button.logout","a.logout","[data-logged-in='true']","nav"]
-                for sel in possible :
-                    try :
-                        el =driver .find_elements (By .CSS_SELECTOR ,sel )
-                        if el and len (el )>0 :
-                            success =True 
-                            break 
-                    except Exception :
-                        continue 
-        except Exception :
-            logger .exception ('error while detecting login success')
+                success =login_driver (driver ,username ,password ,timeout =15 )
+            except Exception as e :
+                logger .exception ('error while logging in')
+                success =False 
+                message =str (e )
         try :
             from ..jobs import get_current_job_id 
             jid =get_current_job_id ()
@@ -16,7 +16,7 @@ async def api_keepalive (request :Request ):
     return JSONResponse ({'ok':True })
 @router .post ('/browser/keepalive')
 async def api_browser_keepalive (request :Request ):
-    results ={'touched':0 ,'errors':[]}
+    results ={'touched':0 ,'busy':0 ,'errors':[]}
     try :
         from dv_admin_automator .browser .pool import get_default_pool 
         pool =get_default_pool ()
@@ -25,28 +25,19 @@ async def api_browser_keepalive (request :Request ):
         except Exception :
             payload ={}
         target =payload .get ('session')if isinstance (payload ,dict )else None 
-        sessions =[]
         if target :
-            sessions =[target ]
+            if pool .request_heartbeat (target ,touch =True )is not None :
+                results ['touched']+=1 
+            health ={target :pool .health_snapshot (target )or {}}
         else :
-            try :
-                sessions =list (pool ._sessions .keys ())
-            except Exception :
-                sessions =[]
-        for sid in sessions :
-            try :
-                mgr =pool .get_manager (sid )
-                if not mgr or not getattr (mgr ,'driver',None ):
-                    continue 
-                driver =mgr .driver 
-                script ="try{ fetch('/', {method:'GET', credentials:'include'}).catch(function(e){}); }catch(e){};"
-                try :
-                    driver .execute_script (script )
-                    results ['touched']+=1 
-                except Exception as e :
-                    results ['errors'].append ({'session':sid ,'error':str (e )})
-            except Exception as e :
-                results ['errors'].append ({'session':sid ,'error':str (e )})
+            pool .request_heartbeat ()
+            health =pool .health_snapshot ()
+            results ['touched']=len (health )
+        for sid ,h in health .items ():
+            if h .get ('busy'):
+                results ['busy']+=1 
+            if h .get ('error'):
+                results ['errors'].append ({'session':sid ,'error':h .get ('error')})
     except Exception as e :
         return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
     return JSONResponse ({'ok':True ,**results })
@@ -55,26 +46,16 @@ async def api_browser_session_status (session_id :str ):
     try :
         from dv_admin_automator .browser .pool import get_default_pool 
         pool =get_default_pool ()
-        exists =False 
-        try :
-            exists =session_id in getattr (pool ,'_sessions',{})
-        except Exception :
-            exists =False 
-        if not exists :
+        if pool .get_manager (session_id )is None :
             return JSONResponse ({'ok':True ,'session':session_id ,'exists':False ,'active':False ,'url':None })
-        mgr =None 
-        try :
-            mgr =pool .get_manager (session_id )
-        except Exception :
-            mgr =None 
-        if not mgr or not getattr (mgr ,'driver',None ):
-            return JSONResponse ({'ok':True ,'session':session_id ,'exists':True ,'active':False ,'url':None })
-        driver =mgr .driver 
-        try :
-            url =driver .execute_script ('return document.location.href;')
-            return JSONResponse ({'ok':True ,'session':session_id ,'exists':True ,'active':True ,'url':url })
-        except Exception as e :
-            return JSONResponse ({'ok':True ,'session':session_id ,'exists':True ,'active':False ,'url':None ,'error':str (e )})
+        h =pool .health_snapshot (session_id )
+        if h is None :
+            pool .request_heartbeat (session_id )
+            return JSONResponse ({'ok':True ,'session':session_id ,'exists':True ,'active':None ,'url':None ,'checked_at':None })
+        resp ={'ok':True ,'session':session_id ,'exists':True ,'active':bool (h .get ('active')),'url':h .get ('url'),'checked_at':h .get ('checked_at')}
+        if h .get ('error'):
+            resp ['error']=h .get ('error')
+        return JSONResponse (resp )
     except Exception as e :
         return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
 @router .get ('/browser/sessions')
@@ -83,27 +64,17 @@ async def api_browser_sessions ():
         from dv_admin_automator .browser .pool import get_default_pool 
         pool =get_default_pool ()
         sessions =[]
-        try :
-            keys =list (getattr (pool ,'_sessions',{}).keys ())
-        except Exception :
-            keys =[]
-        for sid in keys :
-            info ={'session':sid ,'exists':True ,'active':False ,'url':None ,'error':None }
-            try :
-                mgr =pool .get_manager (sid )
-                if not mgr or not getattr (mgr ,'driver',None ):
-                    sessions .append (info );continue 
-                driver =mgr .driver 
-                try :
-                    url =driver .execute_script ('return document.location.href;')
-                    info ['active']=True 
-                    info ['url']=url 
-                except Exception as e :
-                    info ['active']=False 
-                    info ['error']=str (e )
-            except Exception as e :
-                info ['error']=str (e )
-            sessions .append (info )
+        for meta in pool .sessions_info ():
+            h =meta .get ('health')or {}
+            sessions .append ({'session':meta ['id'],'exists':True ,'active':bool (h .get ('active')),'url':h .get ('url'),'error':h .get ('error'),**meta })
         return JSONResponse ({'ok':True ,'sessions':sessions })
+    except Exception as e :
+        return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
+@router .get ('/browser/pool/stats')
+async def api_browser_pool_stats ():
+    try :
+        from dv_admin_automator .browser .pool import get_default_pool 
+        from dv_admin_automator .pages .base_page import wait_stats 
+        return JSONResponse ({'ok':True ,**get_default_pool ().lease_stats (),'waits':wait_stats ()})
     except Exception as e :
         return JSONResponse ({'ok':False ,'error':str (e )},status_code =500 )
\ No newline at end of file
@@ -4,13 +4,23 @@ import io
 import csv 
 import logging 
 import os 
+import re 
 from typing import List ,Dict ,Optional ,Tuple 
 from datetime import datetime ,date 
 import asyncio 
 import uuid 
 import time 
 import tempfile 
+import threading 
 from ..jobs import get_default_manager 
+try :
+    import pandas as pd 
+except Exception :
+    pd =None 
+from dv_admin_automator .backend .report_cache import ReportCache ,SheetSnapshot ,enrichment_epoch ,etag_matches ,get_report_cache 
+from dv_admin_automator .backend .http_admin import http_reader 
+from dv_admin_automator .backend .report_enrichment import EnrichmentEngine ,default_workers 
+from dv_admin_automator .utils .dates import date_parse_stats ,parse_column ,parse_date 
 try :
     from dv_admin_automator .browser .pool import get_default_pool 
 except Exception :
@@ -18,6 +28,7 @@ except Exception :
 _REPORT_JOB_LOGS :Dict [str ,list ]={}
 _REPORT_PUBLIC_TO_INTERNAL :Dict [str ,str ]={}
 _REPORT_RESULTS :Dict [str ,str ]={}
+_REPORT_CACHED_JOBS :Dict [str ,str ]={}
 logger =logging .getLogger (__name__ )
 router =APIRouter ()
 try :
@@ -29,54 +40,8 @@ except Exception :
         return False 
     def get_service_account_info ():
         return None 
-def _parse_date (s :Optional [str ])->Optional [date ]:
-    if not s :
-        return None 
-    s =str (s ).strip ()
-    if not s :
-        return None 
-    try :
-        if '/'in s :
-            parts =s .split ('/')
-            if len (parts )>=3 :
-                d =date (int (parts [2 ]),int (parts [1 ]),int (parts [0 ]))
-                return d 
-    except Exception :
-        pass 
-    try :
-        return datetime .fromisoformat (s ).date ()
-    except Exception :
-        try :
-            return datetime .strptime (s ,'%Y-%m-%d').date ()
-        except Exception :
-            pass 
-    try :
-        s2 =s .replace ('a.m.','AM').replace ('p.m.','PM').replace ('a.m','AM').replace ('p.m','PM')
-        s2 =s2 .replace ('.','')
-        try :
-            from dateutil import parser as _dateutil_parser 
-            dt =_dateutil_parser .parse (s2 ,dayfirst =False ,fuzzy =True )
-            return dt .date ()
-        except Exception :
-            pass 
-        fmts =[
-        '%B %d, %Y, %I:%M %p',
-        '%b %d, %Y, %I:%M %p',
-        '%B %d, %Y',
-        '%b %d, %Y',
-        '%d %B %Y',
-        '%d %b %Y',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%dT%H:%M:%S.%f',
-        ]
-        for f in fmts :
-            try :
-                return datetime .strptime (s2 ,f ).date ()
-            except Exception :
-                continue 
-    except Exception :
-        pass 
-    return None 
+def _parse_date (s :Optional [str ],column :Optional [str ]=None )->Optional [date ]:
+    return parse_date (s ,column )
 def _is_acolhimento_appt (appt :Dict )->bool :
     if not appt or not isinstance (appt ,dict ):
         return False 
@@ -90,13 +55,165 @@ def _is_acolhimento_appt (appt :Dict )->bool :
         if isinstance (v ,str )and needle in v .lower ():
             return True 
     return False 
-def _group_and_aggregate (rows :List [Dict [str ,str ]],company :Optional [str ],dfrom :Optional [date ],dto :Optional [date ])->Tuple [List [Dict ],Dict ]:
+_DATE_KEYS =('schedule','date','consultation_date','data','datetime','started_at','ended_at')
+_EMAIL_RE =re .compile (r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+def _enrich_patient_from_appointments (p :Dict ,appts :List [Dict ]):
+    if not appts :
+        p ['appointment_note']='Sem histórico atrelado'
+        p ['total_consults']=0 
+        p ['completed_consults']=0 
+        p ['pending_consults']=0 
+        return 
+    acolh_appts =[a for a in appts if _is_acolhimento_appt (a )]
+    total =len (acolh_appts )
+    completed =0 
+    today =datetime .utcnow ().date ()
+    for a in acolh_appts :
+        st =(a .get ('status')or '').lower ()
+        if 'realiz'in st :
+            completed +=1 
+        elif a .get ('schedule'):
+            sd =_parse_date (a .get ('schedule'),'schedule')
+            if sd and sd <=today :
+                completed +=1 
+    p ['total_consults']=total 
+    p ['completed_consults']=completed 
+    p ['pending_consults']=max (0 ,total -completed )
+    parsed_dates =[]
+    for a in appts :
+        for k in _DATE_KEYS :
+            if a .get (k ):
+                d =_parse_date (a .get (k ),k )
+                if d :
+                    parsed_dates .append (d )
+                    break 
+    if parsed_dates :
+        parsed_dates .sort ()
+        p ['first_request_date']=parsed_dates [0 ].isoformat ()
+        p ['last_consult_date']=parsed_dates [-1 ].isoformat ()
+    p ['appointment_note']=''
+def _index_appointments (appts :List [Dict ])->Dict [str ,List [Dict ]]:
+    index :Dict [str ,List [Dict ]]={}
+    for a in appts :
+        for e in {e .lower ()for e in _EMAIL_RE .findall (a .get ('patient')or '')}:
+            index .setdefault (e ,[]).append (a )
+    return index 
+def _in_date_range (a :Dict ,dfrom :Optional [date ],dto :Optional [date ])->bool :
+    d =_parse_date (a .get ('schedule'),'schedule')
+    return bool (d )and not (dfrom and d <dfrom )and not (dto and d >dto )
+def _bulk_requested (request :Request )->bool :
+    raw =request .query_params .get ('bulk')
+    if raw is None :
+        raw =os .environ .get ('DV_REPORT_BULK_APPOINTMENTS','')
+    return str (raw ).strip ().lower ()in ('1','true','yes','on')
+def _bulk_enrich_per_patient (per_patient :List [Dict ],manager ,dfrom :Optional [date ],dto :Optional [date ],log =None )->bool :
+    def _log (msg ):
+        logger .info (msg )
+        if log is not None :
+            log (msg )
+    if dfrom is None and dto is None :
+        _log ('bulk appointment scan needs date_from or date_to, falling back to per-patient history')
+        return False 
+    try :
+        from dv_admin_automator .backend .appointments import scan_appointments 
+        started =time .time ()
+        appts =scan_appointments ('',since =dfrom ,until =dto ,manager =manager ,headless =True )
+    except Exception as e :
+        _log (f'bulk appointment scan failed: {e }')
+        return False 
+    appts =[a for a in appts if _in_date_range (a ,dfrom ,dto )]
+    index =_index_appointments (appts )
+    if not index :
+        _log ('bulk appointment scan found no appointments with a patient e-mail, falling back to per-patient history')
+        return False 
+    matched =0 
+    for p in per_patient :
+        email =(p .get ('email')or '').strip ().lower ()
+        if not email :
+            _no_history (p ,'Sem e-mail informado')
+            continue 
+        found =index .get (email ,[])
+        matched +=bool (found )
+        if found :
+            _enrich_patient_from_appointments (p ,found )
+        else :
+            _no_history (p )
+    _log (f'bulk appointment scan: {len (appts )} appointments scheduled {dfrom or "..."} to {dto or "..."}, {matched }/{len (per_patient )} patients matched by e-mail in {time .time ()-started :.1f}s')
+    return True 
+def _no_history (p :Dict ,note :str ='Sem histórico atrelado'):
+    p ['appointment_note']=note 
+    p ['total_consults']=0 
+    p ['completed_consults']=0 
+    p ['pending_consults']=0 
+    p ['first_request_date']=''
+    p ['last_consult_date']=''
+def _browser_enrichment_managers (manager ,workers :int )->Tuple [List ,List [str ]]:
+    managers =[manager ]if manager is not None else []
+    acquired =[]
+    pool =get_default_pool ()if get_default_pool else None 
+    while pool is not None and len (managers )<workers :
+        try :
+            sid =pool .acquire_session (headless =True ,profile ='scrape')
+        except Exception as e :
+            logger .info ('enrichment continues with %s browser sessions: %s',len (managers ),e )
+            break 
+        acquired .append (sid )
+        mgr =pool .get_manager (sid )
+        if mgr is not None :
+            managers .append (mgr )
+    return managers ,acquired 
+def _enrich_per_patient (per_patient :List [Dict ],manager =None ,log =None )->Dict :
+    def _log (msg ):
+        logger .info (msg )
+        if log is not None :
+            log (msg )
+    try :
+        from dv_admin_automator .backend .appointments import get_participant_history 
+    except Exception :
+        get_participant_history =None 
+    todo =[]
+    for p in per_patient :
+        if not (p .get ('email')or '').strip ():
+            _no_history (p ,'Sem e-mail informado')
+        elif get_participant_history is None :
+            _no_history (p )
+        else :
+            todo .append (p )
+    def _fetch (p ,manager ,deadline ):
+        return get_participant_history (p ['email'].strip (),manager =manager ,deadline =deadline )
+    def _apply (p ,history ,error ):
+        name =p .get ('patient_name')or '<no-name>'
+        if error is not None :
+            _log (f'patient {name }: error {error }')
+        if not history or not isinstance (history ,dict )or not history .get ('appointments'):
+            _no_history (p )
+            return 
+        _enrich_patient_from_appointments (p ,history .get ('appointments')or [])
+    step =max (1 ,len (todo )//20 )
+    def _progress (snap ):
+        if snap ['done']%step ==0 or snap ['done']==snap ['total']:
+            _log (f"enrichment progress: {snap ['done']}/{snap ['total']} patients ({snap ['failed']} failed, {snap ['elapsed']}s elapsed, eta {snap ['eta']if snap ['eta']is not None else '-'}s)")
+    browser_only =bool (todo )and http_reader ()is None 
+    managers ,acquired =([manager ]if manager is not None else []),[]
+    if browser_only :
+        managers ,acquired =_browser_enrichment_managers (manager ,min (default_workers (),len (todo )))
+    try :
+        engine =EnrichmentEngine (managers =managers ,browser_only =browser_only )
+        _log (f"enriching {len (todo )} patients with {min (engine .workers ,len (todo ))} workers{f' over {len (managers )} browser sessions'if browser_only else ''}")
+        return engine .run (todo ,_fetch ,_apply ,_progress )
+    finally :
+        for sid in acquired :
+            try :
+                get_default_pool ().release_session (sid )
+            except Exception :
+                logger .warning ('could not release enrichment session %s',sid ,exc_info =True )
+def _group_and_aggregate_rows (rows :List [Dict [str ,str ]],company :Optional [str ],dfrom :Optional [date ],dto :Optional [date ])->Tuple [List [Dict ],Dict ]:
     filtered =[]
     for r in rows :
         try :
             if company and (str (r .get ('company')or '').strip ()!=str (company ).strip ()):
                 continue 
-            rd =_parse_date (r .get ('request_date'))
+            rd =_parse_date (r .get ('request_date'),'request_date')
             if dfrom and (not rd or rd <dfrom ):
                 continue 
             if dto and (not rd or rd >dto ):
@@ -126,13 +243,13 @@ def _group_and_aggregate (rows :List [Dict [str ,str ]],company :Optional [str ]
         first_req =None 
         last_cons =None 
         for it in items :
-            d =_parse_date (it .get ('request_date'))
+            d =_parse_date (it .get ('request_date'),'request_date')
             if d :
                 if first_req is None or d <first_req :
                     first_req =d 
             lc =None 
             try :
-                lc =_parse_date (it .get ('last_conference'))
+                lc =_parse_date (it .get ('last_conference'),'last_conference')
             except Exception :
                 lc =None 
             if lc :
@@ -156,6 +273,92 @@ def _group_and_aggregate (rows :List [Dict [str ,str ]],company :Optional [str ]
             counts ['em_acolhimento_count']+=1 
         if status =='Finalizado':
             counts ['finalizado_count']+=1 
+    return per_patient ,counts 
+_FRAME_BUILDS =set ()
+_FRAME_BUILDS_LOCK =threading .Lock ()
+_FRAME_COLUMNS =('uuid','patient_name','cpf','company','email','funding_duration','funding_type','status','request_date','last_conference')
+def _ordinal (d :Optional [date ])->float :
+    return float (d .toordinal ())if d else float ('nan')
+def _build_sheet_frame (rows :List [Dict [str ,str ]]):
+    df =pd .DataFrame ({col :[r .get (col )for r in rows ]for col in _FRAME_COLUMNS },dtype =object )
+    for col in ('request_date','last_conference'):
+        uniq =pd .unique (df [col ])
+        parsed ={v :_ordinal (d )for v ,d in zip (uniq ,parse_column (uniq ,col ))}
+        df ['__'+col ]=[parsed [v ]for v in df [col ]]
+    text ={col :df [col ].fillna ('').astype (str )for col in ('uuid','patient_name','cpf','company','status','last_conference')}
+    df ['__company']=text ['company'].str .strip ()
+    df ['__status']=text ['status'].str .strip ().str .lower ()
+    df ['__key']=df ['uuid'].where (text ['uuid']!='',text ['patient_name']+'|'+text ['cpf'])
+    df ['__completed']=(df ['__status']=='finalizado')|(text ['last_conference']!='')
+    return df 
+def _warm_sheet_frame (rows :List [Dict [str ,str ]],version :str ):
+    try :
+        _SHEET_SNAPSHOT .put_frame (version ,_build_sheet_frame (rows ))
+    except Exception :
+        logger .warning ('could not build the sheet frame for version %s',version ,exc_info =True )
+    finally :
+        with _FRAME_BUILDS_LOCK :
+            _FRAME_BUILDS .discard (version )
+def _sheet_frame (rows :List [Dict [str ,str ]],version :Optional [str ]):
+    if pd is None or not version or not rows :
+        return None 
+    df =_SHEET_SNAPSHOT .frame (version )
+    if df is not None :
+        return df 
+    with _FRAME_BUILDS_LOCK :
+        if version in _FRAME_BUILDS :
+            return None 
+        _FRAME_BUILDS .add (version )
+    threading .Thread (target =_warm_sheet_frame ,args =(rows ,version ),name ='sheet-frame',daemon =True ).start ()
+    return None 
+def _group_and_aggregate_frame (df ,company :Optional [str ],dfrom :Optional [date ],dto :Optional [date ])->Tuple [List [Dict ],Dict ]:
+    counts ={'total_acolhidos':0 ,'em_acolhimento_count':0 ,'finalizado_count':0 }
+    mask =pd .Series (True ,index =df .index )
+    if company :
+        mask &=df ['__company']==str (company ).strip ()
+    if dfrom :
+        mask &=df ['__request_date']>=dfrom .toordinal ()
+    if dto :
+        mask &=df ['__request_date']<=dto .toordinal ()
+    sub =df [mask ]
+    if sub .empty :
+        return [],counts 
+    keys =pd .unique (sub ['__key'])
+    grouped =sub .groupby ('__key',sort =False )
+    agg =pd .DataFrame ({'total':grouped .size (),'completed':grouped ['__completed'].sum (),'first':grouped ['__request_date'].min (),'last':grouped ['__last_conference'].max ()}).loc [keys ]
+    latest =sub .drop_duplicates ('__key',keep ='last').set_index ('__key').loc [keys ]
+    per_patient =[]
+    for (uuid_ ,name ,company_ ,email ,duration ,ftype ,status ),total ,completed ,first ,last in zip (latest [['uuid','patient_name','company','email','funding_duration','funding_type','status']].itertuples (index =False ,name =None ),agg ['total'].tolist (),agg ['completed'].tolist (),agg ['first'].tolist (),agg ['last'].tolist ()):
+        status =(status or '').strip ()
+        per_patient .append ({
+        'uuid':uuid_ or '',
+        'patient_name':name or '',
+        'company':company_ or '',
+        'email':email or '',
+        'acolhimento_type':(duration or ftype or '').strip (),
+        'status':status ,
+        'total_consults':int (total ),
+        'completed_consults':int (completed ),
+        'pending_consults':int (total )-int (completed ),
+        'first_request_date':date .fromordinal (int (first )).isoformat ()if first ==first else '',
+        'last_consult_date':date .fromordinal (int (last )).isoformat ()if last ==last else '',
+        })
+        if status in ('Em acolhimento','Consulta experimental'):
+            counts ['em_acolhimento_count']+=1 
+        if status =='Finalizado':
+            counts ['finalizado_count']+=1 
+    counts ['total_acolhidos']=len (per_patient )
+    return per_patient ,counts 
+def _group_and_aggregate (rows :List [Dict [str ,str ]],company :Optional [str ],dfrom :Optional [date ],dto :Optional [date ],version :Optional [str ]=None )->Tuple [List [Dict ],Dict ]:
+    per_patient =counts =None 
+    df =_sheet_frame (rows ,version )
+    if df is not None :
+        try :
+            per_patient ,counts =_group_and_aggregate_frame (df ,company ,dfrom ,dto )
+        except Exception :
+            logger .warning ('vectorized aggregation failed, using the row-by-row path',exc_info =True )
+    if per_patient is None :
+        per_patient ,counts =_group_and_aggregate_rows (rows ,company ,dfrom ,dto )
     per_patient .sort (key =lambda x :(x .get ('patient_name')or '').lower ())
     try :
         logger .info ('Grouped %d patients (company=%s) preview: %s',len (per_patient ),company ,[p .get ('patient_name')for p in per_patient [:20 ]])
@@ -292,6 +495,74 @@ def _generate_pdf_bytes (per_patient :List [Dict ],summary :Dict ,title :str )->
     except Exception as e :
         logger .error (f"Falha ao gerar PDF: {e }")
         return None 
+_SHEET_SNAPSHOT =SheetSnapshot (lambda sheet_id :_read_sheet (sheet_id ))
+_REPORT_CACHE_CONTROL ='private, no-cache'
+def _read_sheet_snapshot (refresh :bool =False )->Tuple [List [Dict [str ,str ]],str ]:
+    sheet_id =os .environ .get ('ACOLH_SHEET_ID')
+    if not sheet_id :
+        raise HTTPException (status_code =500 ,detail ='ACOLH_SHEET_ID not configured')
+    rows ,version =_SHEET_SNAPSHOT .get (sheet_id ,refresh )
+    if rows is None :
+        if _attempt_auto_load_credentials ():
+            rows ,version =_SHEET_SNAPSHOT .get (sheet_id ,True )
+    if rows is None :
+        info =get_service_account_info ()
+        if info is None :
+            raise HTTPException (status_code =423 ,detail ='locked: master password required')
+        raise HTTPException (status_code =500 ,detail ='Failed to read Google Sheet')
+    return rows ,version 
+def _enrichment_source (enriched :bool ,browser_session :Optional [str ],headless :bool )->str :
+    if not enriched :
+        return 'none'
+    if browser_session :
+        return 'session'
+    return 'headless'if headless else 'default'
+def _report_cache_key (kind :str ,version :str ,company :Optional [str ],date_from :Optional [date ],date_to :Optional [date ],fmt :str ,bulk :bool ,enrichment :str )->str :
+    epoch =enrichment_epoch ()if enrichment !='none'else None 
+    return ReportCache .make_key (kind =kind ,sheet =version ,company =(company or '').strip (),date_from =date_from .isoformat ()if date_from else None ,date_to =date_to .isoformat ()if date_to else None ,fmt =fmt ,bulk =bool (bulk ),enrichment =enrichment ,epoch =epoch )
+def _store_report (key :Optional [str ],data :bytes ,ext :str ,filename :str ):
+    cache =get_report_cache ()if key else None 
+    if cache is not None :
+        cache .put (key ,data ,'application/pdf'if ext =='pdf'else 'text/csv',filename )
+def _report_response (data :bytes ,ext :str ,filename :str ,key :Optional [str ]=None )->Response :
+    headers ={'Content-Disposition':f'attachment; filename="{filename }"'}
+    if key and get_report_cache ()is not None :
+        _store_report (key ,data ,ext ,filename )
+        headers .update ({'ETag':ReportCache .etag (key ),'Cache-Control':_REPORT_CACHE_CONTROL })
+    return Response (content =data ,media_type ='application/pdf'if ext =='pdf'else 'text/csv',headers =headers )
+def _cached_report_response (request :Request ,key :str )->Optional [Response ]:
+    cache =get_report_cache ()
+    if cache is None :
+        return None 
+    etag =ReportCache .etag (key )
+    if etag_matches (request .headers .get ('if-none-match'),etag )and cache .meta (key )is not None :
+        return Response (status_code =304 ,headers ={'ETag':etag ,'Cache-Control':_REPORT_CACHE_CONTROL })
+    entry =cache .get (key )
+    if entry is None :
+        return None 
+    headers ={'Content-Disposition':f"attachment; filename=\"{entry ['filename']}\"",'ETag':etag ,'Cache-Control':_REPORT_CACHE_CONTROL }
+    return Response (content =entry ['data'],media_type =entry ['media_type'],headers =headers )
+def _cached_report_job (key :str )->Optional [str ]:
+    cache =get_report_cache ()
+    if cache is None or cache .meta (key )is None :
+        return None 
+    public_job_id ='report:cache-'+key [:16 ]
+    _REPORT_CACHED_JOBS [public_job_id ]=key 
+    return public_job_id 
+def _cached_job_response (job_id :str ,key :str ,download :bool ):
+    cache =get_report_cache ()
+    if download :
+        entry =cache .get (key )if cache is not None else None 
+        if entry is None :
+            _REPORT_CACHED_JOBS .pop (job_id ,None )
+            return JSONResponse ({'ok':False ,'ready':False ,'message':'cached report expired, request it again'},status_code =404 )
+        headers ={'Content-Disposition':f"attachment; filename=\"{entry ['filename']}\""}
+        return Response (content =entry ['data'],media_type ='application/octet-stream',headers =headers )
+    meta =cache .meta (key )if cache is not None else None 
+    if meta is None :
+        _REPORT_CACHED_JOBS .pop (job_id ,None )
+        return JSONResponse ({'ok':True ,'job_id':job_id ,'status':'not_found','logs':[],'filename':None })
+    return JSONResponse ({'ok':True ,'job_id':job_id ,'status':'ready','logs':[f"served from report cache ({meta ['filename']})"],'filename':meta ['filename']})
 @router .get ('/api/reports/company')
 async def api_report_company (request :Request ):
     def _append_log (job_id :str ,msg :str ):
@@ -299,20 +570,6 @@ async def api_report_company (request :Request ):
             _REPORT_JOB_LOGS .setdefault (job_id ,[]).append (f"[{time .strftime ('%Y-%m-%d %H:%M:%S')}] {msg }")
         except Exception :
             pass 
-    def _read_rows_or_error ():
-        sheet_id =os .environ .get ('ACOLH_SHEET_ID')
-        if not sheet_id :
-            raise HTTPException (status_code =500 ,detail ='ACOLH_SHEET_ID not configured')
-        rows =_read_sheet (sheet_id )
-        if rows is None :
-            if _attempt_auto_load_credentials ():
-                rows =_read_sheet (sheet_id )
-        if rows is None :
-            info =get_service_account_info ()
-            if info is None :
-                raise HTTPException (status_code =423 ,detail ='locked: master password required')
-            raise HTTPException (status_code =500 ,detail ='Failed to read Google Sheet')
-        return rows 
     def _ensure_browser_session_if_requested (pool ,session_id :Optional [str ]):
         if not session_id or not pool :
             return 
@@ -324,132 +581,10 @@ async def api_report_company (request :Request ):
         except Exception :
             return 
     async def _enrich_per_patient_sync (per_patient :List [Dict ],manager_for_request ):
-        try :
-            from dv_admin_automator .backend .appointments import get_participant_history 
-        except Exception :
-            get_participant_history =None 
-        loop =asyncio .get_running_loop ()
-        for p in per_patient :
-            try :
-                email =(p .get ('email')or '').strip ()
-                name =(p .get ('patient_name')or '').strip ()
-                logger .info ('Enrich sync -> patient=%s email=%s',name or '<no-name>',email or '<no-email>')
-                try :
-                    print (f"[reports] Enrich sync -> patient={name or '<no-name>'} email={email or '<no-email>'}")
-                except Exception :
-                    pass 
-                if not email :
-                    p ['appointment_note']='Sem e-mail informado'
-                    p ['total_consults']=0 
-                    p ['completed_consults']=0 
-                    p ['pending_consults']=0 
-                    p ['first_request_date']=''
-                    p ['last_consult_date']=''
-                    continue 
-                if get_participant_history is None :
-                    p ['appointment_note']='Sem histórico atrelado'
-                    p ['total_consults']=0 
-                    p ['completed_consults']=0 
-                    p ['pending_consults']=0 
-                    p ['first_request_date']=''
-                    p ['last_consult_date']=''
-                    continue 
-                try :
-                    if manager_for_request is not None :
-                        history =await loop .run_in_executor (None ,lambda e =email ,m =manager_for_request :get_participant_history (e ,manager =m ))
-                    else :
-                        history =await loop .run_in_executor (None ,lambda e =email :get_participant_history (e ))
-                except Exception :
-                    logger .exception ('Error fetching history for email %s',email )
-                    p ['appointment_note']='Sem histórico atrelado'
-                    p ['total_consults']=0 
-                    p ['completed_consults']=0 
-                    p ['pending_consults']=0 
-                    continue 
-                if not history or not isinstance (history ,dict )or not history .get ('appointments'):
-                    p ['appointment_note']='Sem histórico atrelado'
-                    p ['total_consults']=0 
-                    p ['completed_consults']=0 
-                    p ['pending_consults']=0 
-                    logger .info ('No history for %s <%s>',name or '<no-name>',email or '<no-email>')
-                    try :
-                        print (f"[reports] No history for {name or '<no-name>'} <{email or '<no-email>'}>")
-                    except Exception :
-                        pass 
-                    continue 
-                appts =history .get ('appointments')or []
-                acolh_appts =[a for a in appts if _is_acolhimento_appt (a )]
-                total =len (acolh_appts )
-                completed =0 
-                now =datetime .utcnow ()
-                for a in acolh_appts :
-                    st =(a .get ('status')or '').lower ()
-                    if 'realiz'in st or 'realizada'in st or 'realizado'in st :
-                        completed +=1 
-                    else :
-                        try :
-                            sd =None 
-                            if a .get ('schedule'):
-                                sd =_parse_date (a .get ('schedule'))
-                            if sd and isinstance (sd ,date )and sd <=now .date ():
-                                completed +=1 
-                        except Exception :
-                            pass 
-                pending =max (0 ,total -completed )
-                p ['total_consults']=total 
-                p ['completed_consults']=completed 
-                p ['pending_consults']=pending 
-                try :
-                    raw_samples =[]
-                    parsed_dates =[]
-                    for a in appts :
-                        for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                            if a .get (k ):
-                                raw_samples .append ((k ,a .get (k )))
-                                break 
-                    raw_samples =raw_samples [:8 ]
-                    for a in appts :
-                        d =None 
-                        for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                            if a .get (k ):
-                                d =_parse_date (a .get (k ))
-                                if d :
-                                    parsed_dates .append (d )
-                                    break 
-                    if parsed_dates :
-                        parsed_dates .sort ()
-                        p ['first_request_date']=parsed_dates [0 ].isoformat ()
-                        p ['last_consult_date']=parsed_dates [-1 ].isoformat ()
-                    try :
-                        logger .info ('Parsed dates for %s (email=%s): raw_samples=%s parsed=%s',name or '<no-name>',email or '<no-email>',[(k ,str (v ))for k ,v in raw_samples ],[d .isoformat ()for d in parsed_dates ])
-                        try :
-                            print (f"[reports] Parsed dates for {name or '<no-name>'} <{email or '<no-email>'}>: raw_samples={[(k ,str (v ))for k ,v in raw_samples ]} parsed={[d .isoformat ()for d in parsed_dates ]}")
-                        except Exception :
-                            pass 
-                    except Exception :
-                        pass 
-                except Exception :
-                    pass 
-                p ['appointment_note']=''
-                try :
-                    logger .info ('Enriched sync -> %s: total=%s completed=%s pending=%s first=%s last=%s',
-                    name or '<no-name>',p .get ('total_consults'),p .get ('completed_consults'),p .get ('pending_consults'),
-                    p .get ('first_request_date')or '-',p .get ('last_consult_date')or '-')
-                    try :
-                        print (f"[reports] Enriched sync -> {name or '<no-name>'}: total={p .get ('total_consults')} completed={p .get ('completed_consults')} pending={p .get ('pending_consults')} first={p .get ('first_request_date')or '-'} last={p .get ('last_consult_date')or '-'}")
-                    except Exception :
-                        pass 
-                except Exception :
-                    pass 
-            except Exception :
-                p ['appointment_note']='Sem histórico atrelado'
-                p ['total_consults']=0 
-                p ['completed_consults']=0 
-                p ['pending_consults']=0 
-                p ['first_request_date']=''
-                p ['last_consult_date']=''
+        await asyncio .get_running_loop ().run_in_executor (None ,lambda :_enrich_per_patient (per_patient ,manager_for_request ))
     def _create_and_submit_async_job (public_job_id :str ,per_patient :List [Dict ],summary :Dict ,company :str ,fmt :str ,
-    req_headless :bool ,req_browser_session :Optional [str ],req_username :Optional [str ],req_password :Optional [str ]):
+    req_headless :bool ,req_browser_session :Optional [str ],req_username :Optional [str ],req_password :Optional [str ],
+    bulk :bool =False ,cache_key :Optional [str ]=None ,date_from :Optional [date ]=None ,date_to :Optional [date ]=None ):
         _REPORT_JOB_LOGS .setdefault (public_job_id ,[]).append ('Report generation requested')
         def _job ():
             pool =get_default_pool ()if get_default_pool else None 
@@ -457,10 +592,6 @@ async def api_report_company (request :Request ):
             manager_for_job =None 
             try :
                 _append_log (public_job_id ,'job started')
-                try :
-                    from dv_admin_automator .backend .appointments import get_participant_history 
-                except Exception :
-                    get_participant_history =None 
                 try :
                     if pool and req_browser_session :
                         mgr =pool .get_manager (req_browser_session )
@@ -468,145 +599,16 @@ async def api_report_company (request :Request ):
                             manager_for_job =mgr 
                             _append_log (public_job_id ,f'using existing browser session {req_browser_session }')
                     if pool and (manager_for_job is None )and req_headless :
-                        created_session =pool .create_session (headless =True )
+                        created_session =pool .acquire_session (headless =True ,username =req_username ,password =req_password ,profile ='scrape')
                         manager_for_job =pool .get_manager (created_session )
-                        _append_log (public_job_id ,f'created browser session {created_session } (headless)')
-                        try :
-                            from dv_admin_automator .ui .web .api import routes_auth as auth_routes 
-                            username =req_username 
-                            password =req_password 
-                            if username and password :
-                                try :
-                                    auth_routes ._SESSION_CREDENTIALS [created_session ]={'username':username ,'password':password ,'headless':True }
-                                except Exception :
-                                    pass 
-                                try :
-                                    auth_routes ._login_job (created_session ,username ,password ,True )
-                                    _append_log (public_job_id ,f'performed login for session {created_session }')
-                                except Exception as e :
-                                    _append_log (public_job_id ,f'login job failed for session {created_session }: {e }')
-                        except Exception :
-                            _append_log (public_job_id ,'login-setup failed for created session')
+                        _append_log (public_job_id ,f'leased browser session {created_session } (headless, authenticated={pool .is_authenticated (created_session )})')
                 except Exception as e :
                     _append_log (public_job_id ,f'failed to create/use browser session: {e }')
                     created_session =None 
-                if get_participant_history is None :
-                    for p in per_patient :
-                        p ['appointment_note']='Sem histórico atrelado'
-                        p ['total_consults']=0 
-                        p ['completed_consults']=0 
-                        p ['pending_consults']=0 
+                if bulk and _bulk_enrich_per_patient (per_patient ,manager_for_job ,date_from ,date_to ,lambda m :_append_log (public_job_id ,m )):
+                    pass 
                 else :
-                    for p in per_patient :
-                        try :
-                            email =(p .get ('email')or '').strip ()
-                            name =(p .get ('patient_name')or '').strip ()
-                            _append_log (public_job_id ,f'enrich async -> patient={name or "<no-name>"} email={email or "<no-email>"}')
-                            logger .info ('Enrich async -> patient=%s email=%s (job=%s)',name or '<no-name>',email or '<no-email>',public_job_id )
-                            try :
-                                print (f"[reports] Enrich async -> patient={name or '<no-name>'} email={email or '<no-email>'} (job={public_job_id })")
-                            except Exception :
-                                pass 
-                            if not email :
-                                p ['appointment_note']='Sem e-mail informado'
-                                p ['total_consults']=0 
-                                p ['completed_consults']=0 
-                                p ['pending_consults']=0 
-                                p ['first_request_date']=''
-                                p ['last_consult_date']=''
-                                continue 
-                            try :
-                                if manager_for_job is not None :
-                                    history =get_participant_history (email ,manager =manager_for_job )
-                                else :
-                                    history =get_participant_history (email )
-                            except Exception :
-                                try :
-                                    history =get_participant_history (email )
-                                except Exception :
-                                    history =None 
-                            if not history or not isinstance (history ,dict )or not history .get ('appointments'):
-                                p ['appointment_note']='Sem histórico atrelado'
-                                p ['total_consults']=0 
-                                p ['completed_consults']=0 
-                                p ['pending_consults']=0 
-                                p ['first_request_date']=''
-                                p ['last_consult_date']=''
-                                _append_log (public_job_id ,f'no history for {name or "<no-name>"} <{email or "<no-email>"}>')
-                                logger .info ('No history for %s <%s> (job=%s)',name or '<no-name>',email or '<no-email>',public_job_id )
-                                try :
-                                    print (f"[reports] No history for {name or '<no-name>'} <{email or '<no-email>'}> (job={public_job_id })")
-                                except Exception :
-                                    pass 
-                                continue 
-                            appts =history .get ('appointments')or []
-                            acolh_appts =[a for a in appts if _is_acolhimento_appt (a )]
-                            total =len (acolh_appts )
-                            completed =0 
-                            now_dt =datetime .utcnow ()
-                            for a in acolh_appts :
-                                st =(a .get ('status')or '').lower ()
-                                if 'realiz'in st or 'realizada'in st or 'realizado'in st :
-                                    completed +=1 
-                                else :
-                                    try :
-                                        sd =None 
-                                        if a .get ('schedule'):
-                                            sd =_parse_date (a .get ('schedule'))
-                                        if sd and isinstance (sd ,date )and sd <=now_dt .date ():
-                                            completed +=1 
-                                    except Exception :
-                                        pass 
-                            pending =max (0 ,total -completed )
-                            p ['total_consults']=total 
-                            p ['completed_consults']=completed 
-                            p ['pending_consults']=pending 
-                            try :
-                                raw_samples =[]
-                                parsed_dates =[]
-                                for a in appts :
-                                    for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                                        if a .get (k ):
-                                            raw_samples .append ((k ,a .get (k )))
-                                            break 
-                                raw_samples =raw_samples [:8 ]
-                                for a in appts :
-                                    for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                                        if a .get (k ):
-                                            d =_parse_date (a .get (k ))
-                                            if d :
-                                                parsed_dates .append (d )
-                                                break 
-                                if parsed_dates :
-                                    parsed_dates .sort ()
-                                    p ['first_request_date']=parsed_dates [0 ].isoformat ()
-                                    p ['last_consult_date']=parsed_dates [-1 ].isoformat ()
-                                try :
-                                    logger .info ('Parsed dates (async job) for %s (email=%s): raw_samples=%s parsed=%s (job=%s)',name or '<no-name>',email or '<no-email>',[(k ,str (v ))for k ,v in raw_samples ],[d .isoformat ()for d in parsed_dates ],public_job_id )
-                                    try :
-                                        print (f"[reports] Parsed dates (async job={public_job_id }) for {name or '<no-name>'} <{email or '<no-email>'}>: raw_samples={[(k ,str (v ))for k ,v in raw_samples ]} parsed={[d .isoformat ()for d in parsed_dates ]}")
-                                    except Exception :
-                                        pass 
-                                except Exception :
-                                    pass 
-                            except Exception :
-                                pass 
-                            p ['appointment_note']=''
-                            try :
-                                _append_log (public_job_id ,f'enriched {name or "<no-name>"}: total={p .get ("total_consults")} completed={p .get ("completed_consults")} first={p .get ("first_request_date")or "-"} last={p .get ("last_consult_date")or "-"}')
-                                logger .info ('Enriched async -> %s: total=%s completed=%s first=%s last=%s (job=%s)',
-                                name or '<no-name>',p .get ('total_consults'),p .get ('completed_consults'),p .get ('first_request_date')or '-',p .get ('last_consult_date')or '-',public_job_id )
-                                try :
-                                    print (f"[reports] Enriched async -> {name or '<no-name>'}: total={p .get ('total_consults')} completed={p .get ('completed_consults')} first={p .get ('first_request_date')or '-'} last={p .get ('last_consult_date')or '-'} (job={public_job_id })")
-                                except Exception :
-                                    pass 
-                            except Exception :
-                                pass 
-                        except Exception :
-                            p ['appointment_note']='Sem histórico atrelado'
-                            p ['total_consults']=0 
-                            p ['completed_consults']=0 
-                            p ['pending_consults']=0 
+                    _enrich_per_patient (per_patient ,manager_for_job ,lambda m :_append_log (public_job_id ,m ))
                 if fmt =='csv':
                     data =_generate_csv_bytes (per_patient )
                     ext ='csv'
@@ -625,6 +627,7 @@ async def api_report_company (request :Request ):
                     fh .write (data )
                 _REPORT_RESULTS [public_job_id ]=fname 
                 _append_log (public_job_id ,f'written {path }')
+                _store_report (cache_key ,data ,ext ,f"Relatorio_{company .strip ().replace (' ','_')}.{ext }")
                 return True 
             except Exception as e :
                 _append_log (public_job_id ,f'job exception: {e }')
@@ -632,8 +635,8 @@ async def api_report_company (request :Request ):
             finally :
                 try :
                     if pool and created_session :
-                        pool .close_session (created_session )
-                        _append_log (public_job_id ,f'closed browser session {created_session }')
+                        pool .release_session (created_session )
+                        _append_log (public_job_id ,f'released browser session {created_session }')
                 except Exception :
                     pass 
         internal =get_default_manager ().submit (_job )
@@ -647,11 +650,23 @@ async def api_report_company (request :Request ):
         date_to =_parse_date (request .query_params .get ('date_to'))
         if not company :
             raise HTTPException (status_code =400 ,detail ='company parameter required')
-        rows =_read_rows_or_error ()
-        per_patient ,summary =_group_and_aggregate (rows ,company ,date_from ,date_to )
+        refresh =(request .query_params .get ('refresh')or '').lower ()in ('1','true','yes')
+        rows ,sheet_version =_read_sheet_snapshot (refresh )
+        bulk =_bulk_requested (request )
         async_pref =(request .query_params .get ('async')or '').lower ()in ('1','true','yes')
         req_headless =(request .query_params .get ('headless')or '').lower ()in ('1','true','yes')
         req_browser_session =request .query_params .get ('browser_session_id')
+        cache_key =_report_cache_key ('company',sheet_version ,company ,date_from ,date_to ,fmt ,bulk ,_enrichment_source (True ,req_browser_session ,async_pref and req_headless ))
+        if not refresh :
+            if async_pref :
+                cached_job =_cached_report_job (cache_key )
+                if cached_job :
+                    return JSONResponse ({'ok':True ,'job_id':cached_job ,'cached':True })
+            else :
+                cached =_cached_report_response (request ,cache_key )
+                if cached is not None :
+                    return cached 
+        per_patient ,summary =_group_and_aggregate (rows ,company ,date_from ,date_to ,sheet_version )
         pool =get_default_pool ()if get_default_pool else None 
         if req_browser_session and pool :
             try :
@@ -666,14 +681,11 @@ async def api_report_company (request :Request ):
             req_username =None ;req_password =None 
         if not async_pref and len (per_patient )>200 :
             async_pref =True 
+            cache_key =_report_cache_key ('company',sheet_version ,company ,date_from ,date_to ,fmt ,bulk ,_enrichment_source (True ,req_browser_session ,req_headless ))
         if async_pref :
             public_job_id ='report:'+uuid .uuid4 ().hex [:10 ]
-            internal =_create_and_submit_async_job (public_job_id ,per_patient ,summary ,company ,fmt ,req_headless ,req_browser_session ,req_username ,req_password )
+            internal =_create_and_submit_async_job (public_job_id ,per_patient ,summary ,company ,fmt ,req_headless ,req_browser_session ,req_username ,req_password ,bulk ,cache_key ,date_from ,date_to )
             return JSONResponse ({'ok':True ,'job_id':public_job_id })
-        try :
-            from dv_admin_automator .backend .appointments import get_participant_history 
-        except Exception :
-            get_participant_history =None 
         manager_for_request =None 
         try :
             if pool and req_browser_session :
@@ -682,7 +694,8 @@ async def api_report_company (request :Request ):
                     manager_for_request =mgr 
         except Exception :
             manager_for_request =None 
-        await _enrich_per_patient_sync (per_patient ,manager_for_request )
+        if not (bulk and await asyncio .get_running_loop ().run_in_executor (None ,lambda :_bulk_enrich_per_patient (per_patient ,manager_for_request ,date_from ,date_to ))):
+            await _enrich_per_patient_sync (per_patient ,manager_for_request )
         try :
             logger .debug ('Per-patient dates after enrichment (company=%s): %s',company ,[(p .get ('patient_name'),p .get ('first_request_date'),p .get ('last_consult_date'))for p in per_patient ])
         except Exception :
@@ -690,14 +703,12 @@ async def api_report_company (request :Request ):
         filename_base =f"Relatorio_{company .strip ().replace (' ','_')}"
         if fmt =='csv':
             data =_generate_csv_bytes (per_patient )
-            headers ={'Content-Disposition':f'attachment; filename="{filename_base }.csv"'}
-            return Response (content =data ,media_type ='text/csv',headers =headers )
+            return _report_response (data ,'csv',f'{filename_base }.csv',cache_key )
         elif fmt =='pdf':
             pdf =_generate_pdf_bytes (per_patient ,summary ,f'Relatório - {company }')
             if pdf is None :
                 raise HTTPException (status_code =501 ,detail ='PDF generation not available (reportlab missing)')
-            headers ={'Content-Disposition':f'attachment; filename="{filename_base }.pdf"'}
-            return Response (content =pdf ,media_type ='application/pdf',headers =headers )
+            return _report_response (pdf ,'pdf',f'{filename_base }.pdf',cache_key )
         else :
             raise HTTPException (status_code =400 ,detail ='Unsupported format')
     except HTTPException :
@@ -711,22 +722,23 @@ async def api_report_general (request :Request ):
         fmt =(request .query_params .get ('format')or 'csv').lower ()
         date_from =_parse_date (request .query_params .get ('date_from'))
         date_to =_parse_date (request .query_params .get ('date_to'))
-        sheet_id =os .environ .get ('ACOLH_SHEET_ID')
-        if not sheet_id :
-            raise HTTPException (status_code =500 ,detail ='ACOLH_SHEET_ID not configured')
-        rows =_read_sheet (sheet_id )
-        if rows is None :
-            if _attempt_auto_load_credentials ():
-                rows =_read_sheet (sheet_id )
-        if rows is None :
-            info =get_service_account_info ()
-            if info is None :
-                raise HTTPException (status_code =423 ,detail ='locked: master password required')
-            raise HTTPException (status_code =500 ,detail ='Failed to read Google Sheet')
-        per_patient ,summary =_group_and_aggregate (rows ,None ,date_from ,date_to )
+        refresh =(request .query_params .get ('refresh')or '').lower ()in ('1','true','yes')
+        rows ,sheet_version =_read_sheet_snapshot (refresh )
+        bulk =_bulk_requested (request )
         async_pref =(request .query_params .get ('async')or '').lower ()in ('1','true','yes')
         req_headless =(request .query_params .get ('headless')or '').lower ()in ('1','true','yes')
         req_browser_session =request .query_params .get ('browser_session_id')
+        cache_key =_report_cache_key ('general',sheet_version ,None ,date_from ,date_to ,fmt ,bulk ,_enrichment_source (async_pref ,req_browser_session ,async_pref and req_headless ))
+        if not refresh :
+            if async_pref :
+                cached_job =_cached_report_job (cache_key )
+                if cached_job :
+                    return JSONResponse ({'ok':True ,'job_id':cached_job ,'cached':True })
+            else :
+                cached =_cached_report_response (request ,cache_key )
+                if cached is not None :
+                    return cached 
+        per_patient ,summary =_group_and_aggregate (rows ,None ,date_from ,date_to ,sheet_version )
         pool =get_default_pool ()if get_default_pool else None 
         if req_browser_session and pool :
             try :
@@ -741,6 +753,7 @@ async def api_report_general (request :Request ):
             req_username =None ;req_password =None 
         if not async_pref and len (per_patient )>200 :
             async_pref =True 
+            cache_key =_report_cache_key ('general',sheet_version ,None ,date_from ,date_to ,fmt ,bulk ,_enrichment_source (True ,req_browser_session ,req_headless ))
         def _append_log (job_id :str ,msg :str ):
             try :
                 _REPORT_JOB_LOGS .setdefault (job_id ,[]).append (f"[{time .strftime ('%Y-%m-%d %H:%M:%S')}] {msg }")
@@ -755,10 +768,6 @@ async def api_report_general (request :Request ):
                 manager_for_job =None 
                 try :
                     _append_log (public_job_id ,'job started')
-                    try :
-                        from dv_admin_automator .backend .appointments import get_participant_history 
-                    except Exception :
-                        get_participant_history =None 
                     try :
                         if pool and req_browser_session :
                             mgr =pool .get_manager (req_browser_session )
@@ -767,153 +776,17 @@ async def api_report_general (request :Request ):
                                 _append_log (public_job_id ,f'using existing browser session {req_browser_session }')
                         if pool and (manager_for_job is None )and req_headless :
                             try :
-                                created_session =pool .create_session (headless =True )
+                                created_session =pool .acquire_session (headless =True ,username =req_username ,password =req_password ,profile ='scrape')
                                 manager_for_job =pool .get_manager (created_session )
-                                _append_log (public_job_id ,f'created browser session {created_session } (headless)')
-                                try :
-                                    from dv_admin_automator .ui .web .api import routes_auth as auth_routes 
-                                    username =req_username 
-                                    password =req_password 
-                                    if username and password :
-                                        try :
-                                            try :
-                                                auth_routes ._SESSION_CREDENTIALS [created_session ]={'username':username ,'password':password ,'headless':True }
-                                            except Exception :
-                                                pass 
-                                            try :
-                                                auth_routes ._login_job (created_session ,username ,password ,True )
-                                                _append_log (public_job_id ,f'performed login for session {created_session }')
-                                            except Exception as e :
-                                                _append_log (public_job_id ,f'login job failed for session {created_session }: {e }')
-                                        except Exception :
-                                            pass 
-                                except Exception :
-                                    pass 
+                                _append_log (public_job_id ,f'leased browser session {created_session } (headless, authenticated={pool .is_authenticated (created_session )})')
                             except Exception as e :
-                                _append_log (public_job_id ,f'failed to create browser session: {e }')
+                                _append_log (public_job_id ,f'failed to lease browser session: {e }')
                                 created_session =None 
                     except Exception :
                         pass 
-                    for p in per_patient :
-                        try :
-                            email =(p .get ('email')or '').strip ()
-                            name =(p .get ('patient_name')or '').strip ()
-                            _append_log (public_job_id ,f'enrich async (general) -> patient={name or "<no-name>"} email={email or "<no-email>"}')
-                            logger .info ('Enrich async (general) -> patient=%s email=%s (job=%s)',name or '<no-name>',email or '<no-email>',public_job_id )
-                            try :
-                                print (f"[reports] Enrich async (general) -> patient={name or '<no-name>'} email={email or '<no-email>'} (job={public_job_id })")
-                            except Exception :
-                                pass 
-                            if not email :
-                                p ['appointment_note']='Sem e-mail informado'
-                                p ['total_consults']=0 
-                                p ['completed_consults']=0 
-                                p ['pending_consults']=0 
-                                p ['first_request_date']=''
-                                p ['last_consult_date']=''
-                                continue 
-                            if get_participant_history is None :
-                                p ['appointment_note']='Sem histórico atrelado'
-                                p ['total_consults']=0 
-                                p ['completed_consults']=0 
-                                p ['pending_consults']=0 
-                                p ['first_request_date']=''
-                                p ['last_consult_date']=''
-                                continue 
-                            history =None 
-                            try :
-                                if manager_for_job is not None :
-                                    history =get_participant_history (email ,manager =manager_for_job )
-                                else :
-                                    history =get_participant_history (email )
-                            except Exception :
-                                try :
-                                    history =get_participant_history (email )
-                                except Exception :
-                                    history =None 
-                            if not history or not isinstance (history ,dict )or not history .get ('appointments'):
-                                p ['appointment_note']='Sem histórico atrelado'
-                                p ['total_consults']=0 
-                                p ['completed_consults']=0 
-                                p ['pending_consults']=0 
-                                _append_log (public_job_id ,f'no history for {name or "<no-name>"} <{email or "<no-email>"}>')
-                                logger .info ('No history for %s <%s> (general job=%s)',name or '<no-name>',email or '<no-email>',public_job_id )
-                                try :
-                                    print (f"[reports] No history for {name or '<no-name>'} <{email or '<no-email>'}> (general job={public_job_id })")
-                                except Exception :
-                                    pass 
-                                continue 
-                            appts =history .get ('appointments')or []
-                            acolh_appts =[a for a in appts if _is_acolhimento_appt (a )]
-                            total =len (acolh_appts )
-                            completed =0 
-                            now_dt =datetime .utcnow ()
-                            for a in acolh_appts :
-                                st =(a .get ('status')or '').lower ()
-                                if 'realiz'in st or 'realizada'in st or 'realizado'in st :
-                                    completed +=1 
-                                else :
-                                    try :
-                                        sd =None 
-                                        if a .get ('schedule'):
-                                            sd =_parse_date (a .get ('schedule'))
-                                        if sd and isinstance (sd ,date )and sd <=now_dt .date ():
-                                            completed +=1 
-                                    except Exception :
-                                        pass 
-                            pending =max (0 ,total -completed )
-                            p ['total_consults']=total 
-                            p ['completed_consults']=completed 
-                            p ['pending_consults']=pending 
-                            try :
-                                raw_samples =[]
-                                parsed_dates =[]
-                                for a in appts :
-                                    for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                                        if a .get (k ):
-                                            raw_samples .append ((k ,a .get (k )))
-                                            break 
-                                raw_samples =raw_samples [:8 ]
-                                for a in appts :
-                                    for k in ('schedule','date','consultation_date','data','datetime','started_at','ended_at'):
-                                        if a .get (k ):
-                                            d =_parse_date (a .get (k ))
-                                            if d :
-                                                parsed_dates .append (d )
-                                                break 
-                                if parsed_dates :
-                                    parsed_dates .sort ()
-                                    p ['first_request_date']=parsed_dates [0 ].isoformat ()
-                                    p ['last_consult_date']=parsed_dates [-1 ].isoformat ()
-                                try :
-                                    logger .info ('Parsed dates (general async) for %s (email=%s): raw_samples=%s parsed=%s (job=%s)',name or '<no-name>',email or '<no-email>',[(k ,str (v ))for k ,v in raw_samples ],[d .isoformat ()for d in parsed_dates ],public_job_id )
-                                    try :
-                                        print (f"[reports] Parsed dates (general job={public_job_id }) for {name or '<no-name>'} <{email or '<no-email>'}>: raw_samples={[(k ,str (v ))for k ,v in raw_samples ]} parsed={[d .isoformat ()for d in parsed_dates ]}")
-                                    except Exception :
-                                        pass 
-                                except Exception :
-                                    pass 
-                            except Exception :
-                                pass 
-                            p ['appointment_note']=''
-                            try :
-                                _append_log (public_job_id ,f'enriched {name or "<no-name>"}: total={p .get ("total_consults")} completed={p .get ("completed_consults")} first={p .get ("first_request_date")or "-"} last={p .get ("last_consult_date")or "-"}')
-                                logger .info ('Enriched async (general) -> %s: total=%s completed=%s first=%s last=%s (job=%s)',
-                                name or '<no-name>',p .get ('total_consults'),p .get ('completed_consults'),p .get ('first_request_date')or '-',p .get ('last_consult_date')or '-',public_job_id )
-                                try :
-                                    print (f"[reports] Enriched async (general) -> {name or '<no-name>'}: total={p .get ('total_consults')} completed={p .get ('completed_consults')} first={p .get ('first_request_date')or '-'} last={p .get ('last_consult_date')or '-'} (general job={public_job_id })")
-                                except Exception :
-                                    pass 
-                            except Exception :
-                                pass 
-                        except Exception as e :
-                            _append_log (public_job_id ,f'patient {p .get ("patient_name")}: error {e }')
-                            p ['appointment_note']='Sem histórico atrelado'
-                            p ['total_consults']=0 
-                            p ['completed_consults']=0 
-                            p ['pending_consults']=0 
-                            p ['first_request_date']=''
-                            p ['last_consult_date']=''
+                    bulk_done =bulk and _bulk_enrich_per_patient (per_patient ,manager_for_job ,date_from ,date_to ,lambda m :_append_log (public_job_id ,m ))
+                    if not bulk_done :
+                        _enrich_per_patient (per_patient ,manager_for_job ,lambda m :_append_log (public_job_id ,m ))
                     try :
                         _append_log (public_job_id ,'enriched_patients_preview: '+', '.join ([f"{p .get ('patient_name')}: {p .get ('first_request_date')or '-'} -> {p .get ('last_consult_date')or '-'}"for p in per_patient [:20 ]]))
                     except Exception :
@@ -936,6 +809,7 @@ async def api_report_general (request :Request ):
                         fh .write (data )
                     _REPORT_RESULTS [public_job_id ]=fname 
                     _append_log (public_job_id ,f'written {path }')
+                    _store_report (cache_key ,data ,ext ,f'Relatorio_Geral.{ext }')
                     return True 
                 except Exception as e :
                     _append_log (public_job_id ,f'job exception: {e }')
@@ -943,8 +817,8 @@ async def api_report_general (request :Request ):
                 finally :
                     try :
                         if pool and created_session :
-                            pool .close_session (created_session )
-                            _append_log (public_job_id ,f'closed browser session {created_session }')
+                            pool .release_session (created_session )
+                            _append_log (public_job_id ,f'released browser session {created_session }')
                     except Exception :
                         pass 
             internal =get_default_manager ().submit (_job )
@@ -954,14 +828,12 @@ async def api_report_general (request :Request ):
         filename_base =f"Relatorio_Geral"
         if fmt =='csv':
             data =_generate_csv_bytes (per_patient )
-            headers ={'Content-Disposition':f'attachment; filename="{filename_base }.csv"'}
-            return Response (content =data ,media_type ='text/csv',headers =headers )
+            return _report_response (data ,'csv',f'{filename_base }.csv',cache_key )
         elif fmt =='pdf':
             pdf =_generate_general_pdf_bytes (per_patient ,summary )
             if pdf is None :
                 raise HTTPException (status_code =501 ,detail ='PDF generation not available (reportlab missing)')
-            headers ={'Content-Disposition':f'attachment; filename="{filename_base }.pdf"'}
-            return Response (content =pdf ,media_type ='application/pdf',headers =headers )
+            return _report_response (pdf ,'pdf',f'{filename_base }.pdf',cache_key )
         else :
             raise HTTPException (status_code =400 ,detail ='Unsupported format')
     except HTTPException :
@@ -969,10 +841,27 @@ async def api_report_general (request :Request ):
     except Exception as e :
         logger .exception ('api_report_general error')
         raise HTTPException (status_code =500 ,detail =str (e ))
+@router .get ('/api/reports/cache')
+async def api_report_cache_stats ():
+    cache =get_report_cache ()
+    return JSONResponse ({'ok':True ,'enabled':cache is not None ,'stats':cache .stats ()if cache is not None else None })
+@router .delete ('/api/reports/cache')
+async def api_report_cache_clear ():
+    cache =get_report_cache ()
+    if cache is not None :
+        cache .invalidate ()
+    _SHEET_SNAPSHOT .invalidate ()
+    return JSONResponse ({'ok':True })
+@router .get ('/api/reports/dates/stats')
+async def api_report_date_stats ():
+    return JSONResponse ({'ok':True ,'columns':date_parse_stats ()})
 @router .get ('/api/reports/job/{job_id}')
 async def api_report_job (request :Request ,job_id :str ):
     try :
         download =(request .query_params .get ('download')or '').lower ()in ('1','true','yes')
+        cache_key =_REPORT_CACHED_JOBS .get (job_id )
+        if cache_key is not None :
+            return _cached_job_response (job_id ,cache_key ,download )
         logs =_REPORT_JOB_LOGS .get (job_id ,[])
         internal =_REPORT_PUBLIC_TO_INTERNAL .get (job_id )
         result_fname =_REPORT_RESULTS .get (job_id )
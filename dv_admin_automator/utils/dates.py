@@ -0,0 +1,160 @@
+import os 
+import re 
+import threading 
+from collections import OrderedDict 
+from datetime import date ,datetime 
+from typing import Any ,Callable ,Dict ,Iterable ,List ,Optional ,Tuple 
+_SLOW_FORMATS =(
+'%B %d, %Y, %I:%M %p',
+'%b %d, %Y, %I:%M %p',
+'%B %d, %Y',
+'%b %d, %Y',
+'%d %B %Y',
+'%d %b %Y',
+'%Y-%m-%dT%H:%M:%S',
+'%Y-%m-%dT%H:%M:%S.%f',
+)
+_MERIDIEM =(('a.m.','AM'),('p.m.','PM'),('a.m','AM'),('p.m','PM'))
+try :
+    from dateutil import parser as _dateutil_parser 
+except Exception :
+    _dateutil_parser =None 
+def parse_date_uncached (s :Any )->Optional [date ]:
+    if not s :
+        return None 
+    s =str (s ).strip ()
+    if not s :
+        return None 
+    try :
+        if '/'in s :
+            parts =s .split ('/')
+            if len (parts )>=3 :
+                return date (int (parts [2 ]),int (parts [1 ]),int (parts [0 ]))
+    except Exception :
+        pass 
+    try :
+        return datetime .fromisoformat (s ).date ()
+    except Exception :
+        try :
+            return datetime .strptime (s ,'%Y-%m-%d').date ()
+        except Exception :
+            pass 
+    s2 =s 
+    for old ,new in _MERIDIEM :
+        s2 =s2 .replace (old ,new )
+    s2 =s2 .replace ('.','')
+    if _dateutil_parser is not None :
+        try :
+            return _dateutil_parser .parse (s2 ,dayfirst =False ,fuzzy =True ).date ()
+        except Exception :
+            pass 
+    for f in _SLOW_FORMATS :
+        try :
+            return datetime .strptime (s2 ,f ).date ()
+        except Exception :
+            continue 
+    return None 
+def _dmy (m )->date :
+    return date (int (m .group (3 )),int (m .group (2 )),int (m .group (1 )))
+def _ymd (m )->date :
+    return date (int (m .group (1 )),int (m .group (2 )),int (m .group (3 )))
+def _iso (m )->date :
+    return datetime .fromisoformat (m .string ).date ()
+FORMATS :Dict [str ,Tuple ['re.Pattern',Callable ]]={
+'dd/mm/yyyy':(re .compile (r'(\d{1,2})/(\d{1,2})/(\d{1,4})'),_dmy ),
+'yyyy-mm-dd':(re .compile (r'(\d{4})-(\d{2})-(\d{2})'),_ymd ),
+'iso-datetime':(re .compile (r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?'),_iso ),
+}
+def infer_format (values :Iterable [Any ],sample :int =50 )->Optional [str ]:
+    hits :Dict [str ,int ]={}
+    seen =0 
+    for v in values :
+        s =str (v ).strip ()if v else ''
+        if not s :
+            continue 
+        for name ,(pattern ,_ )in FORMATS .items ():
+            if pattern .fullmatch (s ):
+                hits [name ]=hits .get (name ,0 )+1 
+                break 
+        seen +=1 
+        if seen >=sample :
+            break 
+    if not hits :
+        return None 
+    name ,n =max (hits .items (),key =lambda kv :kv [1 ])
+    return name if n *2 >=seen else None 
+class DateParser :
+    def __init__ (self ,name :str ='',maxsize :Optional [int ]=None ,fmt :Optional [str ]=None ):
+        self .name =name 
+        self .maxsize =int (os .environ .get ('DV_DATE_CACHE_SIZE','8192'))if maxsize is None else int (maxsize )
+        self .fmt =fmt 
+        self ._cache :'OrderedDict[Any, Optional[date]]'=OrderedDict ()
+        self ._lock =threading .Lock ()
+        self ._counters ={'calls':0 ,'hits':0 ,'fast':0 ,'slow':0 ,'failed':0 ,'empty':0 }
+    def infer (self ,values :Iterable [Any ],sample :int =50 )->Optional [str ]:
+        fmt =infer_format (values ,sample )
+        if fmt is not None :
+            self .fmt =fmt 
+        return self .fmt 
+    def _compute (self ,raw :Any )->Tuple [Optional [date ],str ]:
+        if self .fmt is not None :
+            s =str (raw ).strip ()
+            pattern ,build =FORMATS [self .fmt ]
+            m =pattern .fullmatch (s )
+            if m is not None :
+                try :
+                    return build (m ),'fast'
+                except ValueError :
+                    pass 
+        return parse_date_uncached (raw ),'slow'
+    def parse (self ,raw :Any )->Optional [date ]:
+        if not raw or (isinstance (raw ,str )and not raw .strip ()):
+            with self ._lock :
+                self ._counters ['calls']+=1 
+                self ._counters ['empty']+=1 
+            return None 
+        key =raw if isinstance (raw ,str )else str (raw )
+        with self ._lock :
+            self ._counters ['calls']+=1 
+            if key in self ._cache :
+                self ._counters ['hits']+=1 
+                self ._cache .move_to_end (key )
+                return self ._cache [key ]
+        value ,path =self ._compute (raw )
+        with self ._lock :
+            self ._counters [path ]+=1 
+            if value is None :
+                self ._counters ['failed']+=1 
+            self ._cache [key ]=value 
+            if len (self ._cache )>self .maxsize :
+                self ._cache .popitem (last =False )
+        return value 
+    def parse_many (self ,values :Iterable [Any ])->List [Optional [date ]]:
+        values =list (values )
+        if self .fmt is None :
+            self .infer (values )
+        return [self .parse (v )for v in values ]
+    def stats (self )->Dict [str ,Any ]:
+        with self ._lock :
+            c =dict (self ._counters )
+            size =len (self ._cache )
+        computed =c ['fast']+c ['slow']
+        lookups =c ['calls']-c ['empty']
+        return {'column':self .name ,'format':self .fmt ,'cached':size ,'maxsize':self .maxsize ,**c ,'hit_rate':round (c ['hits']/lookups ,3 )if lookups else None ,'failure_rate':round (c ['failed']/computed ,3 )if computed else None }
+_parsers :Dict [str ,DateParser ]={}
+_parsers_lock =threading .Lock ()
+def column_parser (column :Optional [str ]=None )->DateParser :
+    name =column or ''
+    with _parsers_lock :
+        parser =_parsers .get (name )
+        if parser is None :
+            parser =_parsers [name ]=DateParser (name )
+        return parser 
+def parse_date (raw :Any ,column :Optional [str ]=None )->Optional [date ]:
+    return column_parser (column ).parse (raw )
+def parse_column (values :Iterable [Any ],column :Optional [str ]=None )->List [Optional [date ]]:
+    return column_parser (column ).parse_many (values )
+def date_parse_stats ()->List [Dict [str ,Any ]]:
+    with _parsers_lock :
+        parsers =list (_parsers .values ())
+    return [p .stats ()for p in parsers ]
\ No newline at end of file
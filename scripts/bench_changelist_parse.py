@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Per-page cost of reading a Django admin changelist.
+
+Offline (default): builds a synthetic 100-row appointment changelist and times
+backend.changelist.parse_changelist on it.
+
+Live (--url): opens a Chrome, logs in with DV_USER/DV_PASS and times the old
+per-cell WebDriver approach (find_elements + .text) against one page_source
+fetch + parse_changelist and against the single execute_script call of
+extract_changelist on the same page, checking all give the same rows.
+
+    python scripts/bench_changelist_parse.py
+    DV_USER=... DV_PASS=... python scripts/bench_changelist_parse.py \
+        --url "https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/?q=someone@example.com"
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so we can import package modules when run from scripts/
+_repo_root = Path(__file__).resolve().parent.parent
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from dv_admin_automator.backend.changelist import cell_texts, extract_changelist, parse_changelist  # noqa: E402
+
+
+def synthetic_page(rows=100):
+    body = []
+    for i in range(rows):
+        body.append(
+            f'<tr class="row{i % 2 + 1}">'
+            f'<td class="action-checkbox"><input type="checkbox" name="_selected_action" value="{i}" class="action-select"></td>'
+            f'<th class="field-patient"><a href="/moodashboard/appointment_app/appointment/{i}/change/">Paciente {i}</a></th>'
+            f'<td class="field-therapist">Terapeuta {i % 7}</td>'
+            f'<td class="field-schedule nowrap">{1 + i % 28:02d} de março de 2025 às 14:00</td>'
+            f'<td class="field-duration">50 minutos</td>'
+            f'<td class="field-status">Confirmada</td>'
+            f'<td class="field-associated_plan">Plano &amp; Empresa {i % 3}</td>'
+            f'<td class="field-device">web</td>'
+            f'<td class="field-id">{100000 + i}</td>'
+            '</tr>'
+        )
+    head = '<html><head><script>var x = "<td>not a cell</td>";</script></head><body><div id="changelist">'
+    return head + '<table id="result_list"><thead><tr><th>x</th></tr></thead><tbody>' + ''.join(body) + '</tbody></table></div></body></html>'
+
+
+def bench_offline(repeat):
+    html = synthetic_page()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = parse_changelist(html)
+        times.append(time.perf_counter() - t0)
+    print(f"synthetic page: {len(html) / 1024:.0f} KiB, {len(rows)} rows, {len(cell_texts(rows[0]))} td cells/row")
+    print(f"parse_changelist: median {statistics.median(times) * 1000:.2f} ms, min {min(times) * 1000:.2f} ms over {repeat} runs")
+
+
+def bench_live(url, repeat, headed):
+    from dv_admin_automator.browser.manager import BrowserManager
+    from dv_admin_automator.browser.service import login_driver
+    bm = BrowserManager(headless=not headed, profile="scrape")
+    bm.start()
+    driver = bm.driver
+    try:
+        if os.environ.get("DV_USER") and os.environ.get("DV_PASS"):
+            login_driver(driver, os.environ["DV_USER"], os.environ["DV_PASS"])
+        driver.get(url)
+        old_t, new_t, js_t = [], [], []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            old_rows = []
+            for row in driver.find_elements("css selector", "#result_list tbody tr"):
+                old_rows.append([c.text.strip() for c in row.find_elements("tag name", "td")])
+            old_t.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            new_rows = [cell_texts(r) for r in parse_changelist(driver.page_source)]
+            new_t.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            js_rows = [cell_texts(r) for r in extract_changelist(driver)]
+            js_t.append(time.perf_counter() - t0)
+        same = old_rows == new_rows == js_rows
+        print(f"{len(new_rows)} rows; outputs identical: {same}")
+        if not same:
+            for a, b in zip(old_rows, new_rows):
+                if a != b:
+                    print("  webdriver:", a)
+                    print("  parser:   ", b)
+                    break
+        old_m, new_m, js_m = statistics.median(old_t), statistics.median(new_t), statistics.median(js_t)
+        print(f"find_elements + .text : median {old_m:.3f} s/page")
+        print(f"page_source + parse   : median {new_m:.3f} s/page ({old_m / new_m if new_m else 0:.1f}x faster)")
+        print(f"execute_script extract: median {js_m:.3f} s/page ({old_m / js_m if js_m else 0:.1f}x faster)")
+    finally:
+        bm.quit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="live changelist URL (needs Chrome)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--headed", action="store_true")
+    args = ap.parse_args()
+    if args.url:
+        bench_live(args.url, max(1, min(args.repeat, 5)), args.headed)
+    else:
+        bench_offline(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Time routes_reports._group_and_aggregate on synthetic acolhimento sheets.
+
+Builds 10k and 100k row sheets shaped like the acolhimentos Google Sheet
+(several rows per patient, mixed date formats, a few companies) and compares
+the row-by-row implementation with the pandas one, checking that both return
+the same per_patient list and counts. The pandas path is timed twice: once
+cold (building the columnar frame and parsing each distinct date once) and
+once warm (frame reused, as for repeated reports on the same sheet version).
+Reports only take the pandas path warm; a cold call uses the row loop while
+the frame is built in the background.
+
+    python scripts/bench_group_aggregate.py
+    python scripts/bench_group_aggregate.py --rows 10000 250000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Ensure repo root is on sys.path so we can import package modules when run from scripts/
+_repo_root = Path(__file__).resolve().parent.parent
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from dv_admin_automator.ui.web.api import routes_reports as rr  # noqa: E402
+
+COMPANIES = ["Acme", "Beta Corp", "Gamma", "Delta Ltda", " Acme "]
+STATUSES = ["Em acolhimento", "Finalizado", "Consulta experimental", "Cancelado", ""]
+
+
+def synthetic_rows(n, seed=7):
+    rnd = random.Random(seed)
+    start = date(2023, 1, 1)
+    rows = []
+    for i in range(n):
+        patient = rnd.randrange(max(1, n // 4))
+        d = start + timedelta(days=rnd.randrange(900))
+        fmt = rnd.random()
+        if fmt < 0.6:
+            request_date = d.strftime("%d/%m/%Y")
+        elif fmt < 0.9:
+            request_date = d.isoformat()
+        else:
+            request_date = ""
+        lc = start + timedelta(days=rnd.randrange(900))
+        rows.append({
+            "uuid": f"u{patient}" if patient % 5 else "",
+            "patient_name": f"Paciente {patient}",
+            "cpf": f"{patient:011d}",
+            "company": COMPANIES[patient % len(COMPANIES)],
+            "email": f"p{patient}@example.com",
+            "funding_duration": rnd.choice(["", "4 sessões", "8 sessões"]),
+            "funding_type": rnd.choice(["Empresa", ""]),
+            "status": rnd.choice(STATUSES),
+            "request_date": request_date,
+            "last_conference": lc.strftime("%d/%m/%Y") if rnd.random() < 0.4 else "",
+        })
+    return rows
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def bench(n):
+    rows = synthetic_rows(n)
+    cases = [(None, None, None), ("Acme", date(2023, 6, 1), date(2024, 6, 1))]
+    for company, dfrom, dto in cases:
+        (py_pp, py_counts), py_t = timed(rr._group_and_aggregate_rows, rows, company, dfrom, dto)
+        py_pp.sort(key=lambda x: (x.get("patient_name") or "").lower())
+        df, build_t = timed(rr._build_sheet_frame, rows)
+        (pd_pp, pd_counts), warm_t = timed(rr._group_and_aggregate_frame, df, company, dfrom, dto)
+        pd_pp.sort(key=lambda x: (x.get("patient_name") or "").lower())
+        cold_t = build_t + warm_t
+        same = py_pp == pd_pp and py_counts == pd_counts
+        label = f"company={company!r} {dfrom}..{dto}" if company else "all rows"
+        print(f"{n:>7} rows, {label}: {len(py_pp)} patients, identical={same}")
+        print(f"          row-by-row {py_t * 1000:8.1f} ms | pandas cold {cold_t * 1000:8.1f} ms | pandas warm {warm_t * 1000:8.1f} ms ({py_t / warm_t if warm_t else 0:.1f}x)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = ap.parse_args()
+    if rr.pd is None:
+        sys.exit("pandas is not installed")
+    for n in args.rows:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main()
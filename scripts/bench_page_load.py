@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare page-load times of the 'full' and 'scrape' BrowserManager profiles.
+
+Starts one Chrome per profile, optionally logs in to moodashboard, then loads
+each URL several times and prints wall time plus the browser's own
+domContentLoaded / load timings.
+
+    python scripts/bench_page_load.py --repeat 5
+    DV_USER=... DV_PASS=... python scripts/bench_page_load.py \
+        --url https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so we can import package modules when run from scripts/
+_repo_root = Path(__file__).resolve().parent.parent
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from dv_admin_automator.browser.manager import BrowserManager  # noqa: E402
+from dv_admin_automator.browser.service import MOODASHBOARD_URL, login_driver  # noqa: E402
+
+NAV_TIMING_JS = (
+    "var t = performance.getEntriesByType('navigation')[0];"
+    "return t ? [t.domContentLoadedEventEnd, t.loadEventEnd, t.transferSize] : [0, 0, 0];"
+)
+
+
+def run_profile(profile, urls, repeat, headless, username, password):
+    bm = BrowserManager(headless=headless, profile=profile)
+    driver = bm.start()
+    rows = []
+    try:
+        if username and password:
+            if not login_driver(driver, username, password):
+                print(f"[{profile}] login failed; measuring unauthenticated pages")
+        for url in urls:
+            # one warm-up load so DNS/TLS setup is not charged to the first sample
+            driver.get(url)
+            walls, dcls, loads, sizes = [], [], [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                driver.get(url)
+                walls.append(time.perf_counter() - t0)
+                dcl, load, size = driver.execute_script(NAV_TIMING_JS)
+                dcls.append((dcl or 0) / 1000.0)
+                loads.append((load or 0) / 1000.0)
+                sizes.append(size or 0)
+            rows.append({
+                "url": url,
+                "wall": statistics.median(walls),
+                "dcl": statistics.median(dcls),
+                "load": statistics.median(loads),
+                "bytes": int(statistics.median(sizes)),
+            })
+    finally:
+        bm.quit()
+    return bm.timings, rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", action="append", help="page to load (repeatable); default: moodashboard home")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--headed", action="store_true", help="show the browser windows")
+    args = ap.parse_args()
+
+    urls = args.url or [MOODASHBOARD_URL]
+    username = os.environ.get("DV_USER")
+    password = os.environ.get("DV_PASS")
+
+    results = {}
+    for profile in ("full", "scrape"):
+        results[profile] = run_profile(profile, urls, args.repeat, not args.headed, username, password)
+
+    for profile, (timings, _) in results.items():
+        startup = ", ".join(f"{k}={v:.2f}s" for k, v in timings.items())
+        print(f"{profile:>6} startup: {startup}")
+    print()
+    print(f"{'url':<70} {'profile':>7} {'wall':>7} {'dcl':>7} {'load':>7} {'bytes':>9}")
+    for i, url in enumerate(urls):
+        for profile in ("full", "scrape"):
+            r = results[profile][1][i]
+            print(f"{url[:70]:<70} {profile:>7} {r['wall']:7.3f} {r['dcl']:7.3f} {r['load']:7.3f} {r['bytes']:9d}")
+        full, scrape = results["full"][1][i]["wall"], results["scrape"][1][i]["wall"]
+        if scrape:
+            print(f"{'':<70} {'speedup':>7} {full / scrape:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
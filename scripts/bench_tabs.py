@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Throughput and memory of tab leases vs. separate Chrome sessions.
+
+Loads the same list of pages with N workers, first as N tabs of one Chrome
+(BrowserManager.tab()), then as N independent BrowserManager instances, and
+prints pages/second plus the peak RSS of the chromedriver process trees.
+
+    python scripts/bench_tabs.py --workers 4 --pages 40
+    DV_USER=... DV_PASS=... python scripts/bench_tabs.py \
+        --url https://webapp.moodar.com.br/moodashboard/appointment_app/appointment/
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so we can import package modules when run from scripts/
+_repo_root = Path(__file__).resolve().parent.parent
+if str(_repo_root) not in sys.path:
+    sys.path.insert(0, str(_repo_root))
+
+from dv_admin_automator.browser.manager import BrowserManager  # noqa: E402
+from dv_admin_automator.browser.pool import _driver_pid, _proc_children, _tree_rss  # noqa: E402
+from dv_admin_automator.browser.service import MOODASHBOARD_URL, login_driver  # noqa: E402
+
+
+class RssSampler(threading.Thread):
+    """Samples the summed RSS of the given managers every 200ms and keeps the peak."""
+
+    def __init__(self, managers):
+        super().__init__(daemon=True)
+        self.managers = managers
+        self.peak = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            children = _proc_children()
+            total = sum(_tree_rss(_driver_pid(m), children) for m in self.managers if _driver_pid(m))
+            self.peak = max(self.peak, total)
+            self._halt.wait(0.2)
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+def _drain(work, fetch):
+    while True:
+        try:
+            url = work.get_nowait()
+        except queue.Empty:
+            return
+        fetch(url)
+
+
+def bench_tabs(urls, workers, args, username, password):
+    bm = BrowserManager(headless=not args.headed, profile=args.profile, max_tabs=workers)
+    bm.start()
+    try:
+        if username and password:
+            login_driver(bm.driver, username, password)
+        work = queue.Queue()
+        for u in urls:
+            work.put(u)
+        sampler = RssSampler([bm])
+        sampler.start()
+
+        def worker():
+            with bm.tab() as t:
+                _drain(work, t.driver.get)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        sampler.stop()
+        return elapsed, sampler.peak
+    finally:
+        bm.quit()
+
+
+def bench_sessions(urls, workers, args, username, password):
+    managers = [BrowserManager(headless=not args.headed, profile=args.profile) for _ in range(workers)]
+    try:
+        for m in managers:
+            m.start()
+            if username and password:
+                login_driver(m.driver, username, password)
+        work = queue.Queue()
+        for u in urls:
+            work.put(u)
+        sampler = RssSampler(managers)
+        sampler.start()
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=_drain, args=(work, m.driver.get)) for m in managers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        sampler.stop()
+        return elapsed, sampler.peak
+    finally:
+        for m in managers:
+            m.quit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", action="append", help="page to load (repeatable); default: moodashboard home")
+    ap.add_argument("--pages", type=int, default=20, help="total page loads per mode")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--profile", choices=("full", "scrape"), default="scrape")
+    ap.add_argument("--headed", action="store_true", help="show the browser windows")
+    args = ap.parse_args()
+
+    base = args.url or [MOODASHBOARD_URL]
+    urls = [base[i % len(base)] for i in range(args.pages)]
+    username = os.environ.get("DV_USER")
+    password = os.environ.get("DV_PASS")
+
+    print(f"{'mode':<10} {'workers':>7} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'peak RSS MB':>12}")
+    for name, fn in (("tabs", bench_tabs), ("sessions", bench_sessions)):
+        elapsed, peak = fn(urls, args.workers, args, username, password)
+        print(f"{name:<10} {args.workers:>7} {len(urls):>6} {elapsed:8.2f} {len(urls) / elapsed:8.2f} {peak / 1048576:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from dv_admin_automator.backend.changelist import parse_changelist, parse_paginator, parse_sort_index, row_fields, row_href, sort_index
+
+CHANGELIST = '''
+<table id="result_list">
+<thead><tr><th class="action-checkbox-column"></th><th class="sortable column-name"><a href="?o=2">Name</a></th><th class="sortable column-updated_at"><a href="?o=3.-1">Updated</a></th></tr></thead>
+<tbody>
+<tr class="row1"><td class="action-checkbox"><input type="checkbox"></td><th class="field-name"><a href="/moodashboard/corporate/company/17/change/">Acme&nbsp;Corp</a></th><td class="field-updated_at">1 May<br>2025</td></tr>
+<tr class="row2"><td class="action-checkbox"><input type="checkbox"></td><th class="field-name"><a href="/moodashboard/corporate/company/18/change/">Beta</a></th><td class="field-updated_at"><script>var x = 1;</script>-</td></tr>
+</tbody>
+</table>
+<table id="other"><tbody><tr><td>ignored</td></tr></tbody></table>
+'''
+
+
+def test_parse_changelist_reads_rows_of_the_result_table_only():
+    rows = parse_changelist(CHANGELIST)
+    assert [r['class'] for r in rows] == ['row1', 'row2']
+    assert [c['tag'] for c in rows[0]['cells']] == ['td', 'th', 'td']
+    assert row_href(rows[0]) == '/moodashboard/corporate/company/17/change/'
+
+
+def test_parse_changelist_cleans_cell_text():
+    rows = parse_changelist(CHANGELIST)
+    fields = row_fields(rows[0])
+    assert fields['name']['text'] == 'Acme Corp'
+    assert fields['updated_at']['text'] == '1 May\n2025'
+    assert row_fields(rows[1])['updated_at']['text'] == '-'
+
+
+def test_parse_changelist_without_table():
+    assert parse_changelist('') == []
+    assert parse_changelist('<table id="other"><tbody><tr><td>x</td></tr></tbody></table>') == []
+
+
+def test_parse_paginator_django_markup():
+    html = '<p class="paginator"><span class="this-page">1</span> <a href="?p=1">2</a> <a href="?p=2">3</a> <a href="?all=" class="showall">Mostrar tudo</a> 1.234 empresas</p>'
+    info = parse_paginator(html)
+    assert info['current'] == 1
+    assert info['pages'] == {2: 1, 3: 2}
+    assert info['p_base'] == 0
+    assert info['show_all'] == '?all='
+    assert info['count'] == 1234
+
+
+def test_parse_paginator_one_based_pages():
+    info = parse_paginator('<nav class="paginator"><a href="?p=2&amp;o=-3">2</a> 250 results</nav>')
+    assert info['pages'] == {2: 2}
+    assert info['p_base'] == 1
+    assert info['count'] == 250
+
+
+def test_parse_paginator_missing():
+    info = parse_paginator('<div>no paginator</div>')
+    assert info == {'count': None, 'current': None, 'pages': {}, 'show_all': None, 'p_base': None}
+
+
+def test_sort_index():
+    assert sort_index('?o=3.-1') == 3
+    assert sort_index('?o=-5') == 5
+    assert sort_index('?q=x') is None
+    assert sort_index(None) is None
+    assert parse_sort_index(CHANGELIST, 'updated_at') == 3
+    assert parse_sort_index(CHANGELIST, 'name') == 2
+    assert parse_sort_index(CHANGELIST, 'id') is None
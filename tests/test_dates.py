@@ -0,0 +1,55 @@
+from datetime import date
+
+from dv_admin_automator.utils.dates import DateParser, infer_format, parse_date_uncached
+
+
+def test_infer_format():
+    assert infer_format(['01/02/2025', '15/03/2024', '']) == 'dd/mm/yyyy'
+    assert infer_format(['2025-02-01', '2024-03-15']) == 'yyyy-mm-dd'
+    assert infer_format(['2025-02-01T10:00:00', '2025-02-01 10:00']) == 'iso-datetime'
+    assert infer_format(['', None]) is None
+    assert infer_format(['foo', 'bar', '01/02/2025']) is None
+
+
+def test_fast_path_matches_the_slow_parser():
+    values = ['01/02/2025', '31/12/2024', '1/3/2023']
+    parser = DateParser(fmt='dd/mm/yyyy')
+    assert [parser.parse(v) for v in values] == [parse_date_uncached(v) for v in values]
+    assert parser.stats()['fast'] == 3
+
+
+def test_values_outside_the_inferred_format_fall_back():
+    parser = DateParser()
+    assert parser.parse_many(['2025-02-01', '2025-02-02', 'May 3, 2025']) == [date(2025, 2, 1), date(2025, 2, 2), date(2025, 5, 3)]
+    stats = parser.stats()
+    assert stats['format'] == 'yyyy-mm-dd'
+    assert (stats['fast'], stats['slow']) == (2, 1)
+
+
+def test_invalid_dates_are_not_fatal():
+    parser = DateParser(fmt='dd/mm/yyyy')
+    assert parser.parse('31/02/2025') is None
+    assert parser.parse('zzz') is None
+    assert parser.stats()['failed'] == 2
+
+
+def test_cache_hits_and_lru_bound():
+    parser = DateParser(maxsize=2, fmt='dd/mm/yyyy')
+    parser.parse('01/01/2025')
+    parser.parse('02/01/2025')
+    parser.parse('01/01/2025')
+    parser.parse('03/01/2025')
+    stats = parser.stats()
+    assert stats['hits'] == 1
+    assert stats['cached'] == 2
+    assert list(parser._cache) == ['01/01/2025', '03/01/2025']
+
+
+def test_empty_values():
+    parser = DateParser()
+    assert parser.parse('') is None
+    assert parser.parse('   ') is None
+    assert parser.parse(None) is None
+    stats = parser.stats()
+    assert stats['empty'] == 3
+    assert stats['hit_rate'] is None
@@ -0,0 +1,25 @@
+from dv_admin_automator.backend.history_store import HistoryStore, appointment_key
+
+
+def test_appointment_key_prefers_the_id():
+    assert appointment_key({'id': 42, 'status': 'Agendada'}) == appointment_key({'id': 42, 'status': 'Realizada'})
+    assert appointment_key({'id': 42}) != appointment_key({'id': 43})
+
+
+def test_appointment_key_ignores_mutable_fields():
+    appt = {'therapist': 'Ana', 'schedule': '01/02/2025 10:00', 'plan': 'Acolhimento', 'status': 'Agendada'}
+    edited = dict(appt, status='Realizada', updated_at='02/02/2025')
+    assert appointment_key(appt) == appointment_key(edited)
+    assert appointment_key(appt) != appointment_key(dict(appt, schedule='08/02/2025 10:00'))
+
+
+def test_put_keeps_the_first_copy_of_an_edited_appointment(tmp_path):
+    store = HistoryStore(path=tmp_path / 'history.sqlite3', ttl=60, full_ttl=60)
+    old = {'therapist': 'Ana', 'schedule': '01/02/2025 10:00', 'plan': 'P', 'status': 'Agendada'}
+    other = {'therapist': 'Bia', 'schedule': '03/02/2025 10:00', 'plan': 'P', 'status': 'Agendada'}
+    store.put('Maria', [old, other])
+    store.put('maria ', [dict(old, status='Realizada'), old, other], full=False)
+    entry = store.get('MARIA')
+    assert [a['status'] for a in entry['appointments']] == ['Realizada', 'Agendada']
+    assert store.is_fresh(entry)
+    assert not store.needs_full(entry)
@@ -0,0 +1,39 @@
+from dv_admin_automator.backend.pagefetch import merge_pages, remaining_pages, total_pages
+
+
+def _row(i):
+    return {'id': i}
+
+
+def test_total_pages_from_count_or_links():
+    assert total_pages({'count': 250, 'pages': {}}, 100) == 3
+    assert total_pages({'count': 0, 'pages': {}}, 100) == 1
+    assert total_pages({'count': None, 'pages': {1: 0, 2: 1, 7: 6}}, 100) == 7
+    assert total_pages({'count': None, 'pages': {}}, 0) == 1
+
+
+def test_remaining_pages_uses_the_paginator_base():
+    assert remaining_pages({'count': 250, 'p_base': 0}, 100) == [1, 2]
+    assert remaining_pages({'count': 250, 'p_base': 1}, 100) == [2, 3]
+    assert remaining_pages({'count': 250, 'p_base': None}, 100, default_base=1) == [2, 3]
+
+
+def test_remaining_pages_is_capped():
+    assert remaining_pages({'count': 10000, 'p_base': 0}, 100, max_pages=3) == [1, 2, 3]
+    assert remaining_pages({'count': 50, 'p_base': 0}, 100) == []
+
+
+def test_merge_pages_keeps_page_order_and_dedups():
+    results = {2: [_row(4), _row(5)], 1: [_row(2), _row(3), _row(2)]}
+    seen = {1}
+    merged, new_per_page = merge_pages(results, [1, 2], lambda r: r, lambda r: r['id'], seen)
+    assert [r['id'] for r in merged] == [2, 3, 4, 5]
+    assert new_per_page == {1: 2, 2: 2}
+    assert seen == {1, 2, 3, 4, 5}
+
+
+def test_merge_pages_skips_unconverted_rows_and_stops_at_a_missing_page():
+    results = {1: [_row(1), _row(None)], 3: [_row(9)]}
+    merged, new_per_page = merge_pages(results, [1, 2, 3], lambda r: r if r['id'] != 1 else None, lambda r: r['id'], set())
+    assert merged == []
+    assert new_per_page == {1: 0}
@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from dv_admin_automator.ui.web.api import routes_reports
+
+pytestmark = pytest.mark.skipif(routes_reports.pd is None, reason='pandas is not installed')
+
+ROWS = [
+    {'uuid': 'u1', 'patient_name': 'Ana', 'company': 'Acme', 'email': 'ana@x', 'funding_type': 'Empresa', 'status': 'Em acolhimento', 'request_date': '05/01/2025', 'last_conference': ''},
+    {'uuid': 'u1', 'patient_name': 'Ana', 'company': 'Acme', 'email': 'ana@x', 'funding_duration': '3 meses', 'status': 'Finalizado', 'request_date': '20/01/2025', 'last_conference': '25/01/2025'},
+    {'uuid': '', 'patient_name': 'Bruno', 'cpf': '111', 'company': ' Acme ', 'status': 'Consulta experimental', 'request_date': '10/02/2025', 'last_conference': '12/02/2025'},
+    {'uuid': '', 'patient_name': 'Bruno', 'cpf': '222', 'company': 'Acme', 'status': 'finalizado', 'request_date': '11/02/2025'},
+    {'uuid': 'u3', 'patient_name': 'Carla', 'company': 'Beta', 'status': 'Em acolhimento', 'request_date': '15/02/2025'},
+    {'uuid': 'u4', 'patient_name': 'Davi', 'company': 'Acme', 'status': 'Em acolhimento', 'request_date': 'sem data'},
+    {'uuid': 'u5', 'patient_name': 'Eva', 'company': 'Acme', 'status': 'Finalizado', 'request_date': '01/03/2025', 'last_conference': '02/03/2025'},
+]
+
+
+@pytest.mark.parametrize('company,dfrom,dto', [
+    (None, None, None),
+    ('Acme', None, None),
+    ('Acme', date(2025, 1, 10), None),
+    (None, date(2025, 2, 1), date(2025, 2, 28)),
+    ('Beta', None, date(2025, 1, 31)),
+])
+def test_frame_path_matches_the_row_path(company, dfrom, dto):
+    df = routes_reports._build_sheet_frame(ROWS)
+    expected = routes_reports._group_and_aggregate_rows(ROWS, company, dfrom, dto)
+    assert routes_reports._group_and_aggregate_frame(df, company, dfrom, dto) == expected
+
+
+def test_row_path_aggregates_per_patient():
+    per_patient, counts = routes_reports._group_and_aggregate_rows(ROWS, 'Acme', date(2025, 1, 1), date(2025, 1, 31))
+    assert counts == {'total_acolhidos': 1, 'em_acolhimento_count': 0, 'finalizado_count': 1}
+    assert per_patient[0]['total_consults'] == 2
+    assert per_patient[0]['completed_consults'] == 1
+    assert per_patient[0]['first_request_date'] == '2025-01-05'
+    assert per_patient[0]['last_consult_date'] == '2025-01-25'
+    assert per_patient[0]['acolhimento_type'] == '3 meses'
@@ -0,0 +1,76 @@
+import json
+import os
+
+from dv_admin_automator.backend.report_cache import ReportCache, etag_matches
+
+
+def _age(cache, key, mtime):
+    for p in cache._files(key):
+        os.utime(p, (mtime, mtime))
+
+
+def test_put_get_and_meta(tmp_path):
+    cache = ReportCache(path=tmp_path, max_bytes=1000, ttl=0)
+    key = ReportCache.make_key(company='Acme', date_from='2025-01-01', fmt='pdf')
+    assert key == ReportCache.make_key(fmt='pdf', date_from='2025-01-01', company='Acme')
+    assert cache.get(key) is None
+    assert cache.put(key, b'%PDF', 'application/pdf', 'report.pdf')
+    entry = cache.get(key)
+    assert entry['data'] == b'%PDF'
+    assert entry['etag'] == '"%s"' % key
+    assert entry['filename'] == 'report.pdf'
+    assert cache.meta(key)['size'] == 4
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_empty_or_oversized_payloads_are_not_stored(tmp_path):
+    cache = ReportCache(path=tmp_path, max_bytes=10, ttl=0)
+    assert not cache.put('a', b'', 'text/csv', 'a.csv')
+    assert not cache.put('b', b'x' * 11, 'text/csv', 'b.csv')
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ReportCache(path=tmp_path, max_bytes=20, ttl=0)
+    cache.put('a', b'a' * 10, 'text/csv', 'a.csv')
+    cache.put('b', b'b' * 10, 'text/csv', 'b.csv')
+    _age(cache, 'a', 1000)
+    _age(cache, 'b', 2000)
+    assert cache.get('a') is not None
+    cache.put('c', b'c' * 10, 'text/csv', 'c.csv')
+    assert cache.meta('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.evictions == 1
+    assert cache.stats()['bytes'] == 20
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ReportCache(path=tmp_path, max_bytes=1000, ttl=60)
+    cache.put('a', b'data', 'text/csv', 'a.csv')
+    meta_path = cache._files('a')[1]
+    meta = json.loads(meta_path.read_text())
+    meta_path.write_text(json.dumps(dict(meta, created=meta['created'] - 61)))
+    assert cache.get('a') is None
+    assert not any(p.exists() for p in cache._files('a'))
+
+
+def test_invalidate(tmp_path):
+    cache = ReportCache(path=tmp_path, max_bytes=1000, ttl=0)
+    cache.put('a', b'1', 'text/csv', 'a.csv')
+    cache.put('b', b'2', 'text/csv', 'b.csv')
+    cache.invalidate('a')
+    assert cache.meta('a') is None and cache.meta('b') is not None
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_etag_matches():
+    etag = ReportCache.etag('abc')
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"x", "abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"abd"', etag)
+    assert not etag_matches('', etag)
+    assert not etag_matches(None, etag)
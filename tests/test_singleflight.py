@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from dv_admin_automator.backend.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight(ttl=0)
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', fn)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', fn))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()['waiting'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+    assert results == ['value'] * 4
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert (stats['misses'], stats['shared'], stats['inflight']) == (1, 3, 0)
+
+
+def test_results_are_cached_until_the_ttl():
+    flight = SingleFlight(ttl=60)
+    calls = []
+    assert flight.do('k', lambda: calls.append(1) or 'a') == 'a'
+    assert flight.do('k', lambda: calls.append(1) or 'b') == 'a'
+    assert flight.do('k', lambda: calls.append(1) or 'c', use_cache=False) == 'c'
+    flight.forget('k')
+    assert flight.do('k', lambda: calls.append(1) or 'd') == 'd'
+    assert len(calls) == 3
+    assert flight.stats()['hits'] == 1
+
+
+def test_expired_and_empty_results_are_not_served():
+    flight = SingleFlight(ttl=0.01)
+    flight.do('k', lambda: 'a')
+    time.sleep(0.02)
+    assert flight.do('k', lambda: 'b') == 'b'
+    flight.do('empty', lambda: [])
+    assert flight.do('empty', lambda: ['x']) == ['x']
+
+
+def test_cache_is_bounded():
+    flight = SingleFlight(ttl=60, max_entries=2)
+    for key in 'abc':
+        flight.do(key, lambda key=key: key)
+    assert flight.stats()['cached'] == 2
+    assert flight.do('a', lambda: 'again') == 'again'
+
+
+def test_errors_are_raised_and_not_cached():
+    flight = SingleFlight(ttl=60)
+
+    def boom():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('k', boom)
+    assert flight.do('k', lambda: 'ok') == 'ok'
+    assert flight.stats()['errors'] == 1